@@ -14,8 +14,6 @@ def add_performance_indexes():
         "CREATE INDEX IF NOT EXISTS idx_comments_complaint ON comments(complaint_id)",
         "CREATE INDEX IF NOT EXISTS idx_comments_created ON comments(created_at)",
         "CREATE INDEX IF NOT EXISTS idx_attachments_complaint ON attachments(complaint_id)",
-        "CREATE INDEX IF NOT EXISTS idx_audit_logs_actor ON audit_logs(actor_user_id)",
-        "CREATE INDEX IF NOT EXISTS idx_audit_logs_created ON audit_logs(created_at)",
         "CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status)",
         "CREATE INDEX IF NOT EXISTS idx_payments_created ON payments(created_at)",
         "CREATE INDEX IF NOT EXISTS idx_subscriptions_trader ON subscriptions(trader_id)",
@@ -1,62 +1,110 @@
 """
 Add performance indexes to optimize complaint queries.
 This script adds critical indexes for frequently queried fields.
+
+On PostgreSQL indexes are built with CREATE INDEX CONCURRENTLY so they can be
+added to a live database without blocking writes. Normally this runs as part
+of `python bootstrap.py`, not on its own.
 """
 
 from database import engine
 from sqlalchemy import text
 
+PERFORMANCE_INDEXES = [
+    # Individual column indexes for filtering
+    ("idx_complaints_status", "complaints (status)"),
+    ("idx_complaints_priority", "complaints (priority)"),
+    ("idx_complaints_category_id", "complaints (category_id)"),
+    ("idx_complaints_user_id", "complaints (user_id)"),
+    ("idx_complaints_assigned_to_id", "complaints (assigned_to_id)"),
+    ("idx_complaints_task_status", "complaints (task_status)"),
+
+    # Composite indexes for common query patterns
+    ("idx_complaints_status_priority", "complaints (status, priority)"),
+    ("idx_complaints_category_status", "complaints (category_id, status)"),
+    ("idx_complaints_status_created", "complaints (status, created_at DESC)"),
+
+    # Trader-specific composite indexes for high performance
+    ("idx_complaints_user_status", "complaints (user_id, status)"),
+    ("idx_complaints_user_created", "complaints (user_id, created_at DESC)"),
+    ("idx_complaints_user_status_created", "complaints (user_id, status, created_at DESC)"),
+
+    # Index for SLA monitoring queries
+    ("idx_complaints_status_created_sla", "complaints (status, created_at) WHERE status = 'UNDER_REVIEW'"),
+
+    # Indexes for user account queries
+    ("idx_users_role_active", "users (role, is_active)"),
+    ("idx_users_account_status", "users (account_status)"),
+
+    # Indexes for notification queries
+    ("idx_notifications_user_read", "notifications (user_id, is_read, created_at DESC)"),
+
+    # Sort keys of the paginated lists (pagination.py): filter columns first,
+    # then the sort columns, then the id tiebreaker
+    ("idx_users_created_id", "users (created_at DESC, id DESC)"),
+    ("idx_users_role_created_id", "users (role, created_at DESC, id DESC)"),
+    ("idx_users_name_id", "users (last_name, first_name, id)"),
+    ("idx_payments_created_id", "payments (created_at DESC, id DESC)"),
+    ("idx_payments_status_created_id", "payments (status, created_at DESC, id DESC)"),
+    ("idx_payments_user_created_id", "payments (user_id, created_at DESC, id DESC)"),
+    ("idx_subscriptions_created_id", "subscriptions (created_at DESC, id DESC)"),
+    ("idx_subscriptions_status_created_id", "subscriptions (status, created_at DESC, id DESC)"),
+    ("idx_subscriptions_user_created_id", "subscriptions (user_id, created_at DESC, id DESC)"),
+    ("idx_subscriptions_end_date_id", "subscriptions (end_date, id)"),
+    ("idx_mediation_requests_created_id", "complaint_mediation_requests (created_at DESC, id DESC)"),
+    ("idx_mediation_requests_status_created_id", "complaint_mediation_requests (status, created_at DESC, id DESC)"),
+    ("idx_task_queues_user_position_id", "task_queues (assigned_user_id, queue_position, id)"),
+    ("idx_task_queues_user_created_id", "task_queues (assigned_user_id, created_at, id)"),
+    ("idx_task_queues_role_position_id", "task_queues (assigned_role, queue_position, id)"),
+    ("idx_task_queues_role_created_id", "task_queues (assigned_role, created_at, id)"),
+    ("idx_approvals_approver_status_created_id", "complaint_approvals (approver_id, approval_status, created_at, id)"),
+]
+
+# Databases created before the categories unique constraint existed get it as an index
+UNIQUE_INDEXES = [
+    ("uq_category_name_en", "categories (name_en)"),
+]
+
+
+def _drop_invalid_indexes(conn, names):
+    # A CONCURRENTLY build that fails leaves an INVALID index behind, which
+    # IF NOT EXISTS would then skip forever; drop those so they are rebuilt.
+    invalid = conn.execute(text(
+        "SELECT c.relname FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+    ), {"names": list(names)}).scalars().all()
+    for name in invalid:
+        print(f"⚠ Rebuilding invalid index: {name}")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
 def add_performance_indexes():
     """Add indexes for commonly queried fields to improve performance."""
-    
-    indexes_to_add = [
-        # Individual column indexes for filtering
-        ("idx_complaints_status", "CREATE INDEX IF NOT EXISTS idx_complaints_status ON complaints (status)"),
-        ("idx_complaints_priority", "CREATE INDEX IF NOT EXISTS idx_complaints_priority ON complaints (priority)"),
-        ("idx_complaints_category_id", "CREATE INDEX IF NOT EXISTS idx_complaints_category_id ON complaints (category_id)"),
-        ("idx_complaints_user_id", "CREATE INDEX IF NOT EXISTS idx_complaints_user_id ON complaints (user_id)"),
-        ("idx_complaints_assigned_to_id", "CREATE INDEX IF NOT EXISTS idx_complaints_assigned_to_id ON complaints (assigned_to_id)"),
-        ("idx_complaints_task_status", "CREATE INDEX IF NOT EXISTS idx_complaints_task_status ON complaints (task_status)"),
-        
-        # Composite indexes for common query patterns
-        ("idx_complaints_status_priority", "CREATE INDEX IF NOT EXISTS idx_complaints_status_priority ON complaints (status, priority)"),
-        ("idx_complaints_category_status", "CREATE INDEX IF NOT EXISTS idx_complaints_category_status ON complaints (category_id, status)"),
-        ("idx_complaints_status_created", "CREATE INDEX IF NOT EXISTS idx_complaints_status_created ON complaints (status, created_at DESC)"),
-        
-        # Trader-specific composite indexes for high performance
-        ("idx_complaints_user_status", "CREATE INDEX IF NOT EXISTS idx_complaints_user_status ON complaints (user_id, status)"),
-        ("idx_complaints_user_created", "CREATE INDEX IF NOT EXISTS idx_complaints_user_created ON complaints (user_id, created_at DESC)"),
-        ("idx_complaints_user_status_created", "CREATE INDEX IF NOT EXISTS idx_complaints_user_status_created ON complaints (user_id, status, created_at DESC)"),
-        
-        # Index for SLA monitoring queries
-        ("idx_complaints_status_created_sla", "CREATE INDEX IF NOT EXISTS idx_complaints_status_created_sla ON complaints (status, created_at) WHERE status = 'UNDER_REVIEW'"),
-        
-        # Indexes for user account queries
-        ("idx_users_role_active", "CREATE INDEX IF NOT EXISTS idx_users_role_active ON users (role, is_active)"),
-        ("idx_users_account_status", "CREATE INDEX IF NOT EXISTS idx_users_account_status ON users (account_status)"),
-        
-        # Indexes for notification queries
-        ("idx_notifications_user_read", "CREATE INDEX IF NOT EXISTS idx_notifications_user_read ON notifications (user_id, is_read, created_at DESC)"),
-        
-        # Index for audit log queries
-        ("idx_audit_logs_target", "CREATE INDEX IF NOT EXISTS idx_audit_logs_target ON audit_logs (target_type, target_id, created_at DESC)"),
+
+    concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+    statements = [
+        (name, f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS {name} ON {target}", True)
+        for name, target in UNIQUE_INDEXES
+    ] + [
+        (name, f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {target}", False)
+        for name, target in PERFORMANCE_INDEXES
     ]
-    
+
     print("Adding performance indexes...")
-    with engine.connect() as conn:
-        for idx_name, idx_sql in indexes_to_add:
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if concurrently:
+            _drop_invalid_indexes(conn, [name for name, _, _ in statements])
+
+        for idx_name, idx_sql, unique in statements:
             try:
                 conn.execute(text(idx_sql))
-                conn.commit()
-                print(f"✓ Added index: {idx_name}")
+                print(f"✓ Index ready: {idx_name}")
             except Exception as e:
-                error_msg = str(e).lower()
-                if 'already exists' in error_msg or 'duplicate' in error_msg:
-                    print(f"✓ Index already exists: {idx_name}")
-                else:
-                    print(f"✗ Error adding index {idx_name}: {e}")
-                conn.rollback()
-    
+                if unique:
+                    raise RuntimeError(f"Failed to create unique index {idx_name}: {e}")
+                print(f"✗ Error adding index {idx_name}: {e}")
+
     print("\n✓ Performance indexes setup complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+"""partition_audit_logs_jsonb_metadata
+
+Revision ID: c4e1a7d9b2f3
+Revises: bfcbdbb1db9c
+Create Date: 2026-10-18 09:12:41.503118
+
+Rebuilds audit_logs as a table range-partitioned by month on created_at,
+moves metadata out of the free-text details column into a JSONB column
+(GIN indexed), normalizes action/target_type casing and adds the
+audit_actions lookup table. Existing rows are backfilled.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1a7d9b2f3'
+down_revision: Union[str, Sequence[str], None] = 'bfcbdbb1db9c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTITION_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION create_audit_log_partition(month_start date) RETURNS void AS $$
+DECLARE
+    partition_start date := date_trunc('month', month_start)::date;
+    partition_name text := 'audit_logs_' || to_char(partition_start, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+        partition_name, partition_start, (partition_start + interval '1 month')::date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ensure_audit_log_partitions(months_ahead integer) RETURNS void AS $$
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        PERFORM create_audit_log_partition((date_trunc('month', now()) + make_interval(months => i))::date);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION audit_try_jsonb(value text) RETURNS jsonb AS $$
+BEGIN
+    RETURN value::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            actor_user_id INTEGER NOT NULL REFERENCES users (id),
+            action VARCHAR NOT NULL,
+            target_type VARCHAR NOT NULL,
+            target_id INTEGER NOT NULL,
+            details TEXT,
+            metadata JSONB,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(PARTITION_FUNCTIONS)
+
+    # One partition per month that has history, plus three months ahead.
+    # Anything outside the covered range lands in the default partition.
+    op.execute("""
+        DO $$
+        DECLARE
+            month_cursor date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(min(created_at), now()))::date
+              INTO month_cursor FROM audit_logs_legacy;
+            WHILE month_cursor < date_trunc('month', now())::date LOOP
+                PERFORM create_audit_log_partition(month_cursor);
+                month_cursor := (month_cursor + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+    op.execute("SELECT ensure_audit_log_partitions(3)")
+    op.execute("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    # Backfill: split "... | Metadata: {json}" out of details into the JSONB column.
+    op.execute(r"""
+        INSERT INTO audit_logs (id, actor_user_id, action, target_type, target_id, details, metadata, created_at)
+        SELECT
+            id,
+            actor_user_id,
+            upper(action),
+            lower(target_type),
+            target_id,
+            CASE
+                WHEN details ~ 'Metadata: \{.*\}$'
+                     AND audit_try_jsonb(substring(details FROM 'Metadata: (\{.*\})$')) IS NOT NULL
+                THEN NULLIF(regexp_replace(details, '( \| )?Metadata: \{.*\}$', ''), '')
+                ELSE details
+            END,
+            CASE
+                WHEN details ~ 'Metadata: \{.*\}$'
+                THEN audit_try_jsonb(substring(details FROM 'Metadata: (\{.*\})$'))
+            END,
+            COALESCE(created_at, now())
+        FROM audit_logs_legacy
+    """)
+    op.execute("SELECT setval('audit_logs_id_seq', GREATEST((SELECT max(id) FROM audit_logs), 1))")
+    op.execute("DROP TABLE audit_logs_legacy")
+
+    op.create_index('idx_audit_logs_target', 'audit_logs', ['target_type', 'target_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('idx_audit_logs_actor_created', 'audit_logs', ['actor_user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('idx_audit_logs_action_created', 'audit_logs', ['action', sa.text('created_at DESC')], unique=False)
+    op.create_index('idx_audit_logs_created_at', 'audit_logs', [sa.text('created_at DESC')], unique=False)
+    op.create_index(
+        'idx_audit_logs_metadata', 'audit_logs', ['metadata'], unique=False,
+        postgresql_using='gin', postgresql_ops={'metadata': 'jsonb_path_ops'}
+    )
+
+    op.create_table(
+        'audit_actions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.execute("INSERT INTO audit_actions (name) SELECT DISTINCT action FROM audit_logs")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('audit_actions')
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+
+    op.create_table(
+        'audit_logs',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('audit_logs_id_seq')"), nullable=False),
+        sa.Column('actor_user_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('target_type', sa.String(), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=False),
+        sa.Column('details', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['actor_user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("""
+        INSERT INTO audit_logs (id, actor_user_id, action, target_type, target_id, details, created_at)
+        SELECT
+            id, actor_user_id, action, target_type, target_id,
+            CASE
+                WHEN metadata IS NULL THEN details
+                WHEN details IS NULL THEN 'Metadata: ' || metadata::text
+                ELSE details || ' | Metadata: ' || metadata::text
+            END,
+            created_at
+        FROM audit_logs_partitioned
+    """)
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS ensure_audit_log_partitions(integer)")
+    op.execute("DROP FUNCTION IF EXISTS create_audit_log_partition(date)")
+    op.execute("DROP FUNCTION IF EXISTS audit_try_jsonb(text)")
+
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+    op.create_index('idx_audit_logs_target', 'audit_logs', ['target_type', 'target_id', sa.text('created_at DESC')], unique=False)
@@ -0,0 +1,61 @@
+"""add_export_jobs_table
+
+Revision ID: d82f5b1e6a47
+Revises: c4e1a7d9b2f3
+Create Date: 2026-10-19 10:04:27.381902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd82f5b1e6a47'
+down_revision: Union[str, Sequence[str], None] = 'c4e1a7d9b2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('requested_by_id', sa.Integer(), nullable=False),
+        sa.Column('export_type', sa.String(), nullable=False),
+        sa.Column('params', postgresql.JSONB(astext_type=sa.Text()), nullable=False, server_default='{}'),
+        sa.Column('dedup_key', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='exportjobstatus'), nullable=False, server_default='PENDING'),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rows_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('file_path', sa.String(), nullable=True),
+        sa.Column('file_size', sa.BigInteger(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['requested_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_export_jobs_id'), 'export_jobs', ['id'], unique=False)
+    op.create_index('idx_export_jobs_dedup_status', 'export_jobs', ['dedup_key', 'status'], unique=False)
+    op.create_index('idx_export_jobs_expires_at', 'export_jobs', ['expires_at'], unique=False)
+    op.create_index(
+        'uq_export_jobs_active_dedup', 'export_jobs', ['dedup_key'], unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'RUNNING')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_export_jobs_active_dedup', table_name='export_jobs')
+    op.drop_index('idx_export_jobs_expires_at', table_name='export_jobs')
+    op.drop_index('idx_export_jobs_dedup_status', table_name='export_jobs')
+    op.drop_index(op.f('ix_export_jobs_id'), table_name='export_jobs')
+    op.drop_table('export_jobs')
+    sa.Enum(name='exportjobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,55 @@
+"""add_content_addressed_blobs
+
+Revision ID: e5a9c3f17b20
+Revises: d82f5b1e6a47
+Create Date: 2026-10-19 14:12:05.518377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3f17b20'
+down_revision: Union[str, Sequence[str], None] = 'd82f5b1e6a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REFERENCES = (
+    ('attachments', 'blob_sha256'),
+    ('payments', 'proof_sha256'),
+    ('users', 'profile_picture_sha256'),
+    ('users', 'business_license_sha256'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('mime_type', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('last_uploaded_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(op.f('ix_blobs_last_uploaded_at'), 'blobs', ['last_uploaded_at'], unique=False)
+
+    for table, column in REFERENCES:
+        op.add_column(table, sa.Column(column, sa.String(length=64), nullable=True))
+        op.create_foreign_key(f'fk_{table}_{column}_blobs', table, 'blobs', [column], ['sha256'])
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(REFERENCES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+        op.drop_constraint(f'fk_{table}_{column}_blobs', table, type_='foreignkey')
+        op.drop_column(table, column)
+
+    op.drop_index(op.f('ix_blobs_last_uploaded_at'), table_name='blobs')
+    op.drop_table('blobs')
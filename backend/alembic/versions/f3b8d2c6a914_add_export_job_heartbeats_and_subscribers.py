@@ -0,0 +1,47 @@
+"""add_export_job_heartbeats_and_subscribers
+
+Revision ID: f3b8d2c6a914
+Revises: e5a9c3f17b20
+Create Date: 2026-10-19 18:41:52.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2c6a914'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c3f17b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('export_jobs', sa.Column('owner', sa.String(), nullable=True))
+    op.add_column('export_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.create_index('idx_export_jobs_owner_status', 'export_jobs', ['owner', 'status'], unique=False)
+    # Jobs queued before heartbeats existed have no owner to keep them alive
+    op.execute(
+        "UPDATE export_jobs SET status = 'FAILED', error = 'Export job did not finish', "
+        "completed_at = now(), expires_at = now() + interval '1 day' "
+        "WHERE status IN ('PENDING', 'RUNNING')"
+    )
+    op.create_table(
+        'export_job_subscribers',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['export_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('export_job_subscribers')
+    op.drop_index('idx_export_jobs_owner_status', table_name='export_jobs')
+    op.drop_column('export_jobs', 'heartbeat_at')
+    op.drop_column('export_jobs', 'owner')
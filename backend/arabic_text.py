@@ -0,0 +1,132 @@
+"""
+Arabic shaping + bidi reordering for ReportLab output.
+
+ReportLab has no complex-script support, so Arabic must be reshaped into
+presentation forms and reordered to visual order before it is drawn.
+Both steps are pure functions of the input string, and export documents
+repeat the same strings constantly (labels, statuses, categories, trader
+names), so results are memoized per process.
+
+Only PDFs need this: spreadsheet and CSV consumers shape Arabic themselves
+and must receive the logical-order text.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import logging
+import re
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+logger = logging.getLogger(__name__)
+
+# Arabic, Arabic Supplement/Extended-A, presentation forms A and B, plus
+# Hebrew: anything outside these needs neither reshaping nor reordering.
+_RTL_CHARS = re.compile("[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFF]")
+
+# Free-text fields (descriptions, summaries) are rarely repeated; keeping
+# them out of the memo stops them evicting the strings that are.
+MAX_MEMOIZED_LENGTH = 256
+
+
+class _Reshaper(arabic_reshaper.ArabicReshaper):
+    """
+    ArabicReshaper meant to cache its compiled ligature regex, but the
+    hasattr() check uses the unmangled name so it is rebuilt from the
+    configparser on every reshape(), which is ~95% of the call's cost.
+    """
+
+    @property
+    def _ligatures_re(self):
+        compiled = self.__dict__.get("_compiled_ligatures_re")
+        if compiled is None:
+            compiled = super()._ligatures_re
+            self.__dict__["_compiled_ligatures_re"] = compiled
+        return compiled
+
+
+_reshaper = _Reshaper()
+
+
+def _shape(text: str) -> str:
+    try:
+        return get_display(_reshaper.reshape(text))
+    except Exception as e:
+        logger.warning(f"Error reshaping Arabic text: {e}")
+        return text
+
+
+_shape_memoized = lru_cache(maxsize=8192)(_shape)
+
+
+def shape(text: Optional[str]) -> Optional[str]:
+    """Return text ready to draw with ReportLab; non-RTL text is returned unchanged."""
+    if not text or not _RTL_CHARS.search(text):
+        return text
+    if len(text) > MAX_MEMOIZED_LENGTH:
+        return _shape(text)
+    return _shape_memoized(text)
+
+
+def shape_many(values: Iterable[Any]) -> List[Any]:
+    """
+    Shape a column of values. Each distinct string is shaped once; non-string
+    values (ids, numbers, None) pass through untouched.
+    """
+    values = list(values)
+    shaped: Dict[str, str] = {}
+    for value in values:
+        if isinstance(value, str) and value not in shaped:
+            shaped[value] = shape(value)
+    return [shaped[value] if isinstance(value, str) else value for value in values]
+
+
+def shape_rows(rows: Sequence[Sequence[Any]], columns: Optional[Sequence[int]] = None) -> List[List[Any]]:
+    """
+    Shape the given column indexes (all columns by default) of a row batch,
+    column by column, and return new rows.
+    """
+    if not rows:
+        return []
+    width = len(rows[0])
+    targets = set(range(width) if columns is None else columns)
+    shaped_columns = [
+        shape_many(row[i] for row in rows) if i in targets else [row[i] for row in rows]
+        for i in range(width)
+    ]
+    return [list(row) for row in zip(*shaped_columns)]
+
+
+def cache_info():
+    return _shape_memoized.cache_info()
+
+
+# Constant labels used by the PDF templates, shaped once at import
+LABELS: Dict[str, str] = {
+    text: _shape(text)
+    for text in (
+        'القيمة',
+        'الحقل',
+        'المؤشر',
+        'رقم الشكوى',
+        'الحالة',
+        'الأولوية',
+        'الفئة',
+        'تاريخ الإنشاء',
+        'التاجر',
+        'الوصف:',
+        'ملخص الشكوى:',
+        'تقرير التحليلات',
+        'إجمالي الشكاوى',
+        'قيد الانتظار',
+        'قيد المراجعة',
+        'محلولة',
+        'مرفوضة',
+    )
+}
+
+
+def label(text: str) -> str:
+    """Shaped form of a constant template label."""
+    cached = LABELS.get(text)
+    return cached if cached is not None else shape(text)
@@ -1,8 +1,69 @@
+from sqlalchemy import event, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from models import AuditLog
+from models import AuditLog, AuditAction
+from database import SessionLocal, AsyncBackedSession, engine
+from config import get_settings
+from json_codec import dumps, loads
+from metrics import (
+    AUDIT_WRITER_QUEUED, AUDIT_WRITER_SPILLED, AUDIT_WRITER_FAILURES, AUDIT_WRITER_DROPPED, AUDIT_WRITER_RESTARTS
+)
 from datetime import datetime
-from typing import Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, List
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PENDING_AUDIT_LOGS_KEY = "pending_audit_logs"
+SPILL_SUFFIX = ".jsonl"
+
+_known_actions = set()
+
+
+def build_audit_entry(
+    actor_user_id: int,
+    action: str,
+    target_type: str,
+    target_id: int,
+    details: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build a row for the audit_logs table. Action codes are stored upper-case
+    and target types lower-case so filters can use exact, indexed matches.
+    """
+    return {
+        "actor_user_id": actor_user_id,
+        "action": action.upper(),
+        "target_type": target_type.lower(),
+        "target_id": target_id,
+        "details": details,
+        "metadata": metadata or None,
+        "created_at": datetime.utcnow()
+    }
+
+
+def _register_actions(connection, entries: List[Dict[str, Any]]):
+    new_actions = {entry["action"] for entry in entries} - _known_actions
+    if not new_actions:
+        return
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(AuditAction.__table__).on_conflict_do_nothing(index_elements=["name"])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(AuditAction.__table__).on_conflict_do_nothing(index_elements=["name"])
+    else:
+        return
+
+    now = datetime.utcnow()
+    connection.execute(stmt, [{"name": name, "created_at": now} for name in sorted(new_actions)])
+    _known_actions.update(new_actions)
+
 
 def create_audit_log(
     db: Session,
@@ -13,23 +74,14 @@ def create_audit_log(
     details: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None
 ):
-    if metadata:
-        if details:
-            details = f"{details} | Metadata: {json.dumps(metadata)}"
-        else:
-            details = f"Metadata: {json.dumps(metadata)}"
-    
-    audit_log = AuditLog(
-        actor_user_id=actor_user_id,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        details=details,
-        created_at=datetime.utcnow()
-    )
-    db.add(audit_log)
-    db.flush()
-    return audit_log
+    """
+    Buffer an audit entry on the session. Buffered entries are written with a
+    single multi-row INSERT when the session commits, and discarded if it
+    rolls back.
+    """
+    entry = build_audit_entry(actor_user_id, action, target_type, target_id, details, metadata)
+    db.info.setdefault(PENDING_AUDIT_LOGS_KEY, []).append(entry)
+    return entry
 
 def create_change_log(
     db: Session,
@@ -45,9 +97,9 @@ def create_change_log(
         old_val = values.get('old', 'N/A')
         new_val = values.get('new', 'N/A')
         change_summary.append(f"{field}: '{old_val}' → '{new_val}'")
-    
+
     change_details = f"{details or 'Changed:'} {'; '.join(change_summary)}"
-    
+
     return create_audit_log(
         db=db,
         actor_user_id=actor_user_id,
@@ -57,3 +109,297 @@ def create_change_log(
         details=change_details,
         metadata=changes
     )
+
+
+@event.listens_for(SessionLocal, "before_commit")
+@event.listens_for(AsyncBackedSession, "before_commit")
+def _write_pending_audit_logs(session: Session):
+    entries = session.info.pop(PENDING_AUDIT_LOGS_KEY, None)
+    if not entries:
+        return
+    session.flush()
+    session.execute(insert(AuditLog.__table__), entries)
+    _register_actions(session.connection(), entries)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+@event.listens_for(AsyncBackedSession, "after_rollback")
+def _discard_pending_audit_logs(session: Session):
+    session.info.pop(PENDING_AUDIT_LOGS_KEY, None)
+
+
+def commit_pending_audit_logs(db: Session):
+    """
+    Persist entries that were buffered after the request's last commit.
+    Anything else left uncommitted on the session is discarded, exactly as
+    closing the session would.
+    """
+    entries = db.info.pop(PENDING_AUDIT_LOGS_KEY, None)
+    if not entries:
+        return
+
+    try:
+        db.rollback()
+        db.execute(insert(AuditLog.__table__), entries)
+        _register_actions(db.connection(), entries)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to write {len(entries)} audit log entries: {e}", exc_info=True)
+        db.rollback()
+
+
+def _insert_audit_entries(entries: List[Dict[str, Any]]):
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog.__table__), entries)
+        _register_actions(conn, entries)
+
+
+class AuditLogWriter:
+    """
+    Batched background writer for high-volume audit entries (e.g. attachment
+    downloads). Producers wait when the queue is full, and stop() drains
+    everything that was queued before shutdown.
+
+    Entries are compliance records and are never dropped on a write error.
+    A batch is retried with backoff, then spilled to a JSON-lines file in
+    spill_dir. Spilled files are replayed once writes succeed again, by
+    whichever worker gets to them first. The flush loop runs under a
+    supervisor that restarts it, and its unwritten batch, if it ever dies.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+        spill_dir: str,
+        max_attempts: int = 3,
+        replay_interval_seconds: float = 30.0
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.spill_dir = spill_dir
+        self.max_attempts = max_attempts
+        self.replay_interval_seconds = replay_interval_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # The batch being written, kept so a restarted loop writes it first
+        self._batch: Optional[List[Dict[str, Any]]] = None
+        self._stopping = False
+        self._next_replay = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._release_stale_claims()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._stopping = False
+        self._task = asyncio.create_task(self._supervise())
+        logger.info("Audit log writer started")
+
+    async def stop(self):
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+        logger.info("Audit log writer stopped")
+
+    async def enqueue(
+        self,
+        actor_user_id: int,
+        action: str,
+        target_type: str,
+        target_id: int,
+        details: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        entry = build_audit_entry(actor_user_id, action, target_type, target_id, details, metadata)
+
+        if not self.running:
+            await self._write_batch([entry])
+            return
+
+        await self._queue.put(entry)
+        AUDIT_WRITER_QUEUED.set(self._queue.qsize())
+
+    async def _supervise(self):
+        while True:
+            try:
+                await self._run()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                AUDIT_WRITER_RESTARTS.inc()
+                logger.exception("Audit log writer loop crashed; restarting it")
+                await asyncio.sleep(1)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        if self._batch:
+            await self._write_batch(self._batch)
+            self._batch = None
+
+        while not self._stopping:
+            try:
+                entry = await asyncio.wait_for(self._queue.get(), self.replay_interval_seconds)
+            except asyncio.TimeoutError:
+                await self._replay_spilled()
+                continue
+            if entry is None:
+                self._stopping = True
+                break
+
+            self._batch = [entry]
+            deadline = loop.time() + self.flush_interval_seconds
+            while len(self._batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    self._stopping = True
+                    break
+                self._batch.append(entry)
+
+            AUDIT_WRITER_QUEUED.set(self._queue.qsize())
+            if await self._write_batch(self._batch):
+                await self._replay_spilled()
+            self._batch = None
+
+        # Entries queued behind the stop marker by producers that were already waiting
+        leftover = []
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not None:
+                leftover.append(entry)
+        if leftover:
+            await self._write_batch(leftover)
+        AUDIT_WRITER_QUEUED.set(0)
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Write `batch`, spilling it to disk if the database keeps failing. True if it reached the database."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await asyncio.to_thread(_insert_audit_entries, batch)
+                return True
+            except Exception as e:
+                AUDIT_WRITER_FAILURES.inc()
+                logger.warning(f"Audit batch write failed (attempt {attempt}/{self.max_attempts}): {e}")
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+        delay = 1.0
+        while True:
+            try:
+                await asyncio.to_thread(self._spill, batch)
+                logger.error(f"Spilled {len(batch)} audit log entries to {self.spill_dir}; they are replayed once writes succeed")
+                return False
+            except Exception as e:
+                logger.error(f"Could not spill {len(batch)} audit log entries: {e}")
+            if self._stopping or not self.running:
+                # Shutting down (or writing inline without the loop) with neither the database nor the disk: the log is all that is left
+                AUDIT_WRITER_DROPPED.inc(len(batch))
+                logger.critical(f"Dropping {len(batch)} audit log entries: {batch}")
+                return False
+            # Keep the batch in memory; meanwhile the queue fills up and producers wait
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(_insert_audit_entries, batch)
+                return True
+            except Exception as e:
+                AUDIT_WRITER_FAILURES.inc()
+                logger.warning(f"Audit batch write failed: {e}")
+            delay = min(delay * 2, self.replay_interval_seconds)
+
+    # Spill files are named <time_ns>-<pid>-<entries>.jsonl. A worker replaying one
+    # first renames it to <name>.<pid>.replaying, so no two workers insert it twice.
+
+    def _spill(self, batch: List[Dict[str, Any]]):
+        name = f"{time.time_ns()}-{os.getpid()}-{len(batch)}{SPILL_SUFFIX}"
+        tmp_path = os.path.join(self.spill_dir, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            for entry in batch:
+                f.write(dumps(entry) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.spill_dir, name))
+        self._count_spilled()
+
+    def _spilled_files(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.spill_dir) if name.endswith(SPILL_SUFFIX))
+        except FileNotFoundError:
+            return []
+
+    def _count_spilled(self):
+        AUDIT_WRITER_SPILLED.set(sum(int(name[:-len(SPILL_SUFFIX)].rsplit("-", 1)[1]) for name in self._spilled_files()))
+
+    def _release_stale_claims(self, older_than_seconds: float = 600):
+        """Put back files a worker claimed for replay and never finished (it died)."""
+        now = time.time()
+        for name in os.listdir(self.spill_dir):
+            if not name.endswith(".replaying"):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if now - os.path.getmtime(path) > older_than_seconds:
+                    os.replace(path, os.path.join(self.spill_dir, name.split(SPILL_SUFFIX)[0] + SPILL_SUFFIX))
+            except FileNotFoundError:
+                continue
+        self._count_spilled()
+
+    def _replay_file(self, name: str) -> bool:
+        path = os.path.join(self.spill_dir, name)
+        claimed = f"{path}.{os.getpid()}.replaying"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return True
+        os.utime(claimed)
+        try:
+            with open(claimed, "rb") as f:
+                entries = [loads(line) for line in f if line.strip()]
+            for entry in entries:
+                entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+            _insert_audit_entries(entries)
+        except Exception as e:
+            os.replace(claimed, path)
+            logger.warning(f"Replaying spilled audit entries {name} failed: {e}")
+            return False
+        os.remove(claimed)
+        logger.info(f"Replayed {len(entries)} spilled audit log entries from {name}")
+        return True
+
+    def _replay_all(self):
+        for name in self._spilled_files():
+            if not self._replay_file(name):
+                break
+        self._count_spilled()
+
+    async def _replay_spilled(self):
+        now = time.monotonic()
+        if now < self._next_replay:
+            return
+        self._next_replay = now + self.replay_interval_seconds
+        if self._spilled_files():
+            await asyncio.to_thread(self._replay_all)
+
+
+audit_log_writer = AuditLogWriter(
+    max_queue_size=settings.AUDIT_WRITER_QUEUE_SIZE,
+    batch_size=settings.AUDIT_WRITER_BATCH_SIZE,
+    flush_interval_seconds=settings.AUDIT_WRITER_FLUSH_INTERVAL_SECONDS,
+    spill_dir=settings.AUDIT_WRITER_SPILL_DIR
+)
@@ -1,15 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_db, get_async_db
 from models import User, UserRole
 from config import get_settings
 from password_validator import validate_password_strength
+from password_service import password_service
 
 settings = get_settings()
 
@@ -20,21 +21,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    password_bytes = plain_password.encode('utf-8')[:72]
-    return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
+    return password_service.verify_blocking(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+def validate_new_password(password: str):
     is_valid, errors = validate_password_strength(password)
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"message": "Password does not meet security requirements", "errors": errors}
         )
-    
-    password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+
+def get_password_hash(password: str) -> str:
+    validate_new_password(password)
+    return password_service.hash_blocking(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -46,28 +45,45 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def user_id_from_token(credentials: HTTPAuthorizationCredentials) -> int:
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id_str = payload.get("sub")
         if user_id_str is None:
-            raise credentials_exception
-        user_id = int(user_id_str)
+            raise _credentials_exception()
+        return int(user_id_str)
     except (JWTError, ValueError):
-        raise credentials_exception
+        raise _credentials_exception()
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    user_id = user_id_from_token(credentials)
     
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for endpoints on the async session; the user is loaded into the request's AsyncSession."""
+    user_id = user_id_from_token(credentials)
+    
+    user = await db.get(User, user_id)
+    if user is None:
+        raise _credentials_exception()
     return user
 
 def require_role(*allowed_roles: UserRole):
@@ -79,3 +95,13 @@ def require_role(*allowed_roles: UserRole):
             )
         return current_user
     return role_checker
+
+def require_role_async(*allowed_roles: UserRole):
+    async def role_checker(current_user: User = Depends(get_current_user_async)) -> User:
+        if current_user.role not in allowed_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        return current_user
+    return role_checker
@@ -0,0 +1,65 @@
+"""
+Throughput benchmark for Arabic shaping of export rows.
+
+Compares shaping every cell independently (the previous per-call
+reshape + bidi path) with the memoized column API in arabic_text, on the
+same synthetic complaint rows as export_memory, and checks both produce
+identical output.
+
+    cd backend
+    python -m benchmarks.arabic_shaping --rows 2000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.export_memory import synthetic_batches
+
+
+def shape_uncached(rows):
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    return [
+        [get_display(arabic_reshaper.reshape(value)) if isinstance(value, str) and value else value for value in row]
+        for row in rows
+    ]
+
+
+def run(rows: int, columns):
+    import arabic_text
+
+    batches = list(synthetic_batches(rows))
+    arabic_text._shape_memoized.cache_clear()
+
+    started = time.perf_counter()
+    baseline = [shape_uncached(batch) for batch in batches]
+    uncached_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    shaped = [arabic_text.shape_rows(batch, columns) for batch in batches]
+    batched_seconds = time.perf_counter() - started
+
+    if columns is None and shaped != baseline:
+        raise AssertionError("memoized shaping output differs from the uncached path")
+    return uncached_seconds, batched_seconds, arabic_text.cache_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[2000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'uncached s':>11} {'batched s':>10} {'speedup':>8} {'distinct':>9}")
+    for rows in args.rows:
+        uncached, batched, info = run(rows, None)
+        print(f"{rows:>9} {uncached:>11.2f} {batched:>10.2f} {uncached / batched:>7.1f}x {info.currsize:>9}")
+
+
+if __name__ == "__main__":
+    main()
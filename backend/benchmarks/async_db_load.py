@@ -0,0 +1,141 @@
+"""
+Mixed-traffic load test for the async database endpoints.
+
+Logs in as a committee user against a running server and keeps --concurrency
+clients busy for --duration seconds, each picking a request from the mix
+below. Reports throughput and p50/p99 latency per endpoint, so a run against
+the previous revision and one against this one can be compared directly.
+
+    cd backend
+    gunicorn main:app -c gunicorn.conf.py &
+    python -m benchmarks.async_db_load --email admin@example.com --password ... \\
+        --concurrency 50 --duration 30 --json > after.json
+
+The export endpoints hold their query for the longest, which is where a
+blocking session used to stall every other request on the same worker; the
+light reads in the mix show that stall in their p99.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+# (weight, method, path, json body) - "{id}" is replaced with a complaint id and
+# a non-None body with a random batch of ids
+MIX = [
+    (40, "GET", "/api/auth/me", None),
+    (25, "GET", "/api/categories", None),
+    (15, "GET", "/api/export/complaint/{id}/pdf", None),
+    (10, "POST", "/api/export/complaints/pdf-batch", {}),
+    (5, "GET", "/api/export/analytics/excel", None),
+    (5, "GET", "/api/export/analytics/pdf", None),
+]
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def complaint_ids(client: httpx.AsyncClient, limit: int) -> list:
+    response = await client.get("/api/complaints", params={"page_size": min(limit, 100)})
+    response.raise_for_status()
+    ids = [item["id"] for item in response.json()["complaints"]]
+    if not ids:
+        raise SystemExit("no complaints visible to this user; seed some first")
+    return ids
+
+
+async def client_loop(client, ids, deadline, results):
+    weights = [weight for weight, *_ in MIX]
+    while time.perf_counter() < deadline:
+        _, method, path, body = random.choices(MIX, weights=weights)[0]
+        label = f"{method} {path}"
+        url = path.replace("{id}", str(random.choice(ids)))
+        if body is not None:
+            body = {"complaint_ids": random.sample(ids, min(5, len(ids)))}
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, json=body)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        bucket = results.setdefault(label, {"latencies": [], "errors": 0})
+        bucket["latencies"].append(elapsed_ms)
+        if not ok:
+            bucket["errors"] += 1
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        token = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        ids = await complaint_ids(client, args.sample)
+
+        results = {}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(client_loop(client, ids, deadline, results) for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+
+    everything = [ms for bucket in results.values() for ms in bucket["latencies"]]
+    report = {
+        "concurrency": args.concurrency,
+        "duration_s": round(wall, 2),
+        "requests": len(everything),
+        "throughput_rps": round(len(everything) / wall, 1),
+        "p50_ms": round(percentile(everything, 50), 1),
+        "p99_ms": round(percentile(everything, 99), 1),
+        "errors": sum(bucket["errors"] for bucket in results.values()),
+        "endpoints": {},
+    }
+    for label, bucket in sorted(results.items()):
+        report["endpoints"][label] = {
+            "requests": len(bucket["latencies"]),
+            "errors": bucket["errors"],
+            "p50_ms": round(percentile(bucket["latencies"], 50), 1),
+            "p99_ms": round(percentile(bucket["latencies"], 99), 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True, help="a Technical or Higher Committee user")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--sample", type=int, default=100, help="complaint ids to draw from")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return
+
+    print(f"{report['requests']} requests in {report['duration_s']}s "
+          f"({report['throughput_rps']} req/s, concurrency {report['concurrency']})")
+    print(f"overall p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, errors {report['errors']}")
+    print(f"\n{'endpoint':<45} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, row in report["endpoints"].items():
+        print(f"{label:<45} {row['requests']:>9} {row['errors']:>7} {row['p50_ms']:>9} {row['p99_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
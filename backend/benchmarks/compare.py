@@ -0,0 +1,83 @@
+"""
+Diff two benchmarks/scenarios.py reports step by step.
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+
+Prints p50, p99 and throughput for every step in either report with the
+relative change, flagging latency increases or throughput drops beyond
+--threshold percent. With --fail-on-regression the exit status is 1 when
+anything is flagged, so the comparison can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+COLUMNS = (("p50_ms", True), ("p99_ms", True), ("throughput_rps", False))
+
+
+def change(before: float, after: float) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(before: dict, after: dict, threshold: float):
+    """Rows of (label, {column: (before, after, pct, regressed)}) and whether anything regressed."""
+    rows = []
+    regressed_any = False
+    steps = dict(before["steps"], **{"(all)": before["totals"]})
+    after_steps = dict(after["steps"], **{"(all)": after["totals"]})
+    for label in sorted(set(steps) | set(after_steps)):
+        old, new = steps.get(label), after_steps.get(label)
+        cells = {}
+        for column, higher_is_worse in COLUMNS:
+            if old is None or new is None:
+                cells[column] = (old and old[column], new and new[column], None, False)
+                continue
+            pct = change(old[column], new[column])
+            regressed = pct > threshold if higher_is_worse else pct < -threshold
+            regressed_any |= regressed
+            cells[column] = (old[column], new[column], pct, regressed)
+        if old and new and new["errors"] > old["errors"]:
+            regressed_any = True
+        rows.append((label, cells, old and old["errors"], new and new["errors"]))
+    return rows, regressed_any
+
+
+def _cell(values) -> str:
+    old, new, pct, regressed = values
+    if pct is None:
+        return f"{old if old is not None else '-'} → {new if new is not None else '-'}"
+    return f"{old} → {new} ({pct:+.1f}%){' !' if regressed else ''}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="percent change flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    rows, regressed = compare(before, after, args.threshold)
+    print(f"{before['meta']['revision']} → {after['meta']['revision']}  (! = worse by more than {args.threshold}%)")
+    for key in ("users", "duration_s", "think_scale"):
+        if before["meta"][key] != after["meta"][key]:
+            print(f"⚠ runs differ in {key}: {before['meta'][key]} vs {after['meta'][key]}")
+    print(f"\n{'step':<62} {'p50 ms':<28} {'p99 ms':<28} {'req/s':<28} errors")
+    for label, cells, old_errors, new_errors in rows:
+        print(f"{label:<62} {_cell(cells['p50_ms']):<28} {_cell(cells['p99_ms']):<28} "
+              f"{_cell(cells['throughput_rps']):<28} {old_errors if old_errors is not None else '-'} → "
+              f"{new_errors if new_errors is not None else '-'}")
+
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
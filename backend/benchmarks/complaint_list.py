@@ -0,0 +1,109 @@
+"""
+Complaint list page: ORM objects vs the lean projection.
+
+    cd backend
+    python -m benchmarks.datagen --complaints 100000 --seed 1
+    python -m benchmarks.complaint_list --pages 50 --page-size 100
+
+Both paths read the same newest-first pages from the configured database, as
+a higher committee member (no row filter), and turn them into response bytes:
+
+    orm      Complaint objects with selectinload'ed users and category,
+             validated into ComplaintResponse through from_attributes,
+             validated again as the response model and dumped to JSON (what
+             FastAPI did for GET /api/complaints)
+    lean     complaint_list.fetch_page + render_page: list columns as Core
+             rows, serialized by the precompiled TypeAdapter
+
+Reports rows per second, time per page and response bytes per page.
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import BaseModel
+
+
+def _orm_page(db, page: int, page_size: int) -> bytes:
+    from sqlalchemy.orm import selectinload
+    from models import Complaint
+    from schemas import ComplaintResponse
+
+    class OrmPage(BaseModel):
+        complaints: List[ComplaintResponse]
+        total: int
+        page: int
+        page_size: int
+
+    query = db.query(Complaint).options(
+        selectinload(Complaint.user),
+        selectinload(Complaint.category),
+        selectinload(Complaint.assigned_to_user)
+    )
+    total = query.count()
+    complaints = query.order_by(Complaint.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+    response = OrmPage(complaints=[ComplaintResponse.model_validate(c) for c in complaints],
+                       total=total, page=page, page_size=page_size)
+    # FastAPI's response_model pass: validate again, dump to JSON-able data, json.dumps
+    validated = OrmPage.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump(mode="json"), ensure_ascii=False).encode("utf-8")
+
+
+def _lean_page(db, page: int, page_size: int) -> bytes:
+    from complaint_list import fetch_page, render_page
+    return render_page(fetch_page(db, [], page, page_size))
+
+
+def measure(render, pages: int, page_size: int) -> dict:
+    from database import SessionLocal
+
+    timings = []
+    sizes = []
+    for page in range(1, pages + 1):
+        # A fresh session per page, as per request: no identity map carried over
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            body = render(db, page, page_size)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+        sizes.append(len(body))
+    elapsed = sum(timings)
+    return {
+        "rows_per_second": round(pages * page_size / elapsed),
+        "ms_per_page": round(elapsed / pages * 1000, 2),
+        "bytes_per_page": round(sum(sizes) / pages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    # Warm up both paths (statement compilation, schema builds)
+    measure(_orm_page, 2, args.page_size)
+    measure(_lean_page, 2, args.page_size)
+    report = {
+        "orm": measure(_orm_page, args.pages, args.page_size),
+        "lean": measure(_lean_page, args.pages, args.page_size),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.pages} pages of {args.page_size} complaints")
+    for label, stats in report.items():
+        print(f"  {label:<5} {stats['rows_per_second']:>8} rows/s  {stats['ms_per_page']:>8}ms/page  "
+              f"{stats['bytes_per_page'] / 1024:>8.1f}KB/page")
+    orm, lean = report["orm"], report["lean"]
+    print(f"  lean: {lean['rows_per_second'] / orm['rows_per_second']:.1f}x the rows/s, "
+          f"{lean['bytes_per_page'] / orm['bytes_per_page']:.0%} of the bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Bulk data generator for load tests at production-like volume.
+
+Creates bench users (traders, technical and higher committee) and --complaints
+complaints with comments, attachment metadata, audit logs and notifications,
+with Arabic text whose vocabulary follows a Zipf distribution and whose
+lengths are log-normal, so LIKE searches, exports and PDF shaping see text
+shaped like the real thing. Timestamps are spread over --days with more
+recent complaints denser, and older complaints are mostly closed.
+
+Rows go in with COPY on PostgreSQL and multi-row INSERTs elsewhere, one
+transaction per --batch complaints, so a million complaints (~11M rows in
+total) load in minutes rather than the hours create_demo_data.py's
+one-object-at-a-time inserts would take.
+
+    cd backend
+    python -m benchmarks.datagen --complaints 1000000 --seed 1
+
+The same --seed produces the same data. Bench users are
+bench-trader-N@bench.local, bench-tc-N@bench.local and bench-hc-N@bench.local
+with --password; they are reused on later runs, so running again appends
+complaints to the same accounts. The schema must already exist (bootstrap.py).
+"""
+import argparse
+import io
+import json
+import math
+import random
+import time
+from itertools import accumulate
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+# Particles and connectives, interleaved between content words at FUNCTION_WORD_RATE
+FUNCTION_WORDS = "في من على إلى أن عن هذا مع تم لم التي الذي بعد قبل منذ حتى كان وقد ولم لا".split()
+FUNCTION_WORD_RATE = 0.35
+# Complaint vocabulary, most frequent first: sampling follows rank^-ZIPF_EXPONENT
+WORDS = (
+    "الشكوى الطلب المعاملة الجهة الوزارة البلدية الهيئة الإدارة الموظف المراجعة "
+    "الرخصة السجل التجاري الترخيص التصريح الفاتورة الرسوم الغرامة المخالفة السداد "
+    "التأخير الرفض التجديد الإصدار الإلغاء التعديل الاعتراض التظلم المطالبة "
+    "المحل المنشأة المؤسسة الشركة النشاط الموقع العقد الإيجار المستودع البضاعة "
+    "الجمارك الشحنة الاستيراد التصدير الميناء الضريبة القيمة المضافة الزكاة "
+    "الكهرباء المياه الاتصالات النظام البوابة الإلكترونية المنصة الحساب الرقم "
+    "يوما شهر أسبوع ساعات موعد تاريخ مدة مهلة الأسبوع الماضي الحالي القادم "
+    "أرجو نطالب نأمل نرجو بسرعة عاجل فورا مرة أخرى دون سبب واضح بدون إشعار "
+    "تم تقديم تمت مراجعة لم يتم الرد لم نتلق أي تم رفض تم إيقاف تم تحصيل مبلغ "
+    "ريال إضافي مضاعف غير مبرر خطأ في البيانات المطلوبة المستندات الوثائق "
+    "صورة الهوية خطاب رسمي إفادة شهادة تقرير محضر إشعار رسالة بريد هاتف "
+    "المدير المسؤول خدمة العملاء المكتب الفرع الرئيسي المنطقة المدينة الحي "
+    "الرياض جدة الدمام مكة المدينة المنورة الخبر أبها تبوك حائل القصيم "
+    "متضررين خسائر كبيرة توقف العمل إغلاق المحل تعطل انقطاع تأخر صرف المستحقات "
+    "نظاميا حسب اللائحة وفق التعليمات الإجراءات المتبعة الجهات المختصة المعنية "
+    "علما بأن حيث إن كما أن إضافة إلى بناء على نظرا لأن رغم أن مما أدى إلى"
+).split()
+ZIPF_EXPONENT = 1.07
+# Non-Arabic tokens that turn up in real complaints: reference numbers, acronyms
+OTHER_TOKENS = ["SADAD", "IBAN", "CR", "VAT", "PDF", "SMS", "OTP", "#"]
+
+FIRST_NAMES = (
+    "محمد أحمد عبدالله عبدالرحمن خالد فهد سعد سلطان ناصر فيصل تركي بندر ماجد "
+    "نورة سارة فاطمة مريم هيا لطيفة عائشة ريم منى أمل هند العنود"
+).split()
+LAST_NAMES = (
+    "القحطاني العتيبي الشهري الغامدي الزهراني الدوسري المطيري الحربي العنزي "
+    "الشمري السبيعي الرشيدي البقمي المالكي السهلي الجهني اليامي العمري"
+).split()
+
+ATTACHMENT_TYPES = [
+    ("pdf", "application/pdf", 50), ("jpg", "image/jpeg", 30),
+    ("png", "image/png", 15), ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", 5),
+]
+ATTACHMENT_NAMES = ["فاتورة", "سجل_تجاري", "خطاب", "صورة_المحل", "إيصال_سداد", "عقد_إيجار", "محضر"]
+
+# (status, weight) for complaints older / younger than OPEN_WINDOW_DAYS
+OPEN_WINDOW_DAYS = 30
+STATUS_WEIGHTS_OLD = [("RESOLVED", 62), ("REJECTED", 18), ("UNDER_REVIEW", 8), ("ESCALATED", 4),
+                      ("SUBMITTED", 3), ("MEDIATION_PENDING", 2), ("MEDIATION_IN_PROGRESS", 3)]
+STATUS_WEIGHTS_RECENT = [("SUBMITTED", 30), ("UNDER_REVIEW", 35), ("ESCALATED", 6), ("RESOLVED", 18),
+                         ("REJECTED", 5), ("MEDIATION_PENDING", 3), ("MEDIATION_IN_PROGRESS", 3)]
+PRIORITY_WEIGHTS = [("LOW", 20), ("MEDIUM", 55), ("HIGH", 20), ("URGENT", 5)]
+TERMINAL = {"RESOLVED", "REJECTED"}
+
+COMPLAINT_COLUMNS = (
+    "id", "user_id", "category_id", "assigned_to_id", "title", "description", "complaint_summary",
+    "complaining_on_behalf_of", "request_type", "problem_occurred_date", "desired_resolution",
+    "priority", "status", "task_status", "lock_version", "escalation_state", "reopened_count",
+    "created_at", "updated_at", "resolved_at", "closed_at", "can_reopen_until",
+)
+COMMENT_COLUMNS = ("complaint_id", "user_id", "content", "is_internal", "created_at")
+ATTACHMENT_COLUMNS = ("complaint_id", "filename", "filepath", "file_type", "file_size", "uploaded_at")
+AUDIT_COLUMNS = ("actor_user_id", "action", "target_type", "target_id", "details", "metadata", "created_at")
+NOTIFICATION_COLUMNS = (
+    "user_id", "type", "title_ar", "title_en", "message_ar", "message_en", "is_read",
+    "related_complaint_id", "action_url", "created_at", "read_at",
+)
+USER_COLUMNS = (
+    "id", "email", "hashed_password", "first_name", "last_name", "role", "phone", "address",
+    "is_active", "account_status", "approved_at", "trial_start_date", "trial_end_date",
+    "created_at", "updated_at",
+)
+BENCH_EMAIL_DOMAIN = "bench.local"
+
+
+class ArabicText:
+    """Reproducible Arabic prose with a Zipf word distribution and log-normal lengths."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        weights = [1 / (rank ** ZIPF_EXPONENT) for rank in range(1, len(WORDS) + 1)]
+        self.cum_weights = list(accumulate(weights))
+
+    def words(self, count: int) -> str:
+        rng = self.rng
+        tokens = []
+        for word in rng.choices(WORDS, cum_weights=self.cum_weights, k=count):
+            if tokens and rng.random() < FUNCTION_WORD_RATE:
+                tokens.append(rng.choice(FUNCTION_WORDS))
+            tokens.append(word)
+        if count > 6 and rng.random() < 0.3:
+            tokens.insert(rng.randrange(len(tokens)), f"{rng.choice(OTHER_TOKENS)} {rng.randrange(10000, 9999999)}")
+        return " ".join(tokens)
+
+    def sentence(self, mean_words: float = 11) -> str:
+        count = max(3, int(self.rng.lognormvariate(math.log(mean_words), 0.4)))
+        return self.words(count) + self.rng.choice((".", ".", ".", "،", "!"))
+
+    def paragraph(self, mean_sentences: float) -> str:
+        count = max(1, int(self.rng.lognormvariate(math.log(mean_sentences), 0.5)))
+        return " ".join(self.sentence() for _ in range(count))
+
+    def title(self) -> str:
+        return self.words(self.rng.randint(4, 9))
+
+    def name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+
+def _weighted(rng: random.Random, pairs):
+    return rng.choices([value for value, _ in pairs], weights=[weight for _, weight in pairs])[0]
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    """Skewed non-negative count with the given mean: most rows have few, some have many."""
+    if mean <= 0:
+        return 0
+    return int(rng.expovariate(1 / (mean + 0.5)))
+
+
+class Writer:
+    """Appends row tuples per table and flushes them with COPY (PostgreSQL) or executemany."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.postgres = engine.dialect.name == "postgresql"
+        self.rows = {}
+        self.totals = {}
+
+    def add(self, table: str, columns, row):
+        self.rows.setdefault((table, columns), []).append(row)
+
+    def flush(self):
+        if self.postgres:
+            raw = self.engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                for (table, columns), rows in self.rows.items():
+                    buffer = io.StringIO()
+                    for row in rows:
+                        buffer.write("\t".join(_copy_value(value) for value in row))
+                        buffer.write("\n")
+                    buffer.seek(0)
+                    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+                raw.commit()
+            finally:
+                raw.close()
+        else:
+            from models import Base
+            with self.engine.begin() as conn:
+                for (table, columns), rows in self.rows.items():
+                    conn.execute(Base.metadata.tables[table].insert(), [dict(zip(columns, row)) for row in rows])
+        for (table, _), rows in self.rows.items():
+            self.totals[table] = self.totals.get(table, 0) + len(rows)
+        self.rows = {}
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, dict):
+        value = json.dumps(value, ensure_ascii=False)
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def bench_users(engine, args, rng: random.Random, text_gen: ArabicText, now: datetime) -> dict:
+    """Ids of the bench users by role, creating any that are missing."""
+    from models import User
+    from auth import get_password_hash
+
+    wanted = {"TRADER": ("trader", args.traders), "TECHNICAL_COMMITTEE": ("tc", args.technical),
+              "HIGHER_COMMITTEE": ("hc", args.higher)}
+    with engine.connect() as conn:
+        existing = dict(conn.execute(
+            select(User.email, User.id).where(User.email.like(f"bench-%@{BENCH_EMAIL_DOMAIN}"))
+        ).all())
+        next_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+
+    writer = Writer(engine)
+    hashed = get_password_hash(args.password)
+    ids = {}
+    for role, (prefix, count) in wanted.items():
+        ids[role] = []
+        for n in range(1, count + 1):
+            email = f"bench-{prefix}-{n}@{BENCH_EMAIL_DOMAIN}"
+            if email in existing:
+                ids[role].append(existing[email])
+                continue
+            first_name, last_name = text_gen.name()
+            created = now - timedelta(days=rng.uniform(30, args.days + 30))
+            row = (
+                next_id, email, hashed, first_name, last_name, role, f"+9665{rng.randrange(10**7, 10**8)}",
+                f"{rng.choice(LAST_NAMES)}، {text_gen.words(3)}", True, "APPROVED", created,
+                now - timedelta(days=1), now + timedelta(days=365), created, created,
+            )
+            writer.add("users", USER_COLUMNS, row)
+            ids[role].append(next_id)
+            next_id += 1
+    writer.flush()
+    if writer.postgres:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(id) FROM users))"))
+    return ids
+
+
+def generate(engine, args) -> dict:
+    from models import Category, Complaint
+    from audit_helper import _register_actions
+
+    rng = random.Random(args.seed)
+    text_gen = ArabicText(rng)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    with engine.connect() as conn:
+        category_ids = conn.execute(select(Category.id)).scalars().all()
+        first_id = (conn.execute(select(func.max(Complaint.id))).scalar() or 0) + 1
+    if not category_ids:
+        raise SystemExit("no categories; run bootstrap.py first")
+
+    users = bench_users(engine, args, rng, text_gen, now)
+    traders, technical = users["TRADER"], users["TECHNICAL_COMMITTEE"]
+    committee = technical + users["HIGHER_COMMITTEE"]
+    # A few very active traders, a long tail of occasional ones
+    trader_weights = list(accumulate(1 / (rank ** 0.8) for rank in range(1, len(traders) + 1)))
+
+    writer = Writer(engine)
+    audit_actions = set()
+    if writer.postgres:
+        _ensure_audit_partitions(engine, now - timedelta(days=args.days), now)
+
+    started = time.perf_counter()
+    for offset in range(args.complaints):
+        complaint_id = first_id + offset
+        age_days = args.days * (1 - rng.random() ** 0.5)
+        created = now - timedelta(days=age_days, seconds=rng.randrange(86400))
+        user_id = rng.choices(traders, cum_weights=trader_weights)[0]
+        status = _weighted(rng, STATUS_WEIGHTS_OLD if age_days > OPEN_WINDOW_DAYS else STATUS_WEIGHTS_RECENT)
+        assigned = None if status == "SUBMITTED" else rng.choice(technical)
+        closed = created + timedelta(hours=rng.lognormvariate(math.log(72), 1.0)) if status in TERMINAL else None
+        closed = min(closed, now) if closed else None
+        updated = closed or min(now, created + timedelta(hours=rng.expovariate(1 / 48)))
+        writer.add("complaints", COMPLAINT_COLUMNS, (
+            complaint_id, user_id, rng.choice(category_ids), assigned, text_gen.title(),
+            text_gen.paragraph(5), text_gen.paragraph(1.5),
+            "self" if rng.random() < 0.85 else "other", rng.choice(("complaint", "complaint", "inquiry", "suggestion")),
+            created - timedelta(days=rng.randrange(1, 60)), text_gen.sentence(),
+            _weighted(rng, PRIORITY_WEIGHTS), status, "ASSIGNED" if assigned else "UNASSIGNED",
+            rng.randrange(0, 4), "NONE", 0, created, updated, closed, closed,
+            closed + timedelta(days=7) if closed else None,
+        ))
+
+        audits = [("CREATE_COMPLAINT", user_id, "complaint", complaint_id, f"Created complaint #{complaint_id}", None, created)]
+        for _ in range(_count(rng, args.comments)):
+            author = user_id if rng.random() < 0.4 else (assigned or rng.choice(committee))
+            internal = author != user_id and rng.random() < 0.3
+            at = created + (updated - created) * rng.random()
+            writer.add("comments", COMMENT_COLUMNS, (complaint_id, author, text_gen.paragraph(1.8), 1 if internal else 0, at))
+            audits.append(("CREATE_COMMENT", author, "comment", complaint_id, f"Added comment to complaint #{complaint_id}",
+                           {"complaint_id": complaint_id, "is_internal": internal}, at))
+        for _ in range(_count(rng, args.attachments)):
+            extension, mime, _ = rng.choices(ATTACHMENT_TYPES, weights=[w for *_, w in ATTACHMENT_TYPES])[0]
+            at = created + timedelta(minutes=rng.randrange(0, 120))
+            writer.add("attachments", ATTACHMENT_COLUMNS, (
+                complaint_id, f"{rng.choice(ATTACHMENT_NAMES)}_{rng.randrange(1, 99)}.{extension}",
+                f"uploads/{complaint_id}_{at.timestamp()}.{extension}", mime,
+                int(rng.lognormvariate(math.log(350_000), 1.0)), at,
+            ))
+            audits.append(("UPLOAD_ATTACHMENT", user_id, "attachment", complaint_id, None, None, at))
+        for _ in range(_count(rng, max(args.audit - len(audits), 0))):
+            audits.append(("UPDATE_COMPLAINT", assigned or rng.choice(committee), "complaint", complaint_id,
+                           f"Updated complaint status to {status}", None, created + (updated - created) * rng.random()))
+        for action, actor, target_type, target_id, details, metadata, at in audits:
+            audit_actions.add(action)
+            writer.add("audit_logs", AUDIT_COLUMNS, (actor, action, target_type, target_id, details, metadata, at))
+
+        for _ in range(_count(rng, args.notifications)):
+            to_trader = assigned is None or rng.random() < 0.6
+            at = created + (updated - created) * rng.random()
+            read = (now - at).days > 3 and rng.random() < 0.85
+            kind = "COMPLAINT_STATUS_UPDATED" if to_trader else "COMPLAINT_ASSIGNED"
+            writer.add("notifications", NOTIFICATION_COLUMNS, (
+                user_id if to_trader else assigned, kind,
+                f"تحديث الشكوى #{complaint_id}", f"Complaint #{complaint_id} update",
+                text_gen.sentence(), f"Complaint #{complaint_id} has been updated", read,
+                complaint_id, f"/complaints/{complaint_id}", at, at + timedelta(hours=rng.expovariate(1 / 12)) if read else None,
+            ))
+
+        if (offset + 1) % args.batch == 0 or offset + 1 == args.complaints:
+            writer.flush()
+            elapsed = time.perf_counter() - started
+            print(f"  {offset + 1:>9} complaints  {sum(writer.totals.values()):>10} rows  {elapsed:7.1f}s", flush=True)
+
+    with engine.begin() as conn:
+        _register_actions(conn, [{"action": action} for action in audit_actions])
+        if writer.postgres:
+            conn.execute(text(
+                "SELECT setval(pg_get_serial_sequence('complaints', 'id'), (SELECT max(id) FROM complaints))"
+            ))
+    if writer.postgres:
+        # Fresh statistics so the planner sees the new volume before the first scenario
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for table in ("users", "complaints", "comments", "attachments", "audit_logs", "notifications"):
+                conn.execute(text(f"ANALYZE {table}"))
+
+    return {"rows": writer.totals, "seconds": round(time.perf_counter() - started, 1),
+            "users": {role: len(ids) for role, ids in users.items()}}
+
+
+def _ensure_audit_partitions(engine, start: datetime, end: datetime):
+    """Create the monthly audit_logs partitions the data spans, when the partitioning migration is applied."""
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regproc('create_audit_log_partition')")).scalar() is None:
+            return
+        month = start.date().replace(day=1)
+        while month <= end.date():
+            conn.execute(text("SELECT create_audit_log_partition(:month)"), {"month": month})
+            month = (month + timedelta(days=32)).replace(day=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--complaints", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=float, default=3, help="mean comments per complaint")
+    parser.add_argument("--attachments", type=float, default=0.6, help="mean attachments per complaint")
+    parser.add_argument("--audit", type=float, default=4, help="mean audit log rows per complaint")
+    parser.add_argument("--notifications", type=float, default=2, help="mean notifications per complaint")
+    parser.add_argument("--traders", type=int, default=20_000)
+    parser.add_argument("--technical", type=int, default=40)
+    parser.add_argument("--higher", type=int, default=5)
+    parser.add_argument("--password", default="Bench-Passw0rd!")
+    parser.add_argument("--days", type=int, default=730, help="history the complaints are spread over")
+    parser.add_argument("--batch", type=int, default=10_000, help="complaints per transaction")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from database import engine
+    print(f"Generating {args.complaints} complaints on {engine.dialect.name} (seed {args.seed})...")
+    summary = generate(engine, args)
+    print(f"✓ {sum(summary['rows'].values())} rows in {summary['seconds']}s")
+    for table, count in sorted(summary["rows"].items()):
+        print(f"  {table:<15} {count:>10}")
+
+
+if __name__ == "__main__":
+    main()
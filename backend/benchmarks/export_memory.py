@@ -0,0 +1,105 @@
+"""
+Peak-RSS benchmark for the complaint exporters.
+
+Each scenario runs in a fresh subprocess so ru_maxrss reflects only that
+export. Rows are synthetic (no database needed) and shaped like the
+complaint export projection, with Arabic titles.
+
+    cd backend
+    python -m benchmarks.export_memory --rows 100000 1000000
+
+"legacy" reproduces the previous list-of-dicts + pandas + BytesIO path and
+needs pandas installed.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+WRITERS = ["xlsx", "csv", "legacy"]
+
+
+def synthetic_batches(total_rows: int, batch_size: int = 1000):
+    created = datetime(2025, 1, 1).isoformat()
+    for start in range(0, total_rows, batch_size):
+        yield [
+            [i, f"شكوى رقم {i} بخصوص تأخر التوصيل", "UNDER_REVIEW", "MEDIUM", "Delivery", created, "تاجر تجريبي"]
+            for i in range(start, min(start + batch_size, total_rows))
+        ]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_single(writer: str, rows: int) -> dict:
+    from export_service import ExportService, COMPLAINT_EXPORT_HEADERS
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    size = 0
+
+    if writer == "xlsx":
+        path = ExportService.write_excel_file(COMPLAINT_EXPORT_HEADERS, synthetic_batches(rows), "Complaints")
+        size = os.path.getsize(path)
+        os.remove(path)
+    elif writer == "csv":
+        for chunk in ExportService.stream_csv(COMPLAINT_EXPORT_HEADERS, synthetic_batches(rows)):
+            size += len(chunk)
+    else:
+        import pandas as pd
+        from io import BytesIO
+
+        data = [dict(zip(COMPLAINT_EXPORT_HEADERS, row)) for batch in synthetic_batches(rows) for row in batch]
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as excel_writer:
+            pd.DataFrame(data).to_excel(excel_writer, sheet_name="Complaints", index=False)
+        size = len(buffer.getvalue())
+
+    return {
+        "writer": writer,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 2),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "output_mb": round(size / (1024 * 1024), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--writers", nargs="+", choices=WRITERS, default=["xlsx", "csv"])
+    parser.add_argument("--single", nargs=2, metavar=("WRITER", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single[0], int(args.single[1]))))
+        return
+
+    print(f"{'writer':<8} {'rows':>9} {'seconds':>8} {'baseline MB':>12} {'peak MB':>8} {'output MB':>10}")
+    for rows in args.rows:
+        for writer in args.writers:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.export_memory", "--single", writer, str(rows)],
+                cwd=BACKEND_DIR, capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                print(f"{writer:<8} {rows:>9} failed: {proc.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{r['writer']:<8} {r['rows']:>9} {r['seconds']:>8} {r['baseline_rss_mb']:>12} {r['peak_rss_mb']:>8} {r['output_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
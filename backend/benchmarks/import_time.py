@@ -0,0 +1,90 @@
+"""
+Import-time and RSS profile of the app module, as paid by every worker.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, then
+reports the total import time, peak RSS after import, the slowest modules
+main imports directly, and whether the heavy optional dependencies (PDF,
+Excel, email/SMS, payments, libmagic) were loaded.
+
+    cd backend
+    python -m benchmarks.import_time --top 15
+    python -m benchmarks.import_time --json > import_profile.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    "reportlab", "arabic_reshaper", "bidi", "openpyxl", "pandas",
+    "sendgrid", "twilio", "stripe", "magic",
+]
+
+PROBE = (
+    "import resource, sys, json, time\n"
+    "started = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = time.perf_counter() - started\n"
+    "peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024\n"
+    f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+    "print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_mb, 'heavy_loaded': loaded}))\n"
+)
+
+
+def parse_importtime(stderr: str):
+    """Return [(cumulative_us, depth, module)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def profile(top: int):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    summary = json.loads(proc.stdout.strip().splitlines()[-1])
+    entries = parse_importtime(proc.stderr)
+    main_depth = next(depth for _, depth, name in entries if name == "main")
+    direct = sorted(
+        ((us, name) for us, depth, name in entries if depth == main_depth + 1),
+        reverse=True
+    )
+    summary["top_imports_ms"] = {name: round(us / 1000, 1) for us, name in direct[:top]}
+    summary["seconds"] = round(summary["seconds"], 3)
+    summary["peak_rss_mb"] = round(summary["peak_rss_mb"], 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="print the profile as JSON")
+    args = parser.parse_args()
+
+    result = profile(args.top)
+    if args.json:
+        print(json.dumps(result, indent=2, sort_keys=True))
+        return
+
+    print(f"import main: {result['seconds']:.3f}s, peak RSS {result['peak_rss_mb']} MB")
+    print(f"heavy optional modules loaded: {', '.join(result['heavy_loaded']) or 'none'}")
+    print(f"\n{'module':<40} {'cumulative ms':>14}")
+    for name, ms in result["top_imports_ms"].items():
+        print(f"{name:<40} {ms:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Response encoding per endpoint: stdlib json vs orjson vs a single Pydantic pass.
+
+    cd backend
+    python -m benchmarks.datagen --complaints 100000 --seed 1
+    python -m benchmarks.json_encoding --rows 500 --rounds 20
+
+Rows are loaded once per endpoint from the configured database (relationships
+eager-loaded, so no lazy loads are timed), then turned into response bytes
+three ways:
+
+    stdlib   FastAPI's response_model pass (validate from attributes, dump to
+             JSON-able data) rendered by JSONResponse, i.e. json.dumps (what
+             every endpoint did before)
+    orjson   the same pass rendered by ORJSONResponse (the app's default
+             response class now)
+    direct   json_codec.model_list_response: one validation, dumped to bytes
+             by Pydantic (what the hot list endpoints return now)
+
+The three bodies are checked to decode to the same JSON. Endpoints whose table
+is empty in the database are skipped.
+"""
+import argparse
+import json
+import time
+from functools import lru_cache
+from typing import List
+
+
+def _endpoints(db, rows: int):
+    from sqlalchemy.orm import selectinload
+    from models import AuditLog, Comment, Payment, User, UserRole
+    from schemas import AuditLogResponse, CommentResponse, PaymentResponse, UserResponse
+
+    return [
+        ("GET /api/admin/users", UserResponse,
+         lambda: db.query(User).order_by(User.created_at.desc()).limit(rows).all()),
+        ("GET /api/users/committee", UserResponse,
+         lambda: db.query(User).filter(User.role != UserRole.TRADER).limit(rows).all()),
+        ("GET /api/complaints/{id}/comments", CommentResponse,
+         lambda: db.query(Comment).options(selectinload(Comment.user))
+         .order_by(Comment.created_at.asc()).limit(rows).all()),
+        ("GET /api/payments", PaymentResponse,
+         lambda: db.query(Payment).order_by(Payment.created_at.desc()).limit(rows).all()),
+        ("GET /api/admin/audit-logs", AuditLogResponse,
+         lambda: db.query(AuditLog).order_by(AuditLog.created_at.desc()).limit(rows).all()),
+    ]
+
+
+def _stdlib(model, objects) -> bytes:
+    from fastapi.responses import JSONResponse
+    return JSONResponse(_response_model_pass(model, objects)).body
+
+
+def _orjson(model, objects) -> bytes:
+    from fastapi.responses import ORJSONResponse
+    return ORJSONResponse(_response_model_pass(model, objects)).body
+
+
+def _direct(model, objects) -> bytes:
+    from json_codec import model_list_response
+    return model_list_response(model, objects).body
+
+
+@lru_cache(maxsize=None)
+def _response_field(model):
+    from fastapi.utils import create_model_field
+    return create_model_field(name="Response", type_=List[model], mode="serialization")
+
+
+def _response_model_pass(model, objects):
+    # fastapi.routing.serialize_response, minus the coroutine plumbing
+    field = _response_field(model)
+    value, errors = field.validate(objects, {}, loc=("response",))
+    if errors:
+        raise ValueError(errors)
+    return field.serialize(value, by_alias=True)
+
+
+def measure(render, model, objects, rounds: int) -> dict:
+    render(model, objects)  # warm-up: schema builds
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body = render(model, objects)
+        timings.append(time.perf_counter() - started)
+    # The best round, as timeit reports: the others only add scheduler and GC noise
+    return {"ms": round(min(timings) * 1000, 2), "bytes": len(body), "body": body}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    report = {}
+    db = SessionLocal()
+    try:
+        for endpoint, model, load in _endpoints(db, args.rows):
+            objects = load()
+            if not objects:
+                report[endpoint] = None
+                continue
+            results = {
+                label: measure(render, model, objects, args.rounds)
+                for label, render in (("stdlib", _stdlib), ("orjson", _orjson), ("direct", _direct))
+            }
+            decoded = [json.loads(result.pop("body")) for result in results.values()]
+            if any(other != decoded[0] for other in decoded[1:]):
+                raise SystemExit(f"⚠ {endpoint}: the encoders produced different JSON")
+            report[endpoint] = {"rows": len(objects), **results}
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Up to {args.rows} rows per endpoint, best of {args.rounds} rounds")
+    for endpoint, results in report.items():
+        if results is None:
+            print(f"  {endpoint:<34} (no rows, skipped)")
+            continue
+        stdlib = results["stdlib"]["ms"]
+        print(f"  {endpoint:<34} {results['rows']:>5} rows  {results['stdlib']['bytes'] / 1024:>7.1f}KB")
+        for label in ("stdlib", "orjson", "direct"):
+            ms = results[label]["ms"]
+            print(f"    {label:<7} {ms:>8.2f}ms  {stdlib / ms:>5.1f}x")
+    print("✓ All encoders produced the same JSON")
+
+
+if __name__ == "__main__":
+    main()
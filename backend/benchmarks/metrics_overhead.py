@@ -0,0 +1,136 @@
+"""
+Cost of the Prometheus instrumentation per request.
+
+Each round starts a fresh interpreter per mode, imports the app with
+METRICS_ENABLED on or off and sends --requests sequential requests through
+the ASGI stack in-process (no network, so the middleware's share is as large
+as it can get). Modes are interleaved over --rounds and the median per-request
+time is compared against "off".
+
+    cd backend
+    python -m benchmarks.metrics_overhead --requests 3000 --rounds 5
+
+"multiprocess" also points PROMETHEUS_MULTIPROC_DIR at a temp directory, as
+gunicorn.conf.py does in production.
+
+Whole-request timings on a busy or single-core machine are noisy, so the
+middleware is also timed on its own around a no-op app; "isolated" is that
+cost as a share of the median "off" request.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import asyncio, json, sys, time
+import httpx
+import main
+
+async def run(path, count):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            (await client.get(path)).raise_for_status()
+        started = time.perf_counter()
+        for _ in range(count):
+            await client.get(path)
+        return (time.perf_counter() - started) / count * 1e6
+
+async def middleware_only(count):
+    # The instrumentation alone around a no-op app, labelled like a real route
+    from metrics import PrometheusMiddleware
+    route = next(r for r in main.app.routes if getattr(r, "path", None) == sys.argv[1])
+
+    async def app(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    wrapped = PrometheusMiddleware(app)
+    scope = {"type": "http", "method": "GET"}
+    started = time.perf_counter()
+    for _ in range(count):
+        await wrapped(dict(scope), receive, send)
+    bare_started = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    ended = time.perf_counter()
+    return ((bare_started - started) - (ended - bare_started)) / count * 1e6
+
+count = int(sys.argv[2])
+result = {"request_us": asyncio.run(run(sys.argv[1], count))}
+if main.settings.METRICS_ENABLED:
+    result["middleware_us"] = asyncio.run(middleware_only(count * 10))
+print(json.dumps(result))
+"""
+
+MODES = {
+    "off": {"METRICS_ENABLED": "false"},
+    "on": {"METRICS_ENABLED": "true"},
+    "multiprocess": {"METRICS_ENABLED": "true"},
+}
+
+
+def measure(mode: str, path: str, count: int) -> dict:
+    env = dict(os.environ, **MODES[mode])
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    with tempfile.TemporaryDirectory() as multiproc_dir:
+        if mode == "multiprocess":
+            env["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE, path, str(count)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/api/health")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    samples = {mode: [] for mode in MODES}
+    for _ in range(args.rounds):
+        for mode in MODES:
+            samples[mode].append(measure(mode, args.path, args.requests))
+
+    baseline = statistics.median(sample["request_us"] for sample in samples["off"])
+    report = {}
+    for mode, runs in samples.items():
+        median_us = statistics.median(sample["request_us"] for sample in runs)
+        row = {"median_us": round(median_us, 1), "overhead_pct": round((median_us / baseline - 1) * 100, 2)}
+        if "middleware_us" in runs[0]:
+            middleware_us = statistics.median(sample["middleware_us"] for sample in runs)
+            row["middleware_us"] = round(middleware_us, 1)
+            row["isolated_pct"] = round(middleware_us / baseline * 100, 2)
+        report[mode] = row
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.path}: {args.requests} requests x {args.rounds} rounds")
+    print(f"{'mode':<14} {'median us/req':>14} {'overhead':>9} {'middleware us':>14} {'isolated':>9}")
+    for mode, row in report.items():
+        middleware = row.get("middleware_us", "-")
+        isolated = f"{row['isolated_pct']}%" if "isolated_pct" in row else "-"
+        print(f"{mode:<14} {row['median_us']:>14} {row['overhead_pct']:>8}% {middleware:>14} {isolated:>9}")
+
+
+if __name__ == "__main__":
+    main()
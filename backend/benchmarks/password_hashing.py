@@ -0,0 +1,170 @@
+"""
+Sustained password checks (and logins) per second per core.
+
+    cd backend
+    python -m benchmarks.password_hashing --duration 10 --concurrency 32
+    python -m benchmarks.password_hashing --email hc@example.com --password ...
+
+Three measurements at BCRYPT_ROUNDS (or --rounds):
+
+    bcrypt   back-to-back checkpw on one thread: the per-core ceiling
+    service  --concurrency callers awaiting password_service.verify, with the
+             time each waited for a bcrypt thread and the worst event loop stall
+             (a 10ms ticker; it stays near zero because bcrypt runs off-loop)
+    login    with --email/--password, POST /api/auth/login through the app
+             in-process (login rate limit lifted for the run)
+
+"per core" divides by the cores bcrypt can actually use, min(PASSWORD_HASH_WORKERS, CPUs).
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+def measure_bcrypt(duration: float, rounds: int) -> dict:
+    from password_service import check_password, hash_password
+
+    hashed = hash_password("Bench-Passw0rd!", rounds)
+    checks = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        check_password("Bench-Passw0rd!", hashed)
+        checks += 1
+    elapsed = time.perf_counter() - started
+    return {"per_second": round(checks / elapsed, 2), "ms_each": round(elapsed / checks * 1000, 1), "cores": 1}
+
+
+async def _loop_lag(stop: asyncio.Event, stalls: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        stalls.append((time.perf_counter() - started - 0.01) * 1000)
+
+
+async def measure_service(duration: float, concurrency: int, rounds: int) -> dict:
+    from benchmarks.async_db_load import percentile
+    from password_service import PasswordService, PasswordServiceBusy, hash_password
+    from config import get_settings
+
+    settings = get_settings()
+    # A queue deep enough for every caller: this measures throughput, not admission
+    service = PasswordService(settings.PASSWORD_HASH_WORKERS, concurrency, rounds)
+    hashed = hash_password("Bench-Passw0rd!", rounds)
+    latencies, stalls, rejected = [], [], 0
+    stop = asyncio.Event()
+    deadline = time.perf_counter() + duration
+
+    async def caller():
+        nonlocal rejected
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await service.verify("Bench-Passw0rd!", hashed)
+            except PasswordServiceBusy:
+                rejected += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    lag = asyncio.create_task(_loop_lag(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag
+    service.stop()
+
+    cores = min(settings.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+    per_second = len(latencies) / elapsed
+    return {
+        "per_second": round(per_second, 2),
+        "per_core": round(per_second / cores, 2),
+        "cores": cores,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_loop_stall_ms": round(max(stalls, default=0.0), 1),
+        "rejected": rejected,
+    }
+
+
+async def measure_login(duration: float, concurrency: int, email: str, password: str) -> dict:
+    import httpx
+    import main
+    from benchmarks.async_db_load import percentile
+    from config import get_settings
+    from database import async_engine
+
+    settings = get_settings()
+    transport = httpx.ASGITransport(app=main.app)
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def caller(client):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", json={"email": email, "password": password})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        first = await client.post("/api/auth/login", json={"email": email, "password": password})
+        if first.status_code != 200:
+            raise SystemExit(f"login failed: {first.status_code} {first.text}")
+        started = time.perf_counter()
+        await asyncio.gather(*(caller(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+
+    cores = min(settings.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+    return {
+        "per_second": round(len(latencies) / elapsed, 2),
+        "per_core": round(len(latencies) / elapsed / cores, 2),
+        "cores": cores,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, help="bcrypt cost (default BCRYPT_ROUNDS)")
+    parser.add_argument("--email", help="also benchmark /api/auth/login as this user")
+    parser.add_argument("--password")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["RATE_LIMIT_LOGIN_PER_MINUTE"] = "1000000"
+    from config import get_settings
+    rounds = get_settings().BCRYPT_ROUNDS
+
+    report = {
+        "rounds": rounds,
+        "bcrypt": measure_bcrypt(args.duration, rounds),
+        "service": asyncio.run(measure_service(args.duration, args.concurrency, rounds)),
+    }
+    if args.email:
+        report["login"] = asyncio.run(measure_login(args.duration, args.concurrency, args.email, args.password))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"bcrypt cost {rounds}, {os.cpu_count()} CPUs, concurrency {args.concurrency}")
+    print(f"  bcrypt   {report['bcrypt']['per_second']:>8}/s on 1 core ({report['bcrypt']['ms_each']}ms each)")
+    service = report["service"]
+    print(f"  service  {service['per_second']:>8}/s on {service['cores']} cores = {service['per_core']}/s per core, "
+          f"p50 {service['p50_ms']}ms p99 {service['p99_ms']}ms, max loop stall {service['max_loop_stall_ms']}ms")
+    if "login" in report:
+        login = report["login"]
+        print(f"  login    {login['per_second']:>8}/s on {login['cores']} cores = {login['per_core']}/s per core, "
+              f"p50 {login['p50_ms']}ms p99 {login['p99_ms']}ms, statuses {login['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
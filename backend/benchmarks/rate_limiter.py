@@ -0,0 +1,150 @@
+"""
+Per-request cost of the rate limiter.
+
+    cd backend
+    python -m benchmarks.rate_limiter --checks 50000
+    python -m benchmarks.rate_limiter --redis-url redis://localhost:6379/15 --concurrency 64
+
+Each mode times limiter checks spread over --keys clients, with a limit high
+enough that they are all allowed, then a single client far over its limit:
+
+    local       limiter.hit without Redis (the per-worker fallback)
+    dependency  the whole FastAPI dependency on a fake request: token subject,
+                bucket key, GCRA check and RateLimit-* headers
+    redis       limiter.hit through the Lua script, --concurrency callers at
+                once (only with --redis-url or RATE_LIMIT_REDIS_URL/REDIS_URL)
+
+"refused" shows the local fast path: once a client is over its limit, further
+requests are answered without a Redis round trip. The target is under 1ms per
+request (p99) in every mode.
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+
+def _summary(latencies: list, elapsed: float) -> dict:
+    from benchmarks.async_db_load import percentile
+    return {
+        "per_second": round(len(latencies) / elapsed),
+        "p50_us": round(percentile(latencies, 50), 1),
+        "p99_us": round(percentile(latencies, 99), 1),
+    }
+
+
+async def _timed_checks(limiter, keys: list, rate, checks: int, concurrency: int) -> dict:
+    latencies = []
+    per_caller = max(1, checks // concurrency)
+
+    async def caller(offset: int):
+        for i in range(per_caller):
+            key = keys[(offset + i * concurrency) % len(keys)]
+            started = time.perf_counter()
+            await limiter.hit(key, rate)
+            latencies.append((time.perf_counter() - started) * 1_000_000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(n) for n in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - started)
+
+
+async def measure(limiter, checks: int, n_keys: int, concurrency: int) -> dict:
+    from rate_limiter import Rate
+
+    run = f"{time.time_ns()}"
+    keys = [f"rl:bench:{run}:ip:10.0.{n // 256}.{n % 256}" for n in range(n_keys)]
+    generous = Rate(1_000_000, 60)
+    await _timed_checks(limiter, keys[:concurrency], generous, concurrency * 10, concurrency)
+    allowed = await _timed_checks(limiter, keys, generous, checks, concurrency)
+
+    strict = Rate(5, 3600)
+    flooder = [f"rl:bench:{run}:flooder"]
+    refused = await _timed_checks(limiter, flooder, strict, checks, concurrency)
+    return {"allowed": allowed, "refused": refused}
+
+
+async def measure_dependency(limiter, checks: int, n_keys: int) -> dict:
+    from fastapi import Request, Response
+    from auth import create_access_token
+    from rate_limiter import RateLimitExceeded
+
+    dependency = limiter.limit("1000000/minute")
+    route = SimpleNamespace(path="/api/complaints")
+    run = time.time_ns()
+    requests = []
+    for n in range(min(n_keys, 1000)):
+        token = create_access_token({"sub": str(run % 1_000_000 + n)})
+        requests.append(Request({
+            "type": "http", "method": "POST", "path": "/api/complaints", "route": route,
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "client": (f"10.1.{n // 256}.{n % 256}", 40000),
+        }))
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(checks):
+        request = requests[i % len(requests)]
+        check_started = time.perf_counter()
+        try:
+            await dependency(request, Response())
+        except RateLimitExceeded:
+            pass
+        latencies.append((time.perf_counter() - check_started) * 1_000_000)
+    return _summary(latencies, time.perf_counter() - started)
+
+
+async def run(args) -> dict:
+    from config import get_settings
+    from rate_limiter import RateLimiter
+
+    settings = get_settings()
+    report = {
+        "local": await measure(RateLimiter(""), args.checks, args.keys, 1),
+        "dependency": await measure_dependency(RateLimiter(""), args.checks, args.keys),
+    }
+    redis_url = args.redis_url or settings.RATE_LIMIT_REDIS_URL or settings.REDIS_URL
+    if redis_url:
+        limiter = RateLimiter(redis_url, timeout_ms=1000)
+        try:
+            report["redis"] = await measure(limiter, args.checks, args.keys, args.concurrency)
+            report["redis"]["fell_back"] = limiter._redis_down_until > 0
+        finally:
+            await limiter.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=50_000)
+    parser.add_argument("--keys", type=int, default=10_000, help="distinct clients")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent callers against Redis")
+    parser.add_argument("--redis-url", help="defaults to RATE_LIMIT_REDIS_URL / REDIS_URL; use a scratch db")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    def line(label, stats):
+        verdict = "✓" if stats["p99_us"] < 1000 else "⚠"
+        print(f"  {verdict} {label:<20} {stats['per_second']:>9}/s  p50 {stats['p50_us']:>7}µs  p99 {stats['p99_us']:>7}µs")
+
+    print(f"{args.checks} checks over {args.keys} clients")
+    line("local allowed", report["local"]["allowed"])
+    line("local refused", report["local"]["refused"])
+    line("dependency", report["dependency"])
+    if "redis" in report:
+        if report["redis"]["fell_back"]:
+            print("  ⚠ Redis errors during the run; the redis numbers include local fallbacks")
+        line("redis allowed", report["redis"]["allowed"])
+        line("redis refused (fast)", report["redis"]["refused"])
+    else:
+        print("  - redis: no --redis-url / REDIS_URL, skipped")
+
+
+if __name__ == "__main__":
+    main()
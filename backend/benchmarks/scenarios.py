@@ -0,0 +1,361 @@
+"""
+Scripted load scenarios against a running server, reported per step in a
+form that can be diffed between commits (see benchmarks/compare.py).
+
+Virtual users are split across the selected scenarios by weight and loop
+until --duration, pausing for an exponential think time between steps
+(--think-scale 0 turns that off for a closed-loop stress run):
+
+    trader_submit      categories, submit a complaint, list own, open it, unread count
+    committee_triage   queue of submitted complaints, open one, read and add comments, move to review
+    dashboard_polling  dashboard stats, unread count and notification list every few seconds
+    exports            filtered CSV export, analytics Excel, a complaint PDF
+    websocket_fanout   committee sockets held open, timing notification delivery
+
+It runs against data from benchmarks/datagen.py: users are the bench-*
+accounts and tokens are minted locally with JWT_SECRET_KEY, so run it from
+backend/ with the server's environment (logins are rate limited per IP and
+would otherwise dominate the run). Raise RATE_LIMIT_COMPLAINTS_PER_HOUR on
+the server too, or most submissions come back 429.
+
+    cd backend
+    python -m benchmarks.datagen --complaints 1000000
+    gunicorn main:app -c gunicorn.conf.py &
+    python -m benchmarks.scenarios --users 200 --duration 120 --output before.json
+    git checkout <branch> && <restart server>
+    python -m benchmarks.scenarios --users 200 --duration 120 --output after.json
+    python -m benchmarks.compare before.json after.json
+
+Samples from the first --warmup seconds are discarded. The websocket
+scenario needs the `websockets` package and is skipped without it.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime
+
+import httpx
+
+from benchmarks.async_db_load import percentile
+
+# name: (weight, roles the virtual users log in as, mean think time in seconds)
+SCENARIOS = {
+    "trader_submit": (30, ("TRADER",), 2.0),
+    "committee_triage": (25, ("TECHNICAL_COMMITTEE",), 3.0),
+    "dashboard_polling": (35, ("TECHNICAL_COMMITTEE", "HIGHER_COMMITTEE", "TRADER"), 5.0),
+    "exports": (5, ("HIGHER_COMMITTEE",), 10.0),
+    "websocket_fanout": (5, ("TECHNICAL_COMMITTEE",), 0.0),
+}
+EXPORT_STATUSES = ("ESCALATED", "MEDIATION_PENDING", "MEDIATION_IN_PROGRESS")
+
+
+class Recorder:
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.steps = {}
+        self.ws_connect_ms = []
+        self.ws_delivery_ms = []
+
+    def record(self, label: str, elapsed_ms: float, status: int):
+        if time.perf_counter() < self.warmup_until:
+            return
+        step = self.steps.setdefault(label, {"latencies": [], "statuses": {}})
+        step["latencies"].append(elapsed_ms)
+        step["statuses"][status] = step["statuses"].get(status, 0) + 1
+
+
+class VirtualUser:
+    def __init__(self, scenario: str, client: httpx.AsyncClient, token: str, recorder: Recorder,
+                 rng: random.Random, think_s: float, deadline: float):
+        self.scenario = scenario
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.token = token
+        self.recorder = recorder
+        self.rng = rng
+        self.think_s = think_s
+        self.deadline = deadline
+
+    @property
+    def running(self) -> bool:
+        return time.perf_counter() < self.deadline
+
+    async def request(self, method: str, template: str, **kwargs):
+        """Send one request, recorded under its path template; returns None unless it succeeded."""
+        url = template.format(**kwargs.pop("path_params", {}))
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        self.recorder.record(f"{self.scenario}: {method} {template}", (time.perf_counter() - started) * 1000, status)
+        return response if response is not None and status < 400 else None
+
+    async def think(self):
+        if self.think_s > 0 and self.running:
+            await asyncio.sleep(min(self.rng.expovariate(1 / self.think_s), self.deadline - time.perf_counter()))
+
+
+async def trader_submit(user: VirtualUser, text_gen):
+    categories = await user.request("GET", "/api/categories")
+    category_ids = [category["id"] for category in categories.json()] if categories else []
+    while user.running and category_ids:
+        created = await user.request("POST", "/api/complaints", json={
+            "category_id": user.rng.choice(category_ids),
+            "title": text_gen.title(),
+            "description": text_gen.paragraph(5),
+            "complaint_summary": text_gen.paragraph(1.5),
+            "complaining_on_behalf_of": "self",
+            "desired_resolution": text_gen.sentence(),
+        })
+        await user.think()
+        await user.request("GET", "/api/complaints", params={"page_size": 20})
+        if created:
+            await user.request("GET", "/api/complaints/{id}", path_params={"id": created.json()["id"]})
+        await user.request("GET", "/api/notifications/unread-count")
+        await user.think()
+
+
+async def committee_triage(user: VirtualUser, text_gen):
+    while user.running:
+        queue = await user.request("GET", "/api/complaints", params={"status": "SUBMITTED", "page_size": 50})
+        complaints = queue.json()["complaints"] if queue else []
+        if not complaints:
+            queue = await user.request("GET", "/api/complaints", params={"page_size": 50})
+            complaints = queue.json()["complaints"] if queue else []
+        await user.think()
+        if not complaints:
+            continue
+        complaint = user.rng.choice(complaints)
+        ids = {"id": complaint["id"]}
+        await user.request("GET", "/api/complaints/{id}", path_params=ids)
+        await user.request("GET", "/api/complaints/{id}/comments", path_params=ids)
+        await user.think()
+        await user.request("POST", "/api/complaints/{id}/comments", path_params=ids, json={
+            "complaint_id": complaint["id"], "content": text_gen.paragraph(1.8), "is_internal": user.rng.random() < 0.3,
+        })
+        if complaint["status"] == "SUBMITTED":
+            await user.request("PATCH", "/api/complaints/{id}", path_params=ids, json={"status": "UNDER_REVIEW"})
+        await user.think()
+
+
+async def dashboard_polling(user: VirtualUser, text_gen):
+    while user.running:
+        await user.request("GET", "/api/dashboard/stats")
+        await user.request("GET", "/api/notifications/unread-count")
+        await user.request("GET", "/api/notifications", params={"limit": 20})
+        await user.think()
+
+
+async def exports(user: VirtualUser, text_gen):
+    while user.running:
+        listing = await user.request("GET", "/api/complaints", params={"page_size": 20})
+        await user.request("GET", "/api/export/complaints/csv", params={"status": user.rng.choice(EXPORT_STATUSES)})
+        await user.think()
+        await user.request("GET", "/api/export/analytics/excel")
+        if listing and listing.json()["complaints"]:
+            complaint = user.rng.choice(listing.json()["complaints"])
+            await user.request("GET", "/api/export/complaint/{id}/pdf", path_params={"id": complaint["id"]})
+        await user.think()
+
+
+async def websocket_fanout(user: VirtualUser, text_gen):
+    import websockets
+
+    url = str(user.client.base_url.copy_with(scheme="ws" if user.client.base_url.scheme == "http" else "wss",
+                                             path="/ws", params={"token": user.token}))
+    started = time.perf_counter()
+    async with websockets.connect(url, open_timeout=30) as socket:
+        if time.perf_counter() >= user.recorder.warmup_until:
+            user.recorder.ws_connect_ms.append((time.perf_counter() - started) * 1000)
+        while user.running:
+            try:
+                raw = await asyncio.wait_for(socket.recv(), timeout=max(user.deadline - time.perf_counter(), 0.01))
+            except asyncio.TimeoutError:
+                break
+            message = json.loads(raw)
+            created_at = message.get("data", {}).get("created_at")
+            if created_at and time.perf_counter() >= user.recorder.warmup_until:
+                # Server timestamps are naive UTC; meaningful when client and server share a clock
+                delay = datetime.utcnow() - datetime.fromisoformat(created_at)
+                user.recorder.ws_delivery_ms.append(delay.total_seconds() * 1000)
+
+
+FLOWS = {
+    "trader_submit": trader_submit,
+    "committee_triage": committee_triage,
+    "dashboard_polling": dashboard_polling,
+    "exports": exports,
+    "websocket_fanout": websocket_fanout,
+}
+
+
+def bench_tokens() -> dict:
+    """Access tokens for the datagen bench users, by role."""
+    from sqlalchemy import select
+    from auth import create_access_token
+    from database import SessionLocal
+    from models import User
+    from benchmarks.datagen import BENCH_EMAIL_DOMAIN
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(User.id, User.role).where(User.email.like(f"bench-%@{BENCH_EMAIL_DOMAIN}"))
+        ).all()
+    tokens = {}
+    for user_id, role in rows:
+        tokens.setdefault(role.value, []).append(create_access_token({"sub": str(user_id)}))
+    return tokens
+
+
+def allocate(names: list, users: int) -> dict:
+    """Split virtual users across scenarios by weight, at least one each."""
+    total = sum(SCENARIOS[name][0] for name in names)
+    return {name: max(1, round(users * SCENARIOS[name][0] / total)) for name in names}
+
+
+def git_revision() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def summarize(latencies: list, wall: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1) if latencies else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    from benchmarks.datagen import ArabicText
+
+    names = args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(unknown)}")
+    if "websocket_fanout" in names:
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            print("⚠ websockets is not installed; skipping websocket_fanout")
+            names.remove("websocket_fanout")
+
+    tokens = bench_tokens()
+    if not tokens:
+        raise SystemExit("no bench users; run python -m benchmarks.datagen first")
+    counts = allocate(names, args.users)
+    rng = random.Random(args.seed)
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        recorder = Recorder(started + args.warmup)
+        deadline = started + args.warmup + args.duration
+        tasks = []
+        for name, count in counts.items():
+            _, roles, think_s = SCENARIOS[name]
+            pool = [token for role in roles for token in tokens.get(role, [])]
+            if not pool:
+                raise SystemExit(f"no bench users for {name} ({', '.join(roles)})")
+            for _ in range(count):
+                user = VirtualUser(name, client, rng.choice(pool), recorder,
+                                   random.Random(rng.random()), think_s * args.think_scale, deadline)
+                tasks.append(_start(user, FLOWS[name], ArabicText(user.rng), rng.uniform(0, args.ramp_up)))
+        failures = [result for result in await asyncio.gather(*tasks, return_exceptions=True) if isinstance(result, Exception)]
+        wall = time.perf_counter() - recorder.warmup_until
+
+    everything = [ms for step in recorder.steps.values() for ms in step["latencies"]]
+    errors = sum(count for step in recorder.steps.values() for status, count in step["statuses"].items() if not 0 < status < 400)
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": datetime.utcnow().replace(microsecond=0).isoformat(),
+            "base_url": args.base_url,
+            "users": counts,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "think_scale": args.think_scale,
+            "seed": args.seed,
+            "aborted_users": len(failures),
+        },
+        "totals": dict(summarize(everything, wall), errors=errors),
+        "steps": {},
+    }
+    for label, step in sorted(recorder.steps.items()):
+        report["steps"][label] = dict(
+            summarize(step["latencies"], wall),
+            errors=sum(count for status, count in step["statuses"].items() if not 0 < status < 400),
+            statuses={str(status): count for status, count in sorted(step["statuses"].items())},
+        )
+    if "websocket_fanout" in counts:
+        report["websocket"] = {
+            "connections": len(recorder.ws_connect_ms),
+            "connect_p50_ms": round(percentile(recorder.ws_connect_ms, 50), 1),
+            "connect_p99_ms": round(percentile(recorder.ws_connect_ms, 99), 1),
+            "messages": len(recorder.ws_delivery_ms),
+            "delivery_p50_ms": round(percentile(recorder.ws_delivery_ms, 50), 1),
+            "delivery_p99_ms": round(percentile(recorder.ws_delivery_ms, 99), 1),
+        }
+    for failure in failures[:5]:
+        print(f"⚠ virtual user aborted: {failure!r}")
+    return report
+
+
+async def _start(user: VirtualUser, flow, text_gen, delay: float):
+    await asyncio.sleep(delay)
+    await flow(user, text_gen)
+
+
+def print_report(report: dict):
+    meta, totals = report["meta"], report["totals"]
+    print(f"revision {meta['revision']}, {sum(meta['users'].values())} users, {meta['duration_s']}s "
+          f"(+{meta['warmup_s']}s warmup), think x{meta['think_scale']}")
+    print(f"{totals['requests']} requests, {totals['throughput_rps']} req/s, p50 {totals['p50_ms']} ms, "
+          f"p99 {totals['p99_ms']} ms, errors {totals['errors']}")
+    print(f"\n{'step':<62} {'req':>7} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+    for label, row in report["steps"].items():
+        print(f"{label:<62} {row['requests']:>7} {row['throughput_rps']:>7} {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['errors']:>5}")
+    if "websocket" in report:
+        ws = report["websocket"]
+        print(f"\nwebsocket: {ws['connections']} connections (p50 {ws['connect_p50_ms']} ms), "
+              f"{ws['messages']} messages, delivery p50 {ws['delivery_p50_ms']} ms, p99 {ws['delivery_p99_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=100, help="virtual users across all scenarios")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds, after warmup")
+    parser.add_argument("--warmup", type=float, default=10)
+    parser.add_argument("--ramp-up", type=float, default=5, help="spread virtual user starts over this many seconds")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiplier on think times; 0 for closed loop")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Time-to-ready benchmark for a multi-worker gunicorn start.
+
+Starts gunicorn with N Uvicorn workers against the configured DATABASE_URL
+and reports how long it takes until every worker has logged "Application
+startup complete". Run `python bootstrap.py` first to measure the normal
+deploy path (workers only check readiness).
+
+    cd backend
+    python -m benchmarks.startup_time --workers 4 --runs 3
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_LINE = "Application startup complete"
+
+
+def time_to_ready(workers: int, bind: str, timeout: float) -> list:
+    command = [
+        sys.executable, "-m", "gunicorn", "main:app",
+        "--workers", str(workers),
+        "--worker-class", "uvicorn.workers.UvicornWorker",
+        "--bind", bind,
+        "--config", "gunicorn.conf.py",
+    ]
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        command, cwd=BACKEND_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, env=dict(os.environ, PYTHONUNBUFFERED="1")
+    )
+    ready = []
+    try:
+        for line in proc.stdout:
+            if READY_LINE in line:
+                ready.append(time.perf_counter() - started)
+                if len(ready) == workers:
+                    break
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"only {len(ready)}/{workers} workers ready after {timeout}s")
+        else:
+            raise RuntimeError(f"gunicorn exited with code {proc.wait()}")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--bind", default="127.0.0.1:8765")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    print(f"{'run':>4} {'first ready s':>14} {'all ready s':>12}")
+    totals = []
+    for run in range(1, args.runs + 1):
+        ready = time_to_ready(args.workers, args.bind, args.timeout)
+        totals.append(ready[-1])
+        print(f"{run:>4} {ready[0]:>14.2f} {ready[-1]:>12.2f}")
+    print(f"median all-ready: {sorted(totals)[len(totals) // 2]:.2f}s ({args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
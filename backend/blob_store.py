@@ -0,0 +1,406 @@
+"""
+Content-addressed storage for uploaded files.
+
+Every upload goes through upload_pipeline (validation, size limit, SHA-256
+in one pass) into a staging directory and is then stored under its hash,
+sharded as ab/cd/abcd...: the same receipt uploaded ten times is stored
+once. The `blobs` table has a row per stored hash, and the rows that use a
+file (attachments, payment proofs, profile pictures, business licenses)
+hold that hash in a foreign key. A blob's reference count is simply the
+number of those rows, so there is no counter to drift when rows are deleted
+or replaced.
+
+The daily GC job (collect_garbage) removes blobs nothing references any
+more, plus stored files without a row and abandoned staging files, all only
+once they are older than BLOB_GC_GRACE_HOURS. An upload upserts its blob
+row before storing the file and keeps that row locked until the request
+commits, and GC locks the rows it deletes with SKIP LOCKED, so a blob
+being re-uploaded is never collected underneath the upload.
+
+Files derived from a blob (image_derivatives.py) are stored next to it as
+`<blob key>.<suffix>`. They belong to the blob: GC deletes them with it, and
+the orphan sweep treats them like the blob's own file.
+
+The bytes live in a BlobStorage, chosen with BLOB_STORAGE: LocalBlobStorage
+(a directory) or S3BlobStorage (any S3-compatible service, MinIO included;
+needs boto3). file_downloads.py serves them.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import exists, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import Attachment, Blob, Payment, User
+from upload_pipeline import StoredUpload, save_upload
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = ".staging"
+
+
+def blob_key(sha256: str, derivative: Optional[str] = None) -> str:
+    key = f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+    return f"{key}.{derivative}" if derivative else key
+
+
+def _is_sha256(name: str) -> bool:
+    return len(name) == 64 and all(c in "0123456789abcdef" for c in name)
+
+
+def _key_sha256(key: str) -> Optional[str]:
+    """The blob a stored key belongs to (its own file or a derivative), if it is a blob key at all."""
+    sha = key.rsplit("/", 1)[-1].split(".", 1)[0]
+    return sha if _is_sha256(sha) else None
+
+
+class BlobStorage(ABC):
+    """Where blob bytes live. Keys come from blob_key(); every method is blocking."""
+
+    @abstractmethod
+    def put(self, key: str, source_path: str, mime_type: Optional[str]):
+        """Store the file at source_path under key (consuming it); a key that exists already holds the same bytes."""
+
+    @abstractmethod
+    def open(self, key: str):
+        """A readable binary stream; FileNotFoundError if the key is missing."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def derived_keys(self, key: str) -> List[str]:
+        """The stored derivatives of the blob at key."""
+
+    @abstractmethod
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        """Every stored key, derivatives included, with its last write time (naive UTC)."""
+
+    @abstractmethod
+    def location(self, key: str) -> str:
+        """What upload rows record as the file's path."""
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def presigned_url(self, key: str, expires_in: int, disposition: str, media_type: str) -> Optional[str]:
+        """A URL the client can fetch the bytes from directly, when the backend has one."""
+        return None
+
+
+class LocalBlobStorage(BlobStorage):
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def location(self, key: str) -> str:
+        return self.local_path(key)
+
+    def put(self, key: str, source_path: str, mime_type: Optional[str]):
+        path = self.local_path(key)
+        if os.path.exists(path):
+            # Already stored: keep the copy, but refresh its age for the orphan sweep
+            os.utime(path)
+            os.unlink(source_path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def open(self, key: str):
+        return open(self.local_path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def derived_keys(self, key: str) -> List[str]:
+        directory, name = os.path.split(self.local_path(key))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        prefix = key.rsplit("/", 1)[0]
+        return [f"{prefix}/{entry}" for entry in names if entry.startswith(f"{name}.")]
+
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        for directory, subdirs, files in os.walk(self.root):
+            subdirs[:] = [name for name in subdirs if name != STAGING_DIR]
+            for name in files:
+                sha = _key_sha256(name)
+                if sha:
+                    path = os.path.join(directory, name)
+                    yield f"{sha[:2]}/{sha[2:4]}/{name}", datetime.utcfromtimestamp(os.path.getmtime(path))
+
+
+class S3BlobStorage(BlobStorage):
+    def __init__(self, bucket: str, endpoint_url: str = "", region: str = "us-east-1",
+                 access_key: str = "", secret_key: str = ""):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use, in the worker; boto3 clients are thread-safe
+        if self._client is None:
+            import boto3
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url or None,
+                region_name=self.region,
+                aws_access_key_id=self.access_key or None,
+                aws_secret_access_key=self.secret_key or None
+            )
+        return self._client
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def put(self, key: str, source_path: str, mime_type: Optional[str]):
+        # Always written: identical bytes, and it refreshes LastModified for the orphan sweep
+        try:
+            self.client.upload_file(
+                source_path, self.bucket, key,
+                ExtraArgs={"ContentType": mime_type or "application/octet-stream"}
+            )
+        finally:
+            os.unlink(source_path)
+
+    def presigned_url(self, key: str, expires_in: int, disposition: str, media_type: str) -> str:
+        # Signed locally by botocore: no request to S3
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": disposition,
+                "ResponseContentType": media_type
+            },
+            ExpiresIn=expires_in
+        )
+
+    def open(self, key: str):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def derived_keys(self, key: str) -> List[str]:
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=f"{key}.")
+        return [item["Key"] for item in response.get("Contents", [])]
+
+    def keys(self) -> Iterator[Tuple[str, datetime]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for item in page.get("Contents", []):
+                if _key_sha256(item["Key"]):
+                    yield item["Key"], item["LastModified"].replace(tzinfo=None)
+
+
+class BlobStore:
+    def __init__(self, storage: BlobStorage, staging_dir: str, gc_grace_hours: int):
+        self.storage = storage
+        self.staging_dir = staging_dir
+        self.gc_grace = timedelta(hours=gc_grace_hours)
+
+    def _record(self, db: Session, upload: StoredUpload):
+        now = datetime.utcnow()
+        values = {
+            "sha256": upload.sha256,
+            "size": upload.size,
+            "mime_type": upload.mime_type,
+            "created_at": now,
+            "last_uploaded_at": now
+        }
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(Blob.__table__)
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(Blob.__table__)
+        else:
+            db.merge(Blob(**values))
+            db.flush()
+            return
+        db.execute(stmt.values(**values).on_conflict_do_update(
+            index_elements=["sha256"], set_={"last_uploaded_at": now}
+        ))
+
+    async def save_upload(
+        self,
+        db: Session,
+        file: UploadFile,
+        max_bytes: Optional[int] = None,
+        allowed_extensions: Optional[List[str]] = None,
+        variants: Sequence = ()
+    ) -> StoredUpload:
+        """
+        Validate, hash and store `file`; returns it with `path` set to the blob's location.
+        The blob row is written in `db` and becomes durable with the caller's commit.
+        Images also get the given derivatives (see image_derivatives.py).
+        """
+        upload = await save_upload(file, self.staging_dir, uuid.uuid4().hex, max_bytes, allowed_extensions)
+        key = blob_key(upload.sha256)
+        try:
+            # In a thread: on PostgreSQL the upsert waits on the row lock GC holds on
+            # that blob until its batch commits, which must not stall the event loop
+            await asyncio.to_thread(self._record, db, upload)
+            if variants and upload.mime_type.startswith("image/"):
+                # From the staged file, before it moves into (possibly remote) storage
+                from image_derivatives import image_service
+                await image_service.generate(upload.sha256, upload.path, variants)
+            await asyncio.to_thread(self.storage.put, key, upload.path, upload.mime_type)
+        except BaseException:
+            if os.path.exists(upload.path):
+                os.unlink(upload.path)
+            raise
+        upload.path = self.storage.location(key)
+        return upload
+
+    def collect_garbage(self, db: Session, batch_size: int = 500) -> Dict[str, int]:
+        """Delete unreferenced blobs, stored files without a row and stale staging files."""
+        cutoff = datetime.utcnow() - self.gc_grace
+        referenced = or_(
+            exists().where(Attachment.blob_sha256 == Blob.sha256),
+            exists().where(Payment.proof_sha256 == Blob.sha256),
+            exists().where(User.profile_picture_sha256 == Blob.sha256),
+            exists().where(User.business_license_sha256 == Blob.sha256)
+        )
+        blobs = 0
+        while True:
+            query = db.query(Blob.sha256).filter(Blob.last_uploaded_at < cutoff, ~referenced).limit(batch_size)
+            if db.get_bind().dialect.name == "postgresql":
+                # Rows an in-flight upload has just upserted stay locked until it commits
+                query = query.with_for_update(skip_locked=True)
+            shas = [row.sha256 for row in query]
+            if not shas:
+                break
+            # Files first: if the commit fails the rows survive without files, and the
+            # next upload of that content writes the file again
+            for sha in shas:
+                key = blob_key(sha)
+                for derived in self.storage.derived_keys(key):
+                    self.storage.delete(derived)
+                self.storage.delete(key)
+            db.query(Blob).filter(Blob.sha256.in_(shas)).delete(synchronize_session=False)
+            db.commit()
+            blobs += len(shas)
+            if len(shas) < batch_size:
+                break
+        db.commit()
+
+        return {
+            "blobs": blobs,
+            "orphan_files": self._sweep_storage(db, cutoff, batch_size),
+            "staging_files": self._sweep_staging(cutoff)
+        }
+
+    def _sweep_storage(self, db: Session, cutoff: datetime, batch_size: int) -> int:
+        removed = 0
+        batch: Dict[str, str] = {}
+
+        def flush():
+            nonlocal removed
+            shas = list(set(batch.values()))
+            known = {row.sha256 for row in db.query(Blob.sha256).filter(Blob.sha256.in_(shas))}
+            for key, sha in batch.items():
+                if sha not in known:
+                    self.storage.delete(key)
+                    removed += 1
+            batch.clear()
+
+        for key, modified in self.storage.keys():
+            if modified < cutoff:
+                batch[key] = _key_sha256(key)
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+        db.commit()
+        return removed
+
+    def _sweep_staging(self, cutoff: datetime) -> int:
+        removed = 0
+        if not os.path.isdir(self.staging_dir):
+            return removed
+        for entry in os.scandir(self.staging_dir):
+            if entry.is_file() and datetime.utcfromtimestamp(entry.stat().st_mtime) < cutoff:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+def _storage_from_settings() -> BlobStorage:
+    if settings.BLOB_STORAGE == "s3":
+        return S3BlobStorage(
+            bucket=settings.BLOB_S3_BUCKET,
+            endpoint_url=settings.BLOB_S3_ENDPOINT_URL,
+            region=settings.BLOB_S3_REGION,
+            access_key=settings.BLOB_S3_ACCESS_KEY,
+            secret_key=settings.BLOB_S3_SECRET_KEY
+        )
+    return LocalBlobStorage(settings.BLOB_DIR)
+
+
+blob_store = BlobStore(
+    storage=_storage_from_settings(),
+    staging_dir=os.path.join(settings.BLOB_DIR, STAGING_DIR),
+    gc_grace_hours=settings.BLOB_GC_GRACE_HOURS
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blob store maintenance")
+    parser.add_argument("--gc", action="store_true", help="collect unreferenced blobs now")
+    args = parser.parse_args()
+    if args.gc:
+        from database import SessionLocal
+        db = SessionLocal()
+        try:
+            result = blob_store.collect_garbage(db)
+        finally:
+            db.close()
+        print(f"✓ Removed {result['blobs']} unreferenced blobs, {result['orphan_files']} orphan files, "
+              f"{result['staging_files']} staging files")
+    else:
+        parser.print_help()
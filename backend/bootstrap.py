@@ -0,0 +1,199 @@
+"""
+One-shot database bootstrap: migrations, tables, indexes and seed data.
+
+Run once per deploy before the app workers start:
+
+    cd backend
+    python bootstrap.py
+
+All steps are idempotent and run under a PostgreSQL advisory lock, so
+concurrent invocations (several containers starting at once) queue up
+instead of racing each other's DDL. App workers only call check_ready().
+"""
+from contextlib import contextmanager
+from typing import Tuple
+import argparse
+import os
+import time
+
+from sqlalchemy import text, inspect
+from sqlalchemy.exc import IntegrityError
+
+from database import Base, engine, SessionLocal
+from models import Category
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Arbitrary app-wide key for pg_advisory_lock ("allajnah" as bytes)
+BOOTSTRAP_LOCK_ID = 0x616C6C616A6E6168
+
+DEFAULT_CATEGORIES = [
+    # المواصفات والمقاييس
+    ("سحب عينات متكررة لنفس المنتج", "repeated_sampling_same_product", "المواصفات والمقاييس"),
+    ("عدم قبولهم الفحوصات السابقة", "rejection_previous_tests", "المواصفات والمقاييس"),
+    ("مبالغة في الاجراءات الشكلية والمعاينة الظاهرية", "excessive_formal_procedures", "المواصفات والمقاييس"),
+    ("رفض شهادات المطابقة ونتائج الاختبار", "rejection_conformity_certificates", "المواصفات والمقاييس"),
+    ("رفض تقارير اختبار العينات", "rejection_sample_test_reports", "المواصفات والمقاييس"),
+    ("التحريز الشامل لجميع محتويات الشاحنة", "comprehensive_seizure_shipment", "المواصفات والمقاييس"),
+    ("تأخير الإفراج - الفحص لمدة طويلة", "delayed_release_long_inspection", "المواصفات والمقاييس"),
+    ("ارتفاع أجور الفحص", "high_inspection_fees", "المواصفات والمقاييس"),
+    ("الإجراءات على منتج سليم بسبب منتج مخالف", "procedures_sound_product_due_defective", "المواصفات والمقاييس"),
+    ("تأخير الافراج", "delayed_release", "المواصفات والمقاييس"),
+    ("التأخير في نتائج الفحص الظاهر", "delay_visual_inspection_results", "المواصفات والمقاييس"),
+    ("تكرار الفحوصات لمنتجات سابقة", "repeated_tests_previous_products", "المواصفات والمقاييس"),
+    ("غرامات غير قانونية", "illegal_fines", "المواصفات والمقاييس"),
+    ("ابتزاز", "extortion", "المواصفات والمقاييس"),
+    ("إلزام المصنعين بمواصفات اختيارية", "mandatory_optional_specifications", "المواصفات والمقاييس"),
+
+    # الجمارك
+    ("اهمال البضائع عند المطابقة", "goods_neglect_during_matching", "الجمارك"),
+    ("غرامات غير قانونية", "illegal_fines_customs", "الجمارك"),
+    ("معاملة المواد الخام كمنتج نهائي للاستهلاك", "raw_materials_as_final_product", "الجمارك"),
+    ("ازدواجية المطالبة بالضمان", "duplicate_guarantee_demand", "الجمارك"),
+    ("مخالفة اتفاق", "agreement_violation", "الجمارك"),
+    ("عدم البت في الاتلاف", "no_decision_destruction", "الجمارك"),
+    ("تفاوت أوقات المعاينة بين الجهات المعنية", "varying_inspection_times", "الجمارك"),
+    ("تأخر الافراج لعدم الوزن", "release_delay_no_weighing", "الجمارك"),
+    ("الافتقار لنظام واضح لقيمة البضائع", "lack_clear_valuation_system", "الجمارك"),
+    ("عدم حماية العلامة التجارية", "no_trademark_protection", "الجمارك"),
+    ("رفض اقرارات الشراء", "purchase_declaration_rejection", "الجمارك"),
+    ("كسر الاعفاء المقدم", "exemption_breach", "الجمارك"),
+    ("مخالفة للتعميمات", "circulars_violation", "الجمارك"),
+    ("زيادة في القيمة الجمركية", "customs_value_increase", "الجمارك"),
+    ("احتجاز بضائع خارجة من صنعاء", "goods_detention_from_sanaa", "الجمارك"),
+    ("استيفاء وثائق الهيئة العامة للاستثمار", "investment_authority_documents", "الجمارك"),
+    ("تأخير السلع منها سلع سريعة التلف", "perishable_goods_delay", "الجمارك"),
+    ("اختلال في التقييم للسعر", "price_valuation_disruption", "الجمارك"),
+    ("عدم إعادة الرسوم", "no_fees_refund", "الجمارك"),
+    ("إعادة الجمركة", "re_customs", "الجمارك"),
+    ("احتجار المرتجع", "returned_goods_monopoly", "الجمارك"),
+    ("فترة التخصيم", "clearance_period", "الجمارك"),
+    ("الية القيمة والثمن", "value_price_mechanism", "الجمارك"),
+
+    # الضرائب
+    ("طلب اقرارات سابقة", "previous_declarations_request", "الضرائب"),
+    ("تأخير استلام الاقرارات الضريبية", "tax_declarations_receipt_delay", "الضرائب"),
+    ("سداد الضريبة نقداً وشيكات", "tax_payment_cash_checks", "الضرائب"),
+    ("رفع ضريبة الأرباح", "profit_tax_increase", "الضرائب"),
+    ("طلب اصل البيان الجمركي", "original_customs_statement_request", "الضرائب"),
+    ("طلب التجار من مباحث الأموال العامة", "traders_request_public_funds_investigation", "الضرائب"),
+    ("مبالغ تحت الحساب", "amounts_on_account", "الضرائب"),
+    ("عدم اتخاذ الإجراءات القانونية", "no_legal_action", "الضرائب"),
+    ("زيادة الإجراءات في المعاملات", "increased_transaction_procedures", "الضرائب"),
+
+    # صندوق النظافة والتحسين
+    ("التحصيل بين المديريات في إطار المحافظة الواحدة", "collection_between_directorates", "صندوق النظافة والتحسين"),
+    ("رسوم الدعاية والاعلان وازدواجية تحصيل الرسوم بلوائح مختلفة", "advertising_fees_duplicate_collection", "صندوق النظافة والتحسين"),
+    ("ارتفاع الرسوم", "high_fees", "صندوق النظافة والتحسين"),
+    ("ازدواجية التحصيل", "duplicate_collection", "صندوق النظافة والتحسين"),
+    ("تحصيل رسوم بدون سندات", "fees_collection_without_receipts", "صندوق النظافة والتحسين"),
+    ("أسلوب الإكراه في الوسائل الإعلانية", "coercion_advertising_methods", "صندوق النظافة والتحسين"),
+    ("ضعف تنسيق الصندوق مع الامن", "weak_coordination_security", "صندوق النظافة والتحسين"),
+    ("التنصل عن تنفيذ الاتفاقات", "agreements_execution_evasion", "صندوق النظافة والتحسين"),
+    ("المزاجية في المعاملات الإدارية", "arbitrary_administrative_transactions", "صندوق النظافة والتحسين"),
+]
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    return Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+
+
+def migration_head() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def check_ready() -> Tuple[bool, str]:
+    """
+    Cheap per-worker startup check: the database answers and its schema is at
+    the migration head. Returns (ready, reason).
+    """
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("alembic_version"):
+            return False, "no alembic_version table"
+        current = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+
+    head = migration_head()
+    if head not in current:
+        return False, f"schema at {', '.join(current) or 'no revision'}, expected {head}"
+    return True, f"schema at {head}"
+
+
+@contextmanager
+def bootstrap_lock():
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    # Session-level lock held on a dedicated connection for the whole run
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": BOOTSTRAP_LOCK_ID}).scalar()
+        if not acquired:
+            print("Waiting for another bootstrap to finish...")
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": BOOTSTRAP_LOCK_ID})
+
+
+def run_migrations():
+    from alembic import command
+
+    command.upgrade(_alembic_config(), "head")
+
+
+def seed_default_categories():
+    db = SessionLocal()
+    try:
+        if db.query(Category).count() > 0:
+            print("✓ Categories already exist")
+            return
+
+        print("Adding default categories...")
+        for name_ar, name_en, government_entity in DEFAULT_CATEGORIES:
+            try:
+                with db.begin_nested():
+                    db.add(Category(name_ar=name_ar, name_en=name_en, government_entity=government_entity))
+            except IntegrityError:
+                pass
+        db.commit()
+        print("✓ Default categories added")
+    finally:
+        db.close()
+
+
+def run_bootstrap(migrate: bool = True):
+    from add_performance_indexes import add_performance_indexes
+
+    started = time.perf_counter()
+    with bootstrap_lock():
+        steps = []
+        if migrate:
+            steps.append(("Running database migrations", run_migrations))
+        steps += [
+            ("Verifying database tables", lambda: Base.metadata.create_all(bind=engine)),
+            ("Creating indexes", add_performance_indexes),
+            ("Seeding default data", seed_default_categories),
+        ]
+        for label, step in steps:
+            step_started = time.perf_counter()
+            print(f"{label}...")
+            step()
+            print(f"✓ {label} done ({time.perf_counter() - step_started:.2f}s)")
+
+    print(f"✓ Bootstrap complete ({time.perf_counter() - started:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap the database once per deploy.")
+    parser.add_argument("--skip-migrations", action="store_true", help="do not run alembic upgrade head")
+    args = parser.parse_args()
+    run_bootstrap(migrate=not args.skip_migrations)
+
+
+if __name__ == "__main__":
+    main()
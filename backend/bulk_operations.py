@@ -0,0 +1,179 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, case, any_, bindparam, type_coerce, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from models import Complaint, ComplaintStatus
+from audit_helper import create_audit_log
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable
+
+
+class BulkOperationResult:
+    """Per-id outcome of a bulk operation, shaped like BulkActionResponse."""
+
+    def __init__(self, requested_ids: List[int]):
+        # Duplicate ids are processed (and counted) once
+        self.total = len(requested_ids)
+        self.successful_ids: List[int] = []
+        self.failed_ids: List[int] = []
+        self.errors: List[str] = []
+        self.notifications: List[Dict[str, Any]] = []
+
+    def fail(self, complaint_id: int, error: str):
+        self.failed_ids.append(complaint_id)
+        self.errors.append(error)
+
+    def to_response(self) -> Dict[str, Any]:
+        return {
+            "success_count": len(self.successful_ids),
+            "failed_count": len(self.failed_ids),
+            "total": self.total,
+            "successful_ids": self.successful_ids,
+            "failed_ids": self.failed_ids,
+            "errors": self.errors
+        }
+
+
+class BulkOperationService:
+    """
+    Set-based complaint updates: one locking SELECT to validate ids and read
+    the previous values, one UPDATE ... RETURNING to apply the change, and
+    audit rows buffered on the session so they go out as a single multi-row
+    INSERT at commit. Nothing is committed here; the caller commits once.
+    """
+
+    @staticmethod
+    def _unique_ids(ids: Iterable[int]) -> List[int]:
+        return list(dict.fromkeys(ids))
+
+    @staticmethod
+    def _id_filter(db: Session, ids: List[int]):
+        # Postgres gets one array parameter instead of thousands of IN binds
+        if db.get_bind().dialect.name == "postgresql":
+            return Complaint.id == any_(bindparam("complaint_ids", ids, type_=ARRAY(Integer)))
+        return Complaint.id.in_(ids)
+
+    @staticmethod
+    def _lock_existing(db: Session, ids: List[int]) -> Dict[int, Any]:
+        rows = db.execute(
+            select(
+                Complaint.id, Complaint.status, Complaint.assigned_to_id,
+                Complaint.user_id, Complaint.title
+            )
+            .where(BulkOperationService._id_filter(db, ids))
+            .with_for_update()
+        ).all()
+        return {row.id: row for row in rows}
+
+    @staticmethod
+    def _apply(db: Session, ids: List[int], values: Dict[str, Any]) -> set:
+        if not ids:
+            return set()
+        stmt = (
+            update(Complaint)
+            .where(BulkOperationService._id_filter(db, ids))
+            .values(**values)
+            .returning(Complaint.id)
+            .execution_options(synchronize_session=False)
+        )
+        return set(db.execute(stmt).scalars().all())
+
+    @staticmethod
+    def _collect(result: BulkOperationResult, requested: List[int], existing: Dict[int, Any], updated: set):
+        for complaint_id in requested:
+            if complaint_id not in existing:
+                result.fail(complaint_id, f"Complaint #{complaint_id} not found")
+            elif complaint_id not in updated:
+                result.fail(complaint_id, f"Complaint #{complaint_id} was not updated")
+            else:
+                result.successful_ids.append(complaint_id)
+
+    @staticmethod
+    def assign(db: Session, actor_id: int, complaint_ids: List[int], assigned_to_id: int) -> BulkOperationResult:
+        requested = BulkOperationService._unique_ids(complaint_ids)
+        result = BulkOperationResult(requested)
+
+        existing = BulkOperationService._lock_existing(db, requested)
+        updated = BulkOperationService._apply(db, list(existing), {
+            "assigned_to_id": assigned_to_id,
+            "status": case(
+                (Complaint.status == ComplaintStatus.SUBMITTED,
+                 type_coerce(ComplaintStatus.UNDER_REVIEW, Complaint.status.type)),
+                else_=Complaint.status
+            ),
+            "updated_at": datetime.utcnow()
+        })
+        BulkOperationService._collect(result, requested, existing, updated)
+
+        for complaint_id in result.successful_ids:
+            create_audit_log(
+                db,
+                actor_id,
+                "BULK_ASSIGN_COMPLAINT",
+                "complaint",
+                complaint_id,
+                f"Bulk assigned complaint #{complaint_id} from user {existing[complaint_id].assigned_to_id} to user {assigned_to_id}"
+            )
+
+        count = len(result.successful_ids)
+        if count:
+            single_id = result.successful_ids[0] if count == 1 else None
+            result.notifications.append({
+                "user_id": assigned_to_id,
+                "type": "COMPLAINT_ASSIGNED",
+                "title_ar": f"تم تعيين {count} شكوى لك",
+                "title_en": f"{count} complaint(s) assigned to you",
+                "message_ar": f"تم تعيين {count} شكوى لك دفعة واحدة",
+                "message_en": f"{count} complaint(s) have been assigned to you in bulk",
+                "related_complaint_id": single_id,
+                "action_url": f"/complaints/{single_id}" if single_id else "/complaints"
+            })
+
+        return result
+
+    @staticmethod
+    def update_status(db: Session, actor_id: int, complaint_ids: List[int], new_status: ComplaintStatus) -> BulkOperationResult:
+        requested = BulkOperationService._unique_ids(complaint_ids)
+        result = BulkOperationResult(requested)
+
+        now = datetime.utcnow()
+        values = {"status": new_status, "updated_at": now}
+        if new_status in [ComplaintStatus.RESOLVED, ComplaintStatus.REJECTED]:
+            values["resolved_at"] = now
+            values["can_reopen_until"] = now + timedelta(days=7)
+
+        existing = BulkOperationService._lock_existing(db, requested)
+        updated = BulkOperationService._apply(db, list(existing), values)
+        BulkOperationService._collect(result, requested, existing, updated)
+
+        by_owner: Dict[int, List[int]] = {}
+        for complaint_id in result.successful_ids:
+            row = existing[complaint_id]
+            create_audit_log(
+                db,
+                actor_id,
+                "BULK_UPDATE_STATUS",
+                "complaint",
+                complaint_id,
+                f"Bulk updated complaint #{complaint_id} status from {row.status.value} to {new_status.value}"
+            )
+            by_owner.setdefault(row.user_id, []).append(complaint_id)
+
+        # One notification per complaint owner, however many of their complaints changed
+        for owner_id, owner_complaint_ids in by_owner.items():
+            count = len(owner_complaint_ids)
+            single_id = owner_complaint_ids[0] if count == 1 else None
+            result.notifications.append({
+                "user_id": owner_id,
+                "type": "COMPLAINT_STATUS_UPDATED",
+                "title_ar": f"تحديث حالة الشكوى #{single_id}" if single_id else f"تحديث حالة {count} شكوى",
+                "title_en": f"Complaint #{single_id} Status Update" if single_id else f"{count} Complaints Updated",
+                "message_ar": f"الحالة الجديدة: {new_status.value}",
+                "message_en": f"New status: {new_status.value}",
+                "related_complaint_id": single_id,
+                "action_url": f"/complaints/{single_id}" if single_id else "/complaints"
+            })
+
+        return result
+
+
+bulk_operation_service = BulkOperationService()
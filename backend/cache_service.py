@@ -1,8 +1,9 @@
-import json
 from typing import Optional, Any
 from datetime import timedelta
 import redis
 from config import get_settings
+from json_codec import dumps, loads
+from metrics import record_cache
 
 settings = get_settings()
 
@@ -22,8 +23,9 @@ class CacheService:
         
         try:
             value = self.redis_client.get(key)
+            record_cache("redis", bool(value))
             if value:
-                return json.loads(value)
+                return loads(value)
         except Exception as e:
             print(f"Cache get error: {e}")
         return None
@@ -36,7 +38,7 @@ class CacheService:
             self.redis_client.setex(
                 key,
                 timedelta(seconds=expire_seconds),
-                json.dumps(value, default=str)
+                dumps(value)
             )
             return True
         except Exception as e:
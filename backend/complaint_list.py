@@ -0,0 +1,92 @@
+"""
+Lean read path for complaint lists.
+
+A list row shows a complaint's number, title, summary, status, priority,
+category and the trader/assignee names. Loading whole Complaint objects for
+that cost:
+
+- 30+ columns per row, the long description and behalf-of details included;
+- three selectinload queries for the related users and category;
+- identity-map bookkeeping for every object;
+- Pydantic validating each object through from_attributes, and FastAPI
+  validating the result again against the response model.
+
+list_statement() selects only LIST_COLUMNS, with the category name and both
+user names joined into the same query, and the rows come back as plain Core
+rows. The page is serialized to JSON bytes by a precompiled TypeAdapter. It
+uses model_construct, since the rows come straight from the database, and
+goes out as a Response, so nothing is validated on the way out. The count
+query needs no joins at all.
+
+The full record stays on GET /api/complaints/{id}.
+"""
+from typing import Sequence
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from models import Category, Complaint, User
+from schemas import ComplaintsListResponse
+
+submitter = aliased(User)
+assignee = aliased(User)
+
+LIST_COLUMNS = (
+    Complaint.id,
+    Complaint.user_id,
+    Complaint.category_id,
+    Complaint.assigned_to_id,
+    Complaint.title,
+    Complaint.complaint_summary,
+    Complaint.status,
+    Complaint.priority,
+    Complaint.task_status,
+    Complaint.escalation_state,
+    Complaint.created_at,
+    Complaint.updated_at,
+    Complaint.resolved_at,
+    Category.name_ar.label("category_name"),
+    (submitter.first_name + " " + submitter.last_name).label("trader_name"),
+    (assignee.first_name + " " + assignee.last_name).label("assigned_to_name"),
+)
+
+_page_adapter = TypeAdapter(ComplaintsListResponse)
+
+
+def list_statement(criteria: Sequence = ()):
+    return (
+        select(*LIST_COLUMNS)
+        .select_from(Complaint)
+        .outerjoin(Category, Category.id == Complaint.category_id)
+        .outerjoin(submitter, submitter.id == Complaint.user_id)
+        .outerjoin(assignee, assignee.id == Complaint.assigned_to_id)
+        .where(*criteria)
+    )
+
+
+def count_statement(criteria: Sequence = ()):
+    return select(func.count()).select_from(Complaint).where(*criteria)
+
+
+def fetch_page(db: Session, criteria: Sequence, page: int, page_size: int) -> ComplaintsListResponse:
+    """`criteria` may only refer to Complaint columns; newest first."""
+    total = db.execute(count_statement(criteria)).scalar_one()
+    rows = db.execute(
+        list_statement(criteria)
+        .order_by(Complaint.created_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    ).mappings()
+    return ComplaintsListResponse.model_construct(
+        complaints=[dict(row) for row in rows], total=total, page=page, page_size=page_size
+    )
+
+
+def render_page(page: ComplaintsListResponse) -> bytes:
+    return _page_adapter.dump_json(page)
+
+
+def list_response(db: Session, criteria: Sequence, page: int, page_size: int) -> Response:
+    return Response(content=render_page(fetch_page(db, criteria, page, page_size)), media_type="application/json")
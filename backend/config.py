@@ -5,6 +5,19 @@ import os
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    ASYNC_DB_POOL_SIZE: int = 5
+    ASYNC_DB_MAX_OVERFLOW: int = 5
+    
+    # Comma-separated replica URLs for read-heavy endpoints; empty = primary only
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_POOL_SIZE: int = 5
+    REPLICA_MAX_OVERFLOW: int = 5
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+    # Keep above max lag + check interval so a user always reads their own writes
+    READ_YOUR_WRITES_SECONDS: float = 15.0
+    # Pins are shared through REDIS_URL; past this timeout a worker uses its own pins
+    READ_YOUR_WRITES_REDIS_TIMEOUT_MS: int = 50
     
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
@@ -15,6 +28,10 @@ class Settings(BaseSettings):
     RATE_LIMIT_LOGIN_PER_MINUTE: int = 5
     RATE_LIMIT_COMPLAINTS_PER_HOUR: int = 10
     RATE_LIMIT_UPLOADS_PER_HOUR: int = 20
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: str = ""
+    RATE_LIMIT_REDIS_TIMEOUT_MS: int = 50
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 100000
     
     MAX_UPLOAD_SIZE_MB: int = 10
     ALLOWED_UPLOAD_EXTENSIONS: str = ".jpg,.jpeg,.png,.pdf,.doc,.docx"
@@ -45,6 +62,67 @@ class Settings(BaseSettings):
     
     FRONTEND_URL: str = ""
     
+    AUDIT_WRITER_QUEUE_SIZE: int = 10000
+    AUDIT_WRITER_BATCH_SIZE: int = 500
+    AUDIT_WRITER_FLUSH_INTERVAL_SECONDS: float = 2.0
+    # Batches the database keeps refusing wait here until they can be replayed
+    AUDIT_WRITER_SPILL_DIR: str = "audit_spill"
+    
+    EXPORT_JOB_DIR: str = "exports"
+    EXPORT_JOB_WORKERS: int = 2
+    EXPORT_JOB_TTL_HOURS: int = 24
+    # A queued/running job whose worker has not heartbeated for this long is failed
+    EXPORT_JOB_STALE_MINUTES: int = 5
+    EXPORT_JOB_HEARTBEAT_SECONDS: int = 30
+    
+    PDF_RENDER_WORKERS: int = 2
+    PDF_RENDER_QUEUE_SIZE: int = 8
+    PDF_BATCH_MAX_COMPLAINTS: int = 200
+    PDF_CACHE_DIR: str = "pdf_cache"
+    PDF_CACHE_MAX_MB: int = 512
+    
+    # Uploaded files, stored once per distinct content ("local" or "s3")
+    BLOB_STORAGE: str = "local"
+    BLOB_DIR: str = "uploads/blobs"
+    BLOB_S3_BUCKET: str = ""
+    BLOB_S3_ENDPOINT_URL: str = ""
+    BLOB_S3_REGION: str = "us-east-1"
+    BLOB_S3_ACCESS_KEY: str = ""
+    BLOB_S3_SECRET_KEY: str = ""
+    BLOB_GC_GRACE_HOURS: int = 24
+    
+    # Downloads: with a prefix set, nginx sends files via X-Accel-Redirect from an
+    # internal location aliasing DOWNLOAD_ACCEL_ROOT
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX: str = ""
+    DOWNLOAD_ACCEL_ROOT: str = "uploads"
+    DOWNLOAD_URL_TTL_SECONDS: int = 300
+    
+    # Resized copies of uploaded images (avatars, attachment previews), made in a
+    # per-worker thread pool
+    IMAGE_DERIVATIVE_FORMAT: str = "webp"
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    IMAGE_WORKERS: int = 2
+    IMAGE_QUEUE_SIZE: int = 16
+    IMAGE_MAX_PIXELS: int = 40_000_000
+    
+    # bcrypt cost for new hashes (older costs are rehashed at login) and the
+    # per-worker thread pool hashing runs in
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    
+    # Prometheus /metrics endpoint and request/pool/cache/job instrumentation
+    METRICS_ENABLED: bool = True
+    
+    # Per-request query counting, Server-Timing header and N+1 warnings
+    QUERY_METRICS_ENABLED: bool = True
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5
+    QUERY_SLOW_REQUEST_MS: float = 500.0
+    
+    # When the schema is not at the migration head, let a worker run the
+    # bootstrap (migrations included) itself instead of refusing to start
+    BOOTSTRAP_ON_STARTUP: bool = False
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,7 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from config import get_settings
+from json_codec import dumps_str, loads
 
 settings = get_settings()
 DATABASE_URL = settings.DATABASE_URL
@@ -13,6 +16,8 @@ engine = create_engine(
     pool_size=15,
     max_overflow=10,
     echo=False,
+    json_serializer=dumps_str,
+    json_deserializer=loads,
     connect_args={
         "connect_timeout": 10,
         "options": "-c statement_timeout=30000"
@@ -21,9 +26,59 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+def async_database_url(url: str):
+    """Same database through asyncpg; libpq's sslmode is spelled ssl there."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+
+class AsyncBackedSession(Session):
+    """Sync session class behind AsyncSessionLocal, so ORM event listeners can target it."""
+
+
+# Native async engine for async def endpoints: queries await the socket
+# instead of blocking the event loop. Its pool is separate from the sync one.
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_size=settings.ASYNC_DB_POOL_SIZE,
+    max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+    echo=False,
+    json_serializer=dumps_str,
+    json_deserializer=loads,
+    connect_args={
+        "timeout": 10,
+        "server_settings": {"statement_timeout": "30000"}
+    }
+)
+# expire_on_commit=False: expired attributes would need an implicit (and
+# under asyncio, forbidden) lazy load on next access
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=AsyncBackedSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
+        from audit_helper import commit_pending_audit_logs
+        commit_pending_audit_logs(db)
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+        from audit_helper import commit_pending_audit_logs
+        await db.run_sync(commit_pending_audit_logs)
@@ -29,8 +29,8 @@ print("Could not connect to database after maximum retries")
 sys.exit(1)
 END
 
-echo "Running database migrations..."
-alembic upgrade head
+echo "Bootstrapping database (migrations, indexes, seed data)..."
+python bootstrap.py
 
 echo "Starting application server..."
 exec "$@"
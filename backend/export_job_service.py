@@ -0,0 +1,472 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, or_, and_, update, delete
+from sqlalchemy.exc import IntegrityError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple, Iterable, Iterator, List
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import shutil
+import socket
+import time
+
+from models import ExportJob, ExportJobStatus, ExportJobSubscriber, User, UserRole
+from database import SessionLocal
+from export_service import export_service, COMPLAINT_EXPORT_HEADERS
+from json_codec import dumps_str, loads
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EXPORT_TYPES = {
+    "complaints_csv": ("complaints", "csv", "text/csv"),
+    "complaints_excel": ("complaints", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "analytics_csv": ("analytics", "csv", "text/csv"),
+    "analytics_excel": ("analytics", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+ANALYTICS_ROLES = [UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE]
+
+ACTIVE_STATUSES = [ExportJobStatus.PENDING, ExportJobStatus.RUNNING]
+
+# Progress messages go through Redis so subscribers connected to any worker get them
+NOTIFY_CHANNEL = "export_jobs"
+
+
+def serialize_job(job: ExportJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "export_type": job.export_type,
+        "status": job.status.value,
+        "progress": job.progress,
+        "rows_processed": job.rows_processed,
+        "total_rows": job.total_rows,
+        "file_size": job.file_size,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+    }
+
+
+class ExportJobService:
+    """
+    Generates exports in a background worker pool. Jobs are rows in
+    export_jobs; identical requests (same type, filters and data scope) share
+    one job while it is pending, running, or completed and not yet expired.
+
+    Each job records the worker process that owns it, which refreshes the
+    job's heartbeat_at while the job is queued or running. A PENDING/RUNNING
+    job whose heartbeat is older than EXPORT_JOB_STALE_MINUTES, or whose
+    owner process on this host is gone, is failed instead of being reused, so
+    identical requests start a fresh job.
+
+    Users waiting on a job are rows in export_job_subscribers. Progress is
+    published on Redis (REDIS_URL) and every worker forwards it to the
+    subscribers connected to it over WebSocket; without Redis only the
+    owner's connections get it, and other clients poll the job endpoint.
+    """
+
+    def __init__(
+        self,
+        export_dir: str,
+        max_workers: int,
+        ttl_hours: int,
+        stale_minutes: int,
+        heartbeat_seconds: int,
+        redis_url: str = ""
+    ):
+        self.export_dir = export_dir
+        self.max_workers = max_workers
+        self.ttl = timedelta(hours=ttl_hours)
+        self.stale_after = timedelta(minutes=stale_minutes)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.redis_url = redis_url
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._relay_ready = False
+
+    def start(self):
+        if self._executor is not None:
+            return
+        os.makedirs(self.export_dir, exist_ok=True)
+        # A new process (forked workers included) is a new owner
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        db = SessionLocal()
+        try:
+            recovered = self.fail_abandoned(db)
+        finally:
+            db.close()
+        if recovered:
+            logger.warning(f"Failed {recovered} export jobs left behind by stopped workers")
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export-job")
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if self.redis_url:
+            self._relay_task = asyncio.create_task(self._relay())
+        logger.info(f"Export job workers started ({self.max_workers})")
+
+    def stop(self):
+        if self._executor is None:
+            return
+        for task in (self._heartbeat_task, self._relay_task):
+            if task is not None:
+                task.cancel()
+        self._heartbeat_task = self._relay_task = None
+        self._relay_ready = False
+        # Running jobs finish before the interpreter exits; queued ones are cancelled
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        db = SessionLocal()
+        try:
+            queued = db.scalars(select(ExportJob).where(
+                ExportJob.owner == self.owner, ExportJob.status == ExportJobStatus.PENDING
+            )).all()
+            self._fail(db, queued, "Export workers stopped before the job started")
+        except Exception as e:
+            logger.error(f"Could not fail queued export jobs on shutdown: {e}")
+        finally:
+            db.close()
+        logger.info("Export job workers stopped")
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._beat)
+            except Exception as e:
+                logger.warning(f"Export job heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def _beat(self):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ExportJob)
+                .where(ExportJob.owner == self.owner, ExportJob.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _owner_gone(owner: Optional[str]) -> bool:
+        """True when `owner` is a process on this host that no longer exists."""
+        host, _, rest = (owner or "").partition(":")
+        pid = rest.partition(":")[0]
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    def _is_abandoned(self, job: ExportJob, now: datetime) -> bool:
+        if job.owner == self.owner and self._executor is not None:
+            return False
+        if job.heartbeat_at is None or job.heartbeat_at < now - self.stale_after:
+            return True
+        return self._owner_gone(job.owner)
+
+    def _fail(self, db: Session, jobs: List[ExportJob], error: str):
+        if not jobs:
+            return
+        now = datetime.utcnow()
+        for job in jobs:
+            job.status = ExportJobStatus.FAILED
+            job.error = error
+            job.completed_at = now
+            job.expires_at = now + self.ttl
+        db.execute(delete(ExportJobSubscriber).where(ExportJobSubscriber.job_id.in_([job.id for job in jobs])))
+        db.commit()
+
+    def fail_abandoned(self, db: Session) -> int:
+        """Fail PENDING/RUNNING jobs whose owner stopped heartbeating or has exited."""
+        now = datetime.utcnow()
+        active = db.scalars(select(ExportJob).where(ExportJob.status.in_(ACTIVE_STATUSES))).all()
+        abandoned = [job for job in active if self._is_abandoned(job, now)]
+        self._fail(db, abandoned, "Export job did not finish")
+        return len(abandoned)
+
+    @staticmethod
+    def can_access(user: User, export_type: str, params: Dict[str, Any]) -> bool:
+        kind = EXPORT_TYPES[export_type][0]
+        if kind == "analytics":
+            return user.role in ANALYTICS_ROLES
+        if user.role == UserRole.TRADER:
+            return params.get("trader_id") == user.id
+        return True
+
+    @staticmethod
+    def build_params(user: User, export_type: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+        if EXPORT_TYPES[export_type][0] == "analytics":
+            return {}
+        params = {key: value for key, value in filters.items() if value not in (None, "")}
+        if user.role == UserRole.TRADER:
+            params["trader_id"] = user.id
+        return params
+
+    @staticmethod
+    def dedup_key(export_type: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps({"type": export_type, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _find_reusable(self, db: Session, dedup_key: str) -> Optional[ExportJob]:
+        now = datetime.utcnow()
+        job = db.query(ExportJob).filter(
+            ExportJob.dedup_key == dedup_key,
+            or_(
+                ExportJob.status.in_(ACTIVE_STATUSES),
+                and_(ExportJob.status == ExportJobStatus.COMPLETED, ExportJob.expires_at > now)
+            )
+        ).order_by(ExportJob.created_at.desc()).first()
+
+        if job and job.status == ExportJobStatus.COMPLETED and not (job.file_path and os.path.exists(job.file_path)):
+            return None
+        if job and job.status in ACTIVE_STATUSES and self._is_abandoned(job, now):
+            # Its worker is gone; fail it so this request starts a job that will finish
+            self._fail(db, [job], "Export job did not finish")
+            return None
+        return job
+
+    @staticmethod
+    def _subscribe(db: Session, job_id: int, user_id: int):
+        if db.get(ExportJobSubscriber, (job_id, user_id)) is not None:
+            return
+        db.add(ExportJobSubscriber(job_id=job_id, user_id=user_id))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Subscribed concurrently, or the job finished and was cleaned up
+            db.rollback()
+
+    def create_job(self, db: Session, user: User, export_type: str, filters: Dict[str, Any]) -> Tuple[ExportJob, bool]:
+        """Return (job, created). An existing identical job is reused instead of starting another."""
+        # Checked before anything is written, so a stopped pool leaves no orphaned row
+        if self._executor is None:
+            raise RuntimeError("Export job workers are not running")
+
+        params = self.build_params(user, export_type, filters)
+        key = self.dedup_key(export_type, params)
+
+        existing = self._find_reusable(db, key)
+        if existing:
+            if existing.status in ACTIVE_STATUSES:
+                self._subscribe(db, existing.id, user.id)
+            return existing, False
+
+        job = ExportJob(
+            requested_by_id=user.id,
+            export_type=export_type,
+            params=params,
+            dedup_key=key,
+            status=ExportJobStatus.PENDING,
+            owner=self.owner,
+            heartbeat_at=datetime.utcnow()
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Lost the race to an identical request; join its job
+            db.rollback()
+            existing = self._find_reusable(db, key)
+            if not existing:
+                raise
+            if existing.status in ACTIVE_STATUSES:
+                self._subscribe(db, existing.id, user.id)
+            return existing, False
+
+        db.refresh(job)
+        self._subscribe(db, job.id, user.id)
+        self._executor.submit(self._run_job, job.id)
+        return job, True
+
+    def _notify(self, db: Session, job: ExportJob):
+        user_ids = db.scalars(select(ExportJobSubscriber.user_id).where(ExportJobSubscriber.job_id == job.id)).all()
+        if not user_ids:
+            return
+        message = {"type": "export_job", "data": serialize_job(job)}
+
+        if self._relay_ready:
+            from cache_service import cache_service
+            try:
+                # Our own relay delivers to this worker's connections too
+                cache_service.redis_client.publish(NOTIFY_CHANNEL, dumps_str({"user_ids": user_ids, "message": message}))
+                return
+            except Exception as e:
+                logger.warning(f"Could not publish export job progress: {e}")
+
+        if self._loop is None:
+            return
+        from websocket_manager import manager
+        for user_id in user_ids:
+            asyncio.run_coroutine_threadsafe(manager.send_personal_message(message, user_id), self._loop)
+
+    async def _relay(self):
+        """Forward progress published by any worker to the subscribers connected to this one."""
+        import redis.asyncio as redis_asyncio
+        from websocket_manager import manager
+
+        while True:
+            client = redis_asyncio.from_url(self.redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(NOTIFY_CHANNEL)
+                    self._relay_ready = True
+                    async for item in pubsub.listen():
+                        if item["type"] != "message":
+                            continue
+                        payload = loads(item["data"])
+                        for user_id in payload["user_ids"]:
+                            await manager.send_personal_message(payload["message"], user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._relay_ready:
+                    logger.warning(f"Export job progress relay lost Redis ({e}); notifying this worker's connections only")
+                self._relay_ready = False
+                await asyncio.sleep(5)
+            finally:
+                self._relay_ready = False
+                await client.aclose()
+
+    def _track_progress(
+        self,
+        db: Session,
+        job: ExportJob,
+        row_batches: Iterable[List[List[Any]]],
+        min_interval_seconds: float = 1.0
+    ) -> Iterator[List[List[Any]]]:
+        last_report = 0.0
+        for rows in row_batches:
+            yield rows
+            job.rows_processed += len(rows)
+            if job.total_rows:
+                job.progress = min(99, int(job.rows_processed * 100 / job.total_rows))
+            now = time.monotonic()
+            if now - last_report >= min_interval_seconds:
+                last_report = now
+                job.heartbeat_at = datetime.utcnow()
+                db.commit()
+                self._notify(db, job)
+
+    def _write_artifact(self, db: Session, job: ExportJob, path: str):
+        kind, extension, _ = EXPORT_TYPES[job.export_type]
+
+        if kind == "analytics":
+            data = export_service.analytics_export_data(db)
+            buffer = export_service.export_to_csv(data) if extension == "csv" else export_service.export_to_excel(data, "Analytics")
+            with open(path, "wb") as f:
+                shutil.copyfileobj(buffer, f)
+            job.total_rows = job.rows_processed = len(data)
+            return
+
+        stmt = export_service.complaint_export_statement(**job.params)
+        job.total_rows = db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+        db.commit()
+
+        batches = self._track_progress(db, job, export_service.iter_complaint_export_rows(stmt))
+        if extension == "csv":
+            with open(path, "wb") as f:
+                for chunk in export_service.stream_csv(COMPLAINT_EXPORT_HEADERS, batches):
+                    f.write(chunk)
+        else:
+            export_service.write_excel_file(COMPLAINT_EXPORT_HEADERS, batches, "Complaints", path=path)
+
+    def _run_job(self, job_id: int):
+        db = SessionLocal()
+        part_path = None
+        try:
+            job = db.get(ExportJob, job_id)
+            if not job or job.status != ExportJobStatus.PENDING:
+                return
+
+            job.status = ExportJobStatus.RUNNING
+            job.started_at = job.heartbeat_at = datetime.utcnow()
+            db.commit()
+            self._notify(db, job)
+
+            extension = EXPORT_TYPES[job.export_type][1]
+            final_path = os.path.join(self.export_dir, f"{job.export_type}_{job.id}_{job.dedup_key[:12]}.{extension}")
+            part_path = final_path + ".part"
+
+            self._write_artifact(db, job, part_path)
+            os.replace(part_path, final_path)
+            part_path = None
+
+            now = datetime.utcnow()
+            job.status = ExportJobStatus.COMPLETED
+            job.progress = 100
+            job.file_path = final_path
+            job.file_size = os.path.getsize(final_path)
+            job.completed_at = now
+            job.expires_at = now + self.ttl
+            db.commit()
+            self._notify(db, job)
+            logger.info(f"Export job {job_id} completed ({job.rows_processed} rows, {job.file_size} bytes)")
+
+        except Exception as e:
+            logger.error(f"Export job {job_id} failed: {e}", exc_info=True)
+            db.rollback()
+            job = db.get(ExportJob, job_id)
+            if job:
+                job.status = ExportJobStatus.FAILED
+                job.error = str(e)[:1000]
+                job.completed_at = datetime.utcnow()
+                job.expires_at = job.completed_at + self.ttl
+                db.commit()
+                self._notify(db, job)
+        finally:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+            try:
+                db.execute(delete(ExportJobSubscriber).where(ExportJobSubscriber.job_id == job_id))
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Could not clear subscribers of export job {job_id}: {e}")
+                db.rollback()
+            db.close()
+
+    def cleanup(self, db: Session) -> Dict[str, int]:
+        """Delete expired artifacts and rows, and fail jobs whose worker stopped heartbeating."""
+        stale = self.fail_abandoned(db)
+
+        now = datetime.utcnow()
+        expired = db.query(ExportJob).filter(
+            ExportJob.status.in_([ExportJobStatus.COMPLETED, ExportJobStatus.FAILED]),
+            ExportJob.expires_at < now
+        ).all()
+        for job in expired:
+            if job.file_path and os.path.exists(job.file_path):
+                try:
+                    os.remove(job.file_path)
+                except OSError as e:
+                    logger.warning(f"Could not remove export file {job.file_path}: {e}")
+            db.delete(job)
+        if expired:
+            db.execute(delete(ExportJobSubscriber).where(ExportJobSubscriber.job_id.in_([job.id for job in expired])))
+
+        db.commit()
+        return {"stale": stale, "expired": len(expired)}
+
+
+export_job_service = ExportJobService(
+    export_dir=settings.EXPORT_JOB_DIR,
+    max_workers=settings.EXPORT_JOB_WORKERS,
+    ttl_hours=settings.EXPORT_JOB_TTL_HOURS,
+    stale_minutes=settings.EXPORT_JOB_STALE_MINUTES,
+    heartbeat_seconds=settings.EXPORT_JOB_HEARTBEAT_SECONDS,
+    redis_url=settings.REDIS_URL
+)
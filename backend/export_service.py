@@ -1,69 +1,238 @@
-import pandas as pd
 from io import BytesIO
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence
 from datetime import datetime
-import arabic_reshaper
-from bidi.algorithm import get_display
+import csv
+import io
+import tempfile
 import os
 
 
+# Bump when generate_complaint_pdf output changes so cached PDFs are not reused
+COMPLAINT_PDF_TEMPLATE_VERSION = 1
+
+COMPLAINT_EXPORT_HEADERS = ["ID", "Title", "Status", "Priority", "Category", "Created", "Trader"]
+
+
 class ExportService:
+    # ReportLab, the Arabic shaper and the TTF font are only needed to render
+    # PDFs, which happens in the render pool; they are loaded on first use so
+    # app workers don't pay for them at import.
     def __init__(self):
-        font_path = os.path.join(os.path.dirname(__file__), 'fonts', 'NotoSansArabic.ttf')
-        if os.path.exists(font_path):
-            try:
-                pdfmetrics.registerFont(TTFont('Arabic', font_path))
-                self.arabic_font_available = True
-            except Exception as e:
-                print(f"Failed to register Arabic font: {e}")
+        self.arabic_font_available: Optional[bool] = None
+    
+    def load_pdf_support(self) -> str:
+        """Import the PDF stack and register the Arabic font once; returns the font name to use."""
+        if self.arabic_font_available is None:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            
+            font_path = os.path.join(os.path.dirname(__file__), 'fonts', 'NotoSansArabic.ttf')
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont('Arabic', font_path))
+                    self.arabic_font_available = True
+                except Exception as e:
+                    print(f"Failed to register Arabic font: {e}")
+                    self.arabic_font_available = False
+            else:
+                print(f"Arabic font not found at {font_path}")
                 self.arabic_font_available = False
-        else:
-            print(f"Arabic font not found at {font_path}")
-            self.arabic_font_available = False
+        return 'Arabic' if self.arabic_font_available else 'Helvetica'
     
     @staticmethod
     def reshape_arabic_text(text: str) -> str:
-        if not text:
-            return text
-        try:
-            reshaped_text = arabic_reshaper.reshape(text)
-            bidi_text = get_display(reshaped_text)
-            return bidi_text
-        except Exception as e:
-            print(f"Error reshaping Arabic text: {e}")
-            return text
+        from arabic_text import shape
+        
+        return shape(text)
     
     @staticmethod
     def export_to_csv(data: List[Dict[str, Any]], filename: str = "export.csv") -> BytesIO:
-        df = pd.DataFrame(data)
-        buffer = BytesIO()
-        df.to_csv(buffer, index=False, encoding='utf-8-sig')
-        buffer.seek(0)
-        return buffer
+        headers = list(data[0].keys()) if data else []
+        rows = [[item.get(h) for h in headers] for item in data]
+        return BytesIO(b"".join(ExportService.stream_csv(headers, [rows])))
     
+    @staticmethod
+    def complaint_export_statement(
+        trader_id: Optional[int] = None,
+        status=None,
+        category_id: Optional[int] = None,
+        priority=None,
+        search: Optional[str] = None
+    ):
+        """
+        Flat projection of the complaint export columns with category and
+        trader joined in, so rows can be streamed without per-row lazy loads.
+        """
+        from sqlalchemy import select, or_
+        from models import Complaint, Category, User
+
+        stmt = (
+            select(
+                Complaint.id,
+                Complaint.title,
+                Complaint.status,
+                Complaint.priority,
+                Category.name_en,
+                Complaint.created_at,
+                User.first_name,
+                User.last_name
+            )
+            .outerjoin(Category, Complaint.category_id == Category.id)
+            .outerjoin(User, Complaint.user_id == User.id)
+        )
+
+        if trader_id is not None:
+            stmt = stmt.where(Complaint.user_id == trader_id)
+        if status:
+            stmt = stmt.where(Complaint.status == status)
+        if category_id:
+            stmt = stmt.where(Complaint.category_id == category_id)
+        if priority:
+            stmt = stmt.where(Complaint.priority == priority)
+        if search:
+            stmt = stmt.where(
+                or_(
+                    Complaint.title.ilike(f"%{search}%"),
+                    Complaint.description.ilike(f"%{search}%")
+                )
+            )
+
+        return stmt.order_by(Complaint.id)
+
+    @staticmethod
+    def format_complaint_export_row(row) -> List[Any]:
+        trader = f"{row.first_name} {row.last_name}" if row.first_name is not None else ""
+        return [
+            row.id,
+            row.title,
+            row.status.value,
+            row.priority.value,
+            row.name_en or "",
+            row.created_at.isoformat() if row.created_at else "",
+            trader
+        ]
+
+    @staticmethod
+    def iter_complaint_export_rows(
+        stmt, batch_size: int = 1000, pinned: bool = False
+    ) -> Iterator[List[List[Any]]]:
+        """
+        Yield formatted rows in batches from a server-side cursor. Uses its own
+        session so the stream does not depend on the request session lifetime,
+        on a read replica when one is available (and the caller is not pinned
+        to the primary after a write).
+        """
+        from read_replicas import replica_router
+
+        db = replica_router.read_session(pinned)
+        try:
+            result = db.execute(stmt.execution_options(yield_per=batch_size))
+            for partition in result.partitions():
+                yield [ExportService.format_complaint_export_row(row) for row in partition]
+        finally:
+            db.close()
+
+    @staticmethod
+    def stream_csv(headers: Sequence[str], row_batches: Iterable[List[Sequence[Any]]]) -> Iterator[bytes]:
+        """Encode CSV incrementally, one chunk per batch of rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        buffer.write("\ufeff")
+        writer.writerow(headers)
+        yield buffer.getvalue().encode("utf-8")
+
+        for rows in row_batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def complaint_pdf_data(complaint) -> Dict[str, Any]:
+        return {
+            "id": complaint.id,
+            "title": complaint.title,
+            "status": complaint.status.value,
+            "priority": complaint.priority.value,
+            "category": complaint.category.name_en if complaint.category else "",
+            "description": complaint.description,
+            "created_at": complaint.created_at.isoformat(),
+            "trader_name": f"{complaint.user.first_name} {complaint.user.last_name}" if complaint.user else ""
+        }
+
+    @staticmethod
+    def analytics_export_data(db) -> List[Dict[str, Any]]:
+        from sqlalchemy import func
+        from models import Complaint, ComplaintStatus
+
+        counts = dict(
+            db.query(Complaint.status, func.count(Complaint.id)).group_by(Complaint.status).all()
+        )
+        return [
+            {"Metric": "Total Complaints", "Value": sum(counts.values())},
+            {"Metric": "Submitted", "Value": counts.get(ComplaintStatus.SUBMITTED, 0)},
+            {"Metric": "Under Review", "Value": counts.get(ComplaintStatus.UNDER_REVIEW, 0)},
+            {"Metric": "Escalated", "Value": counts.get(ComplaintStatus.ESCALATED, 0)},
+            {"Metric": "Resolved", "Value": counts.get(ComplaintStatus.RESOLVED, 0)},
+            {"Metric": "Rejected", "Value": counts.get(ComplaintStatus.REJECTED, 0)}
+        ]
+
     @staticmethod
     def export_to_excel(data: List[Dict[str, Any]], sheet_name: str = "Data") -> BytesIO:
-        df = pd.DataFrame(data)
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-        buffer.seek(0)
-        return buffer
+        headers = list(data[0].keys()) if data else []
+        rows = [[item.get(h) for h in headers] for item in data]
+        path = ExportService.write_excel_file(headers, [rows], sheet_name)
+        try:
+            with open(path, "rb") as f:
+                return BytesIO(f.read())
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def write_excel_file(
+        headers: Sequence[str],
+        row_batches: Iterable[List[Sequence[Any]]],
+        sheet_name: str = "Data",
+        path: Optional[str] = None
+    ) -> str:
+        """
+        Write rows to an .xlsx file with openpyxl's write-only mode, which
+        serializes each row as it is appended instead of keeping the sheet in
+        memory. Without a path a temp file is used; the caller removes it.
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=sheet_name)
+        sheet.append(list(headers))
+        for rows in row_batches:
+            for row in rows:
+                sheet.append(row)
+
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+            os.close(fd)
+        try:
+            workbook.save(path)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
     
     def generate_complaint_pdf(self, complaint_data: Dict[str, Any]) -> BytesIO:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib import colors
+        from arabic_text import shape, label
+        
+        font_name = self.load_pdf_support()
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=50, leftMargin=50)
         styles = getSampleStyleSheet()
         
-        font_name = 'Arabic' if self.arabic_font_available else 'Helvetica'
-        
         style_title = ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
@@ -83,19 +252,19 @@ class ExportService:
         
         story = []
         
-        title_text = self.reshape_arabic_text(f"تقرير الشكوى #{complaint_data.get('id', 'N/A')}")
+        title_text = shape(f"تقرير الشكوى #{complaint_data.get('id', 'N/A')}")
         title = Paragraph(title_text, style_title)
         story.append(title)
         story.append(Spacer(1, 20))
         
         data = [
-            [self.reshape_arabic_text('القيمة'), self.reshape_arabic_text('الحقل')],
-            [str(complaint_data.get('id', 'N/A')), self.reshape_arabic_text('رقم الشكوى')],
-            [self.reshape_arabic_text(complaint_data.get('status', 'N/A')), self.reshape_arabic_text('الحالة')],
-            [self.reshape_arabic_text(complaint_data.get('priority', 'N/A')), self.reshape_arabic_text('الأولوية')],
-            [self.reshape_arabic_text(complaint_data.get('category', 'N/A')), self.reshape_arabic_text('الفئة')],
-            [complaint_data.get('created_at', 'N/A'), self.reshape_arabic_text('تاريخ الإنشاء')],
-            [self.reshape_arabic_text(complaint_data.get('trader_name', 'N/A')), self.reshape_arabic_text('التاجر')],
+            [label('القيمة'), label('الحقل')],
+            [str(complaint_data.get('id', 'N/A')), label('رقم الشكوى')],
+            [shape(complaint_data.get('status', 'N/A')), label('الحالة')],
+            [shape(complaint_data.get('priority', 'N/A')), label('الأولوية')],
+            [shape(complaint_data.get('category', 'N/A')), label('الفئة')],
+            [complaint_data.get('created_at', 'N/A'), label('تاريخ الإنشاء')],
+            [shape(complaint_data.get('trader_name', 'N/A')), label('التاجر')],
         ]
         
         table = Table(data, colWidths=[300, 150])
@@ -116,18 +285,18 @@ class ExportService:
         story.append(Spacer(1, 25))
         
         if complaint_data.get('description'):
-            desc_title = Paragraph(f"<b>{self.reshape_arabic_text('الوصف:')}</b>", style_rtl)
+            desc_title = Paragraph(f"<b>{label('الوصف:')}</b>", style_rtl)
             story.append(desc_title)
             story.append(Spacer(1, 10))
-            desc_text = Paragraph(self.reshape_arabic_text(complaint_data.get('description', '')), style_rtl)
+            desc_text = Paragraph(shape(complaint_data.get('description', '')), style_rtl)
             story.append(desc_text)
             story.append(Spacer(1, 15))
         
         if complaint_data.get('complaint_summary'):
-            summary_title = Paragraph(f"<b>{self.reshape_arabic_text('ملخص الشكوى:')}</b>", style_rtl)
+            summary_title = Paragraph(f"<b>{label('ملخص الشكوى:')}</b>", style_rtl)
             story.append(summary_title)
             story.append(Spacer(1, 10))
-            summary_text = Paragraph(self.reshape_arabic_text(complaint_data.get('complaint_summary', '')), style_rtl)
+            summary_text = Paragraph(shape(complaint_data.get('complaint_summary', '')), style_rtl)
             story.append(summary_text)
         
         doc.build(story)
@@ -135,12 +304,18 @@ class ExportService:
         return buffer
     
     def generate_analytics_report(self, analytics_data: Dict[str, Any]) -> BytesIO:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib import colors
+        from arabic_text import shape, label
+        
+        font_name = self.load_pdf_support()
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=50, leftMargin=50)
         styles = getSampleStyleSheet()
         
-        font_name = 'Arabic' if self.arabic_font_available else 'Helvetica'
-        
         style_title = ParagraphStyle(
             'TitleStyle',
             parent=styles['Heading1'],
@@ -159,21 +334,21 @@ class ExportService:
         )
         
         story = []
-        title = Paragraph(self.reshape_arabic_text("تقرير التحليلات"), style_title)
+        title = Paragraph(label('تقرير التحليلات'), style_title)
         story.append(title)
         story.append(Spacer(1, 15))
         
-        date_info = Paragraph(self.reshape_arabic_text(f"تاريخ الإنشاء: {datetime.now().strftime('%Y-%m-%d %H:%M')}"), style_rtl)
+        date_info = Paragraph(shape(f"تاريخ الإنشاء: {datetime.now().strftime('%Y-%m-%d %H:%M')}"), style_rtl)
         story.append(date_info)
         story.append(Spacer(1, 25))
         
         data = [
-            [self.reshape_arabic_text('القيمة'), self.reshape_arabic_text('المؤشر')],
-            [str(analytics_data.get('total_complaints', 0)), self.reshape_arabic_text('إجمالي الشكاوى')],
-            [str(analytics_data.get('pending_count', 0)), self.reshape_arabic_text('قيد الانتظار')],
-            [str(analytics_data.get('in_progress_count', 0)), self.reshape_arabic_text('قيد المراجعة')],
-            [str(analytics_data.get('resolved_count', 0)), self.reshape_arabic_text('محلولة')],
-            [str(analytics_data.get('rejected_count', 0)), self.reshape_arabic_text('مرفوضة')],
+            [label('القيمة'), label('المؤشر')],
+            [str(analytics_data.get('total_complaints', 0)), label('إجمالي الشكاوى')],
+            [str(analytics_data.get('pending_count', 0)), label('قيد الانتظار')],
+            [str(analytics_data.get('in_progress_count', 0)), label('قيد المراجعة')],
+            [str(analytics_data.get('resolved_count', 0)), label('محلولة')],
+            [str(analytics_data.get('rejected_count', 0)), label('مرفوضة')],
         ]
         
         table = Table(data, colWidths=[150, 300])
@@ -0,0 +1,243 @@
+"""
+Authorized file downloads that keep the bytes out of the Python worker.
+
+Access is checked with a single query: the file's row joined to whatever
+decides access (the complaint owner for attachments, the payer for payment
+proofs, the user for business licenses) and to the caller's role, with the
+caller identified from the token alone.
+
+The transfer itself is handed off where possible:
+
+- behind nginx (DOWNLOAD_ACCEL_REDIRECT_PREFIX set), the response carries
+  only headers plus X-Accel-Redirect. nginx then sends the file from an
+  `internal` location with sendfile, and handles Range and conditional
+  requests itself (see nginx-production.conf);
+- blobs on S3 redirect to a short-lived presigned URL;
+- otherwise FileResponse streams the file. Starlette handles Range/If-Range,
+  and If-None-Match/If-Modified-Since are answered with 304 here.
+  Blob-backed files use their SHA-256 (and derivative name) as a strong ETag.
+
+Signed URLs let a browser fetch a file with a plain link (no Authorization
+header). A URL names the file, the user it was issued to and an expiry,
+all covered by an HMAC. Expiries are aligned to DOWNLOAD_URL_TTL_SECONDS
+windows (a link lives one to two of them), so a page listing files gets the
+same URLs on every load within a window and the browser cache can answer.
+Access is checked when the URL is issued, and the download is audited
+against that user.
+"""
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from blob_store import blob_key, blob_store
+from config import get_settings
+from models import Attachment, Blob, Complaint, Payment, User, UserRole
+
+settings = get_settings()
+
+KINDS = ("attachment", "payment-proof", "business-license")
+
+AUDIT_ACTIONS = {
+    "attachment": ("DOWNLOAD_ATTACHMENT", "attachment"),
+    "payment-proof": ("DOWNLOAD_PAYMENT_PROOF", "payment"),
+    "business-license": ("DOWNLOAD_BUSINESS_LICENSE", "User"),
+}
+
+# Separate from the JWT key's own use: a download signature is never a valid token
+_SIGNING_KEY = hashlib.sha256(b"file-downloads:" + settings.JWT_SECRET_KEY.encode("utf-8")).digest()
+
+
+class DownloadTarget:
+    """A file to send. With `derivative` set, it is that derivative of the blob (see image_derivatives.py)."""
+
+    __slots__ = ("kind", "object_id", "path", "sha256", "filename", "media_type", "details", "derivative")
+
+    def __init__(self, kind: str, object_id: int, path: Optional[str], sha256: Optional[str],
+                 filename: str, media_type: str, details: str, derivative: Optional[str] = None):
+        self.kind = kind
+        self.object_id = object_id
+        self.path = path
+        self.sha256 = sha256
+        self.filename = filename
+        self.media_type = media_type
+        self.details = details
+        self.derivative = derivative
+
+
+def _target_query(kind: str, object_id: int):
+    if kind == "attachment":
+        return (
+            select(
+                Attachment.filepath.label("path"),
+                Attachment.blob_sha256.label("sha256"),
+                Attachment.filename.label("filename"),
+                Attachment.file_type.label("media_type"),
+                Complaint.user_id.label("owner_id"),
+                Attachment.complaint_id.label("complaint_id")
+            )
+            .join(Complaint, Complaint.id == Attachment.complaint_id)
+            .where(Attachment.id == object_id)
+        )
+    if kind == "payment-proof":
+        return (
+            select(
+                Payment.proof_path.label("path"),
+                Payment.proof_sha256.label("sha256"),
+                literal(None).label("filename"),
+                Blob.mime_type.label("media_type"),
+                Payment.user_id.label("owner_id"),
+                literal(None).label("complaint_id")
+            )
+            .outerjoin(Blob, Blob.sha256 == Payment.proof_sha256)
+            .where(Payment.id == object_id)
+        )
+    return (
+        select(
+            User.business_license_path.label("path"),
+            User.business_license_sha256.label("sha256"),
+            literal(None).label("filename"),
+            Blob.mime_type.label("media_type"),
+            User.id.label("owner_id"),
+            literal(None).label("complaint_id")
+        )
+        .outerjoin(Blob, Blob.sha256 == User.business_license_sha256)
+        .where(User.id == object_id)
+    )
+
+
+async def load_target(db: AsyncSession, kind: str, object_id: int, user_id: Optional[int]) -> DownloadTarget:
+    """
+    The file behind (kind, object_id). With a user_id, also checks that user may
+    read it: committees can read every file, traders only their own.
+    """
+    if kind not in KINDS:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    query = _target_query(kind, object_id)
+    if user_id is not None:
+        caller = aliased(User)
+        query = query.add_columns(caller.role.label("caller_role")).join(caller, caller.id == user_id)
+    row = (await db.execute(query)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    if user_id is not None and row.caller_role == UserRole.TRADER and row.owner_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to download this file")
+    if not row.path and not row.sha256:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    media_type = row.media_type or mimetypes.guess_type(row.path or "")[0] or "application/octet-stream"
+    filename = row.filename
+    if not filename:
+        extension = os.path.splitext(row.path or "")[1] if not row.sha256 else mimetypes.guess_extension(media_type)
+        filename = f"{kind}-{object_id}{extension or ''}"
+    details = f"Downloaded file '{filename}'"
+    if row.complaint_id is not None:
+        details += f" from complaint #{row.complaint_id}"
+    return DownloadTarget(kind, object_id, row.path, row.sha256, filename, media_type, details)
+
+
+async def audit_download(user_id: int, target: DownloadTarget):
+    from audit_helper import audit_log_writer
+    action, target_type = AUDIT_ACTIONS[target.kind]
+    await audit_log_writer.enqueue(user_id, action, target_type, target.object_id, target.details)
+
+
+def _signature(kind: str, object_id: int, user_id: int, expires: int) -> str:
+    message = f"{kind}:{object_id}:{user_id}:{expires}".encode("utf-8")
+    return hmac.new(_SIGNING_KEY, message, hashlib.sha256).hexdigest()
+
+
+def sign_url(kind: str, object_id: int, user_id: int) -> Tuple[str, datetime]:
+    ttl = settings.DOWNLOAD_URL_TTL_SECONDS
+    expires = (int(time.time()) // ttl + 2) * ttl
+    signature = _signature(kind, object_id, user_id, expires)
+    url = f"/api/files/{kind}/{object_id}?user={user_id}&expires={expires}&signature={signature}"
+    return url, datetime.utcfromtimestamp(expires)
+
+
+def verify_signature(kind: str, object_id: int, user_id: int, expires: int, signature: str):
+    if expires < time.time():
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Download link has expired")
+    if not hmac.compare_digest(_signature(kind, object_id, user_id, expires), signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid download link")
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _not_modified(request: Request, etag: str, mtime: Optional[float]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _accel_uri(path: str) -> Optional[str]:
+    prefix = settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX
+    if not prefix:
+        return None
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(settings.DOWNLOAD_ACCEL_ROOT))
+    if relative.startswith(".."):
+        return None
+    return f"{prefix.rstrip('/')}/{quote(relative.replace(os.sep, '/'))}"
+
+
+async def file_response(request: Request, target: DownloadTarget, cache_control: Optional[str] = None,
+                        disposition: str = "attachment") -> Response:
+    headers = {"Cache-Control": cache_control or f"private, max-age={settings.DOWNLOAD_URL_TTL_SECONDS}"}
+    path = target.path
+    if target.sha256:
+        key = blob_key(target.sha256, target.derivative)
+        headers["ETag"] = f'"{key.rsplit("/", 1)[-1]}"'
+        if _not_modified(request, headers["ETag"], None):
+            return Response(status_code=304, headers=headers)
+        presigned = blob_store.storage.presigned_url(
+            key, settings.DOWNLOAD_URL_TTL_SECONDS, content_disposition(target.filename, disposition), target.media_type
+        )
+        if presigned:
+            return RedirectResponse(presigned, status_code=307, headers=headers)
+        path = blob_store.storage.local_path(key)
+
+    try:
+        stat_result = os.stat(path)
+    except (OSError, TypeError):
+        raise HTTPException(status_code=404, detail="File not found on server")
+
+    etag = headers.setdefault("ETag", f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"')
+    headers["Last-Modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    accel_uri = _accel_uri(path)
+    if accel_uri is not None:
+        headers["X-Accel-Redirect"] = accel_uri
+        headers["Content-Disposition"] = content_disposition(target.filename, disposition)
+        return Response(headers=headers, media_type=target.media_type)
+
+    return FileResponse(
+        path, filename=target.filename, media_type=target.media_type, headers=headers, stat_result=stat_result,
+        content_disposition_type=disposition
+    )
@@ -1,6 +1,8 @@
-import magic
 import os
-from fastapi import UploadFile, HTTPException, status
+import threading
+from typing import List, Optional
+
+from fastapi import HTTPException, status
 from config import get_settings
 
 settings = get_settings()
@@ -10,51 +12,56 @@ ALLOWED_MIME_TYPES = {
     '.jpg': ['image/jpeg'],
     '.jpeg': ['image/jpeg'],
     '.png': ['image/png'],
+    '.webp': ['image/webp'],
     '.pdf': ['application/pdf'],
     '.doc': ['application/msword'],
     '.docx': ['application/vnd.openxmlformats-officedocument.wordprocessingml.document']
 }
 
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp']
 
-async def validate_upload_file(file: UploadFile) -> bool:
-    if file.size is None:
-        file.file.seek(0, 2)
-        file.size = file.file.tell()
-        file.file.seek(0)
-    
-    max_size_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
-    if file.size > max_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE_MB}MB"
-        )
-    
-    if not file.filename:
+_magic = None
+_magic_lock = threading.Lock()
+
+
+def allowed_upload_extensions() -> List[str]:
+    return [ext.strip() for ext in settings.ALLOWED_UPLOAD_EXTENSIONS.split(',')]
+
+
+def check_filename(filename: Optional[str], allowed_extensions: Optional[List[str]] = None) -> str:
+    """Reject a missing name or a disallowed extension; returns the lower-cased extension."""
+    if not filename:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Filename is required"
         )
-    
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    allowed_extensions = [ext.strip() for ext in settings.ALLOWED_UPLOAD_EXTENSIONS.split(',')]
-    
+
+    allowed_extensions = allowed_extensions or allowed_upload_extensions()
+    file_extension = os.path.splitext(filename)[1].lower()
     if file_extension not in allowed_extensions:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
         )
-    
-    content = await file.read(8192)
-    await file.seek(0)
-    
-    mime = magic.Magic(mime=True)
-    detected_mime = mime.from_buffer(content)
-    
+    return file_extension
+
+
+def detect_mime(head: bytes) -> str:
+    # One libmagic handle per process: opening one loads the whole magic database.
+    # python-magic serialises calls on a handle with its own lock.
+    global _magic
+    if _magic is None:
+        with _magic_lock:
+            if _magic is None:
+                import magic
+                _magic = magic.Magic(mime=True)
+    return _magic.from_buffer(head)
+
+
+def check_content(file_extension: str, detected_mime: str):
     expected_mimes = ALLOWED_MIME_TYPES.get(file_extension, [])
     if expected_mimes and detected_mime not in expected_mimes:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File content does not match extension. Detected: {detected_mime}"
         )
-    
-    return True
@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for production.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app) and workers are forked
+from it, so the interpreter, FastAPI, SQLAlchemy and the ORM mappers are
+shared copy-on-write instead of being imported again by every worker.
+Per-process resources (DB connections, the scheduler, the export and PDF
+pools) are only created in the startup event, which runs in each worker.
+"""
+import gc
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+preload_app = True
+
+# Each worker writes its Prometheus samples here and /metrics sums them. It has
+# to be set (and emptied of the previous run's samples) before the preloaded
+# app imports prometheus_client.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/allajnah-prometheus")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def pre_fork(server, worker):
+    # Move everything imported so far into the permanent generation; otherwise
+    # the first GC pass in each worker writes to those objects' headers and
+    # un-shares the pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Never reuse pooled connections the master may have opened while importing
+    from database import engine, async_engine
+    from read_replicas import replica_router
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.dispose(close=False)
+        replica.async_engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (in-flight requests, pool, WebSockets)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,269 @@
+"""
+Resized, metadata-free copies of uploaded images.
+
+Avatars are shown at 32-128 CSS pixels and attachment photos as thumbnails,
+but the originals are whatever the phone produced: megabytes, with EXIF
+(GPS position included). Image blobs therefore get derivatives:
+
+- avatars: square crops at AVATAR_SIZES, for profile pictures;
+- previews: the whole image fitted into PREVIEW_SIZES, for attachments.
+
+Each one is turned upright per its EXIF orientation, re-encoded as
+IMAGE_DERIVATIVE_FORMAT (webp or jpeg) with no metadata but the colour
+profile, and stored next to its blob as `<blob key>.<variant>.<ext>`. Their
+URLs carry the content hash, so they are cached as immutable, and the blob
+GC deletes them along with the blob.
+
+Pillow decodes, resizes and encodes in C with the GIL released, so the work
+runs in a small thread pool per app worker (IMAGE_WORKERS threads, at most
+IMAGE_QUEUE_SIZE jobs waiting), off the event loop. Derivatives are made
+while the upload is still staged. Any that are missing (older uploads, pool
+full at upload time, format changed) are made on first request. An image
+Pillow cannot read, or one over IMAGE_MAX_PIXELS, keeps only its original.
+
+Public paths (avatars) never fall back to that original: resolve() with
+fallback=False raises ImageServiceBusy when the pool is full and
+ImageUnavailable when no derivative can be made.
+"""
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Sequence, Union
+
+from blob_store import blob_key, blob_store
+from config import get_settings
+from file_downloads import DownloadTarget
+from metrics import IMAGE_DERIVATIVE_SECONDS, IMAGE_DERIVATIVE_SKIPPED
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+
+class ImageServiceBusy(Exception):
+    """Raised when the pool is full; callers should answer 503."""
+
+
+class ImageUnavailable(Exception):
+    """Raised when no derivative can be made of a file (not an image, unreadable, too large)."""
+
+
+class Variant:
+    """One derivative size: a square crop of `size` pixels, or the image fitted into size x size."""
+
+    __slots__ = ("name", "size", "crop")
+
+    def __init__(self, name: str, size: int, crop: bool):
+        self.name = name
+        self.size = size
+        self.crop = crop
+
+
+# Twice the largest CSS size each is shown at, for high-density screens
+AVATAR_SIZES = (64, 128, 256)
+PREVIEW_SIZES = (320, 1280)
+
+AVATAR_VARIANTS = tuple(Variant(f"avatar-{size}", size, True) for size in AVATAR_SIZES)
+PREVIEW_VARIANTS = tuple(Variant(f"preview-{size}", size, False) for size in PREVIEW_SIZES)
+
+
+def pick_variant(variants: Sequence[Variant], size: Optional[int]) -> Variant:
+    """The smallest variant at least `size` pixels, else the largest."""
+    ordered = sorted(variants, key=lambda variant: variant.size)
+    if size:
+        for variant in ordered:
+            if variant.size >= size:
+                return variant
+    return ordered[-1]
+
+
+def avatar_urls(user_id: int, sha256: Optional[str]) -> Optional[dict]:
+    if not sha256:
+        return None
+    return {
+        str(size): f"/api/users/{user_id}/profile-picture?size={size}&v={sha256[:16]}"
+        for size in AVATAR_SIZES
+    }
+
+
+def render(source: Union[str, BinaryIO], variants: Sequence[Variant], image_format: str, quality: int,
+           max_pixels: int) -> List[bytes]:
+    """Encoded derivatives of the image in `source`, in the order of `variants`."""
+    from PIL import Image, ImageOps
+
+    pil_format = FORMATS[image_format][0]
+    largest = max(variant.size for variant in variants)
+    with Image.open(source) as image:
+        if image.width * image.height > max_pixels:
+            raise ValueError(f"{image.width}x{image.height} is over IMAGE_MAX_PIXELS")
+        icc_profile = image.info.get("icc_profile")
+        # JPEGs can decode straight at 1/2, 1/4 or 1/8 scale, never below the size asked for
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        if has_alpha and pil_format == "JPEG":
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+
+    outputs = []
+    for variant in variants:
+        if variant.crop:
+            # Never upscaled: a small original gives a smaller square
+            side = min(variant.size, image.width, image.height)
+            resized = ImageOps.fit(image, (side, side), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((variant.size, variant.size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        options = {"quality": quality}
+        if icc_profile:
+            options["icc_profile"] = icc_profile
+        if pil_format == "JPEG":
+            options.update(optimize=True, progressive=True)
+        else:
+            options["method"] = 4
+        resized.save(buffer, pil_format, **options)
+        outputs.append(buffer.getvalue())
+    return outputs
+
+
+class ImageService:
+    def __init__(self, max_workers: int, max_queue: int, image_format: str, quality: int, max_pixels: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.image_format = image_format if image_format in FORMATS else "webp"
+        self.extension = self.image_format
+        self.media_type = FORMATS[self.image_format][1]
+        self.quality = quality
+        self.max_pixels = max_pixels
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created on first use: threads started in the gunicorn master would not survive the fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="image")
+        return self._executor
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def derivative(self, variant: Variant) -> str:
+        return f"{variant.name}.{self.extension}"
+
+    def _generate(self, sha256: str, source: Optional[str], variants: Sequence[Variant], trigger: str):
+        storage = blob_store.storage
+        missing = [
+            variant for variant in variants
+            if not storage.exists(blob_key(sha256, self.derivative(variant)))
+        ]
+        if not missing:
+            return
+        started = time.perf_counter()
+        if source is None:
+            with storage.open(blob_key(sha256)) as original:
+                source = io.BytesIO(original.read())
+        outputs = render(source, missing, self.image_format, self.quality, self.max_pixels)
+        os.makedirs(blob_store.staging_dir, exist_ok=True)
+        for variant, data in zip(missing, outputs):
+            fd, temp_path = tempfile.mkstemp(dir=blob_store.staging_dir, prefix=".derivative-")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    out.write(data)
+                # mkstemp creates 0600; derivatives are read by whatever serves them
+                os.chmod(temp_path, 0o644)
+                storage.put(blob_key(sha256, self.derivative(variant)), temp_path, self.media_type)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+        IMAGE_DERIVATIVE_SECONDS.labels(trigger).observe(time.perf_counter() - started)
+
+    async def make(self, sha256: str, source: Optional[str], variants: Sequence[Variant],
+                   trigger: str = "upload"):
+        """
+        Make the derivatives of blob `sha256` that are not stored yet, reading the image
+        from `source` (a local path) or, without one, from the blob storage. Raises
+        ImageServiceBusy when the pool is full and ImageUnavailable when it fails.
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                IMAGE_DERIVATIVE_SKIPPED.labels("busy").inc()
+                raise ImageServiceBusy()
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self._generate, sha256, source, variants, trigger)
+        except Exception as e:
+            IMAGE_DERIVATIVE_SKIPPED.labels("error").inc()
+            logger.warning(f"Could not make image derivatives of blob {sha256}: {e}")
+            raise ImageUnavailable(str(e)) from e
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def generate(self, sha256: str, source: Optional[str], variants: Sequence[Variant],
+                       trigger: str = "upload") -> bool:
+        """make(), returning False instead of raising when that was not possible."""
+        try:
+            await self.make(sha256, source, variants, trigger)
+            return True
+        except (ImageServiceBusy, ImageUnavailable):
+            return False
+
+    async def resolve(self, target: DownloadTarget, variants: Sequence[Variant],
+                      size: Optional[int], fallback: bool = True) -> DownloadTarget:
+        """
+        `target` as its derivative closest to `size`, made now if needed. When it is not a
+        blob-backed image or no derivative can be made, `target` itself, or with
+        fallback=False ImageServiceBusy/ImageUnavailable.
+        """
+        if not target.sha256 or not target.media_type.startswith("image/"):
+            if not fallback:
+                raise ImageUnavailable(f"{target.media_type} is not an image")
+            return target
+        variant = pick_variant(variants, size)
+        derivative = self.derivative(variant)
+        storage = blob_store.storage
+        key = blob_key(target.sha256, derivative)
+        local_path = storage.local_path(key)
+        if local_path is not None:
+            stored = os.path.exists(local_path)
+        else:
+            stored = await asyncio.to_thread(storage.exists, key)
+        if not stored:
+            if not fallback:
+                await self.make(target.sha256, None, variants, trigger="request")
+            elif not await self.generate(target.sha256, None, variants, trigger="request"):
+                return target
+        filename = f"{os.path.splitext(target.filename)[0]}-{variant.size}.{self.extension}"
+        return DownloadTarget(
+            target.kind, target.object_id, None, target.sha256, filename, self.media_type, target.details,
+            derivative=derivative
+        )
+
+
+image_service = ImageService(
+    max_workers=settings.IMAGE_WORKERS,
+    max_queue=settings.IMAGE_QUEUE_SIZE,
+    image_format=settings.IMAGE_DERIVATIVE_FORMAT,
+    quality=settings.IMAGE_DERIVATIVE_QUALITY,
+    max_pixels=settings.IMAGE_MAX_PIXELS
+)
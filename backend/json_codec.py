@@ -0,0 +1,62 @@
+"""
+One JSON encoder for the whole backend, on orjson.
+
+orjson encodes what our payloads carry natively and in C: datetimes as ISO
+8601, UUIDs, enums by value and dataclasses. It writes UTF-8 bytes
+directly, several times faster than json.dumps. Anything else goes through
+_default: Pydantic models dump themselves, Decimals become strings, sets
+become lists, and the rest uses str() (as json.dumps(default=str) did).
+
+Where it is used:
+
+- responses: ORJSONResponse is the app's default response class, so
+  response_model output and plain dicts are rendered by orjson;
+- hot list endpoints return model_list_response(): Pydantic validates the
+  ORM rows once and dumps them straight to JSON bytes, skipping FastAPI's
+  second validation pass and jsonable_encoder;
+- the Redis cache (cache_service), WebSocket messages (websocket_manager)
+  and JSON columns such as audit log metadata (the engines'
+  json_serializer) all encode with dumps().
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+loads = orjson.loads
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=OPTIONS)
+
+
+def dumps_str(value: Any) -> str:
+    """For APIs that want text: WebSocket text frames, SQLAlchemy's json_serializer."""
+    return orjson.dumps(value, default=_default, option=OPTIONS).decode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def model_list_response(model: Type[BaseModel], objects: Iterable[Any]) -> Response:
+    """`objects` (ORM rows) as a JSON array of `model`, validated once and dumped by Pydantic."""
+    adapter = list_adapter(model)
+    items = adapter.validate_python(list(objects), from_attributes=True)
+    return Response(content=adapter.dump_json(items), media_type="application/json")
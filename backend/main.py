@@ -2,22 +2,24 @@ from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, F
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, and_, text, select
 from typing import List, Optional
 import os
-import shutil
 import logging
 from datetime import datetime, timedelta
-from slowapi.errors import RateLimitExceeded
 
 logger = logging.getLogger(__name__)
 
-from database import get_db
+from database import get_db, get_async_db
+from read_replicas import replica_router, get_read_db, get_async_read_db, primary_pin
+from query_metrics import query_metrics, track
+from metrics import PrometheusMiddleware, instrument_pool, metrics_response, record_cache, PASSWORD_REHASHES
 from models import (
-    User, Complaint, Comment, Attachment, Category, 
-    Subscription, Payment, ComplaintFeedback, AuditLog,
+    User, Complaint, Comment, Attachment, Blob, Category, 
+    Subscription, Payment, ComplaintFeedback, AuditLog, AuditAction, ExportJob, ExportJobStatus,
     PaymentMethod, SLAConfig, SystemSettings, TaskQueue, ComplaintApproval, QuickReply, NotificationPreference,
     ComplaintEscalation, ComplaintAppeal, ComplaintMediationRequest,
     UserRole, ComplaintStatus, SubscriptionStatus, PaymentStatus, Priority, TaskStatus, ApprovalStatus, AccountStatus,
@@ -36,31 +38,44 @@ from schemas import (
     SystemSettingsCreate, SystemSettingsUpdate, SystemSettingsResponse,
     TaskQueueResponse, ComplaintApprovalCreate, ComplaintApprovalUpdate, ComplaintApprovalResponse,
     QuickReplyCreate, QuickReplyUpdate, QuickReplyResponse,
-    BulkAssignRequest, BulkStatusRequest, BulkActionResponse,
+    BulkAssignRequest, BulkStatusRequest, BulkActionResponse, ExportJobCreate, ExportJobResponse, ComplaintPdfBatchRequest,
     NotificationPreferenceCreate, NotificationPreferenceUpdate, NotificationPreferenceResponse,
     MerchantRegisterRequest, MerchantApprovalRequest,
     ComplaintEscalationCreate, ComplaintEscalationResponse,
     ComplaintAppealCreate, ComplaintAppealUpdate, ComplaintAppealResponse,
     ComplaintMediationRequestCreate, ComplaintMediationRequestUpdate, ComplaintMediationRequestResponse,
     ManualEscalationRequest, ReassignmentRequest,
-    NotificationResponse, NotificationListResponse, TrialStatusResponse
+    NotificationResponse, NotificationListResponse, TrialStatusResponse, Page
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token,
-    get_current_user, require_role
+    get_password_hash, validate_new_password, create_access_token,
+    get_current_user, require_role, get_current_user_async, require_role_async, security, user_id_from_token
 )
-from audit_helper import create_audit_log
+from fastapi.security import HTTPAuthorizationCredentials
+from audit_helper import create_audit_log, audit_log_writer
 from workflow_automation import (
     auto_assign_complaint, check_sla_violations,
     auto_close_resolved_complaints, run_periodic_tasks
 )
 from duplicate_detection import check_duplicate_warning
 from config import get_settings
-from rate_limiter import limiter, LOGIN_RATE_LIMIT, COMPLAINT_RATE_LIMIT, UPLOAD_RATE_LIMIT, _rate_limit_exceeded_handler
-from file_validator import validate_upload_file
+from rate_limiter import limiter, RateLimitExceeded, LOGIN_RATE_LIMIT, COMPLAINT_RATE_LIMIT, UPLOAD_RATE_LIMIT
+from file_validator import IMAGE_EXTENSIONS
+from upload_pipeline import MB, UploadSizeLimitMiddleware
+from blob_store import blob_store
+from file_downloads import DownloadTarget, audit_download, file_response, load_target, sign_url, verify_signature
+from complaint_list import list_response
+from json_codec import model_list_response
+from pagination import PageParams, Sorting, paginate
+from image_derivatives import (
+    image_service, avatar_urls, ImageServiceBusy, ImageUnavailable, AVATAR_VARIANTS, PREVIEW_VARIANTS, PREVIEW_SIZES
+)
 from notification_service import notification_service
 from cache_service import cache_service
 from export_service import export_service
+from export_job_service import export_job_service
+from pdf_render_service import pdf_render_service, PdfRenderBusy
+from password_service import password_service, PasswordServiceBusy
 from scheduler_service import start_scheduler, stop_scheduler
 from websocket_manager import manager
 from response_cache import cache_response
@@ -84,14 +99,30 @@ def get_dashboard_url(path: str = "") -> str:
         return f"{frontend_url}/{path.lstrip('/')}"
     return frontend_url
 
-app = FastAPI(title="Allajnah Enhanced API")
+# Responses are rendered with orjson; hot list endpoints skip FastAPI's
+# re-validation entirely through model_list_response (json_codec.py)
+app = FastAPI(title="Allajnah Enhanced API", default_response_class=ORJSONResponse)
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers=exc.headers)
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+@app.exception_handler(PasswordServiceBusy)
+async def password_service_busy_handler(request: Request, exc: PasswordServiceBusy):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many sign-in requests in progress, please retry shortly"},
+        headers={"Retry-After": "2"}
+    )
 
 # Add GZip compression for all responses over 500 bytes (improves speed by 70%)
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
+# Oversized uploads are refused from their Content-Length, before the body is read
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_SIZE_MB * MB)
+
 cors_origins = settings.CORS_ORIGINS.split(',') if settings.CORS_ORIGINS != "*" else ["*"]
 
 app.add_middleware(
@@ -100,6 +131,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["RateLimit-Policy", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After"],
 )
 
 # Add security headers middleware
@@ -120,6 +152,42 @@ async def add_security_headers(request: Request, call_next):
     response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
     return response
 
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    # Replica reads may lag; keep this user on the primary until they catch up
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        await replica_router.pin_request_user(request)
+    return response
+
+
+@app.middleware("http")
+async def instrument_queries(request: Request, call_next):
+    if not settings.QUERY_METRICS_ENABLED:
+        return await call_next(request)
+    with track() as stats:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    # Label by route template so /complaints/1 and /complaints/2 share a row
+    query_metrics.observe(f"{request.method} {route.path if route else '<unmatched>'}", stats)
+    response.headers["Server-Timing"] = stats.server_timing()
+    return response
+
+
+if settings.METRICS_ENABLED:
+    # Added last so it is the outermost layer and times the whole stack
+    app.add_middleware(PrometheusMiddleware)
+    from database import engine, async_engine
+    instrument_pool(engine, "primary")
+    instrument_pool(async_engine.sync_engine, "primary_async")
+    for index, replica in enumerate(replica_router.replicas, start=1):
+        instrument_pool(replica.engine, f"replica_{index}")
+        instrument_pool(replica.async_engine.sync_engine, f"replica_{index}_async")
+
 @app.on_event("startup")
 async def startup_event():
     print("Starting application...")
@@ -146,158 +214,61 @@ async def startup_event():
         print(f"✗ CRITICAL CONFIGURATION ERROR: {e}")
         raise RuntimeError(f"Application startup failed due to configuration error: {e}")
     
-    print("Initializing database...")
+    print("Checking database readiness...")
     try:
-        from database import Base, engine, SessionLocal
-        from sqlalchemy import text, inspect
-        from sqlalchemy.exc import IntegrityError, ProgrammingError
-        
-        try:
-            Base.metadata.create_all(bind=engine)
-            print("✓ Database tables verified/created")
-        except (IntegrityError, ProgrammingError) as e:
-            if 'already exists' in str(e).lower() or 'duplicate key' in str(e).lower():
-                print("✓ Database tables already exist")
-            else:
-                raise
+        from bootstrap import check_ready, run_bootstrap
         
-        inspector = inspect(engine)
-        existing_indexes = [idx['name'] for idx in inspector.get_indexes('categories')]
-        existing_constraints = [c['name'] for c in inspector.get_unique_constraints('categories')]
-        
-        if 'uq_category_name_en' not in existing_constraints and 'uq_category_name_en' not in existing_indexes:
-            print("Adding unique index to categories table...")
-            try:
-                with engine.connect() as conn:
-                    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS uq_category_name_en ON categories (name_en)'))
-                    conn.commit()
-                print("✓ Unique index added")
-            except Exception as e:
-                if 'already exists' in str(e).lower() or 'duplicate' in str(e).lower():
-                    print("✓ Unique index already exists")
-                else:
-                    db_error = f"Failed to create unique index: {e}"
-                    print(f"✗ CRITICAL: {db_error}")
-                    raise RuntimeError(db_error)
+        ready, reason = check_ready()
+        if ready:
+            print(f"✓ Database ready ({reason})")
+        elif settings.BOOTSTRAP_ON_STARTUP:
+            # Opt-in for setups without the bootstrap step; the advisory lock
+            # makes concurrent workers take turns instead of racing
+            print(f"⚠ Database not bootstrapped ({reason}); bootstrapping from this worker")
+            run_bootstrap(migrate=True)
+            ready, reason = check_ready()
+            if not ready:
+                raise RuntimeError(f"Bootstrap did not bring the schema to the migration head: {reason}")
+            print(f"✓ Database ready ({reason})")
         else:
-            print("✓ Unique constraint/index exists")
-        
-        db = SessionLocal()
-        try:
-            table_count = db.query(User).count()
-            print(f"✓ Database connection verified ({table_count} users)")
-        except Exception as e:
-            db.close()
-            raise RuntimeError(f"Database tables not accessible: {e}")
-        
-        try:
-            from sqlalchemy.exc import IntegrityError
-            if db.query(Category).count() == 0:
-                print("Adding default categories...")
-                categories = [
-                    # المواصفات والمقاييس
-                    Category(name_ar="سحب عينات متكررة لنفس المنتج", name_en="repeated_sampling_same_product", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="عدم قبولهم الفحوصات السابقة", name_en="rejection_previous_tests", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="مبالغة في الاجراءات الشكلية والمعاينة الظاهرية", name_en="excessive_formal_procedures", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="رفض شهادات المطابقة ونتائج الاختبار", name_en="rejection_conformity_certificates", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="رفض تقارير اختبار العينات", name_en="rejection_sample_test_reports", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="التحريز الشامل لجميع محتويات الشاحنة", name_en="comprehensive_seizure_shipment", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="تأخير الإفراج - الفحص لمدة طويلة", name_en="delayed_release_long_inspection", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="ارتفاع أجور الفحص", name_en="high_inspection_fees", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="الإجراءات على منتج سليم بسبب منتج مخالف", name_en="procedures_sound_product_due_defective", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="تأخير الافراج", name_en="delayed_release", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="التأخير في نتائج الفحص الظاهر", name_en="delay_visual_inspection_results", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="تكرار الفحوصات لمنتجات سابقة", name_en="repeated_tests_previous_products", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="غرامات غير قانونية", name_en="illegal_fines", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="ابتزاز", name_en="extortion", government_entity="المواصفات والمقاييس"),
-                    Category(name_ar="إلزام المصنعين بمواصفات اختيارية", name_en="mandatory_optional_specifications", government_entity="المواصفات والمقاييس"),
-                    
-                    # الجمارك
-                    Category(name_ar="اهمال البضائع عند المطابقة", name_en="goods_neglect_during_matching", government_entity="الجمارك"),
-                    Category(name_ar="غرامات غير قانونية", name_en="illegal_fines_customs", government_entity="الجمارك"),
-                    Category(name_ar="معاملة المواد الخام كمنتج نهائي للاستهلاك", name_en="raw_materials_as_final_product", government_entity="الجمارك"),
-                    Category(name_ar="ازدواجية المطالبة بالضمان", name_en="duplicate_guarantee_demand", government_entity="الجمارك"),
-                    Category(name_ar="مخالفة اتفاق", name_en="agreement_violation", government_entity="الجمارك"),
-                    Category(name_ar="عدم البت في الاتلاف", name_en="no_decision_destruction", government_entity="الجمارك"),
-                    Category(name_ar="تفاوت أوقات المعاينة بين الجهات المعنية", name_en="varying_inspection_times", government_entity="الجمارك"),
-                    Category(name_ar="تأخر الافراج لعدم الوزن", name_en="release_delay_no_weighing", government_entity="الجمارك"),
-                    Category(name_ar="الافتقار لنظام واضح لقيمة البضائع", name_en="lack_clear_valuation_system", government_entity="الجمارك"),
-                    Category(name_ar="عدم حماية العلامة التجارية", name_en="no_trademark_protection", government_entity="الجمارك"),
-                    Category(name_ar="رفض اقرارات الشراء", name_en="purchase_declaration_rejection", government_entity="الجمارك"),
-                    Category(name_ar="كسر الاعفاء المقدم", name_en="exemption_breach", government_entity="الجمارك"),
-                    Category(name_ar="مخالفة للتعميمات", name_en="circulars_violation", government_entity="الجمارك"),
-                    Category(name_ar="زيادة في القيمة الجمركية", name_en="customs_value_increase", government_entity="الجمارك"),
-                    Category(name_ar="احتجاز بضائع خارجة من صنعاء", name_en="goods_detention_from_sanaa", government_entity="الجمارك"),
-                    Category(name_ar="استيفاء وثائق الهيئة العامة للاستثمار", name_en="investment_authority_documents", government_entity="الجمارك"),
-                    Category(name_ar="تأخير السلع منها سلع سريعة التلف", name_en="perishable_goods_delay", government_entity="الجمارك"),
-                    Category(name_ar="اختلال في التقييم للسعر", name_en="price_valuation_disruption", government_entity="الجمارك"),
-                    Category(name_ar="عدم إعادة الرسوم", name_en="no_fees_refund", government_entity="الجمارك"),
-                    Category(name_ar="إعادة الجمركة", name_en="re_customs", government_entity="الجمارك"),
-                    Category(name_ar="احتجار المرتجع", name_en="returned_goods_monopoly", government_entity="الجمارك"),
-                    Category(name_ar="فترة التخصيم", name_en="clearance_period", government_entity="الجمارك"),
-                    Category(name_ar="الية القيمة والثمن", name_en="value_price_mechanism", government_entity="الجمارك"),
-                    
-                    # الضرائب
-                    Category(name_ar="طلب اقرارات سابقة", name_en="previous_declarations_request", government_entity="الضرائب"),
-                    Category(name_ar="تأخير استلام الاقرارات الضريبية", name_en="tax_declarations_receipt_delay", government_entity="الضرائب"),
-                    Category(name_ar="سداد الضريبة نقداً وشيكات", name_en="tax_payment_cash_checks", government_entity="الضرائب"),
-                    Category(name_ar="رفع ضريبة الأرباح", name_en="profit_tax_increase", government_entity="الضرائب"),
-                    Category(name_ar="طلب اصل البيان الجمركي", name_en="original_customs_statement_request", government_entity="الضرائب"),
-                    Category(name_ar="طلب التجار من مباحث الأموال العامة", name_en="traders_request_public_funds_investigation", government_entity="الضرائب"),
-                    Category(name_ar="مبالغ تحت الحساب", name_en="amounts_on_account", government_entity="الضرائب"),
-                    Category(name_ar="عدم اتخاذ الإجراءات القانونية", name_en="no_legal_action", government_entity="الضرائب"),
-                    Category(name_ar="زيادة الإجراءات في المعاملات", name_en="increased_transaction_procedures", government_entity="الضرائب"),
-                    
-                    # صندوق النظافة والتحسين
-                    Category(name_ar="التحصيل بين المديريات في إطار المحافظة الواحدة", name_en="collection_between_directorates", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="رسوم الدعاية والاعلان وازدواجية تحصيل الرسوم بلوائح مختلفة", name_en="advertising_fees_duplicate_collection", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="ارتفاع الرسوم", name_en="high_fees", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="ازدواجية التحصيل", name_en="duplicate_collection", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="تحصيل رسوم بدون سندات", name_en="fees_collection_without_receipts", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="أسلوب الإكراه في الوسائل الإعلانية", name_en="coercion_advertising_methods", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="ضعف تنسيق الصندوق مع الامن", name_en="weak_coordination_security", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="التنصل عن تنفيذ الاتفاقات", name_en="agreements_execution_evasion", government_entity="صندوق النظافة والتحسين"),
-                    Category(name_ar="المزاجية في المعاملات الإدارية", name_en="arbitrary_administrative_transactions", government_entity="صندوق النظافة والتحسين"),
-                ]
-                for category in categories:
-                    try:
-                        db.add(category)
-                        db.flush()
-                    except IntegrityError:
-                        db.rollback()
-                db.commit()
-                print("✓ Default categories added")
-            else:
-                print("✓ Categories already exist")
-        except Exception as e:
-            print(f"Warning: Could not initialize default categories: {e}")
-            db.rollback()
-        finally:
-            db.close()
-            
+            raise RuntimeError(f"{reason}. Run `python bootstrap.py` before starting the app")
     except Exception as e:
         print(f"✗ CRITICAL: Database initialization failed: {e}")
         print("⚠ Application cannot start without a working database")
         raise
     
-    print("Adding performance indexes...")
+    start_scheduler()
+    audit_log_writer.start()
+    export_job_service.start()
+    if replica_router.enabled:
+        replica_router.start()
+        print(f"✓ Read replica routing enabled ({len(replica_router.replicas)} replicas)")
+    
     try:
-        from add_performance_indexes import add_performance_indexes
-        add_performance_indexes()
+        await pdf_render_service.start()
+        print("✓ PDF render pool ready")
     except Exception as e:
-        print(f"⚠ Warning: Could not add performance indexes: {e}")
+        print(f"⚠ Warning: Could not start PDF render pool: {e}")
     
-    start_scheduler()
     print("✓ Application started successfully!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down application...")
     stop_scheduler()
+    await audit_log_writer.stop()
+    export_job_service.stop()
+    await replica_router.stop()
+    pdf_render_service.stop()
+    password_service.stop()
+    image_service.stop()
+    await limiter.stop()
     print("Application shut down successfully!")
 
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Uploads are only served through the authorized endpoints (file_downloads.py).
+# Profile pictures stored before the blob store still have public /uploads URLs.
+os.makedirs("uploads/profile_pictures", exist_ok=True)
+app.mount("/uploads/profile_pictures", StaticFiles(directory="uploads/profile_pictures"), name="profile_pictures")
 
 @app.get("/health")
 @app.get("/api/health")
@@ -310,12 +281,18 @@ def health_check(db: Session = Depends(get_db)):
         # Check database connectivity with a simple query
         db.execute(text("SELECT 1"))
         
-        return {
+        health = {
             "status": "healthy",
             "timestamp": datetime.utcnow().isoformat(),
             "database": "connected",
             "version": "1.0.0"
         }
+        if replica_router.enabled:
+            health["replicas"] = {
+                "available": len(replica_router.available()),
+                "configured": len(replica_router.replicas)
+            }
+        return health
     except Exception as e:
         return JSONResponse(
             status_code=503,
@@ -328,6 +305,13 @@ def health_check(db: Session = Depends(get_db)):
             }
         )
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint, aggregated over all gunicorn workers. Keep it off the public proxy."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics_response()
+
 @app.get("/api/setup/status")
 def get_setup_status(db: Session = Depends(get_db)):
     try:
@@ -384,8 +368,8 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         detail="Public registration is disabled. Please contact the administrator to create an account."
     )
 
-@app.post("/api/auth/register-merchant", response_model=dict)
-@limiter.limit(LOGIN_RATE_LIMIT)
+@app.post("/api/auth/register-merchant", response_model=dict,
+          dependencies=[Depends(limiter.limit(LOGIN_RATE_LIMIT, key="ip"))])
 def register_merchant(
     request: Request,
     merchant_data: MerchantRegisterRequest,
@@ -419,8 +403,7 @@ def register_merchant(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    db.flush()
     
     create_audit_log(db, new_user.id, "MERCHANT_REGISTRATION", "user", new_user.id, 
                      f"Merchant registered with 20-day trial: {new_user.email}")
@@ -510,7 +493,7 @@ def get_merchant_requests(
         query = query.filter(User.account_status == AccountStatus.PENDING)
     
     requests = query.order_by(User.created_at.desc()).all()
-    return [UserResponse.model_validate(req) for req in requests]
+    return model_list_response(UserResponse, requests)
 
 @app.put("/api/admin/merchant-requests/{user_id}", response_model=UserResponse)
 async def approve_reject_merchant(
@@ -558,11 +541,9 @@ async def approve_reject_merchant(
         action = "MERCHANT_REJECTED"
         message = f"Merchant account rejected for {merchant.email}: {approval_data.rejection_reason}"
     
-    db.commit()
-    db.refresh(merchant)
-    
     create_audit_log(db, current_user.id, action, "user", merchant.id, message)
     db.commit()
+    db.refresh(merchant)
     
     if approval_data.approved:
         await notification_service.create_in_app_notification(
@@ -589,11 +570,10 @@ async def approve_reject_merchant(
     
     return UserResponse.model_validate(merchant)
 
-@app.post("/api/auth/login", response_model=Token)
-@limiter.limit(LOGIN_RATE_LIMIT)
-def login(request: Request, credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+@app.post("/api/auth/login", response_model=Token, dependencies=[Depends(limiter.limit(LOGIN_RATE_LIMIT, key="ip"))])
+async def login(request: Request, credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == credentials.email))).scalar_one_or_none()
+    if not user or not await password_service.verify(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -620,6 +600,13 @@ def login(request: Request, credentials: UserLogin, db: Session = Depends(get_db
             detail="Your account has been deactivated. Please contact the administrator."
         )
     
+    # The plaintext is only available here, so hashes made with an older
+    # BCRYPT_ROUNDS are upgraded on the next successful login
+    if password_service.needs_rehash(user.hashed_password):
+        user.hashed_password = await password_service.hash(credentials.password)
+        await db.commit()
+        PASSWORD_REHASHES.inc()
+    
     access_token = create_access_token(data={"sub": str(user.id)})
     user_response = UserResponse.model_validate(user)
     
@@ -646,69 +633,89 @@ def update_own_profile(
     
     return UserResponse.model_validate(current_user)
 
-@app.post("/api/users/profile-picture")
-@limiter.limit(UPLOAD_RATE_LIMIT)
+@app.post("/api/users/profile-picture", dependencies=[Depends(limiter.limit(UPLOAD_RATE_LIMIT))])
 async def upload_profile_picture(
     request: Request,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    validate_upload_file(file, allowed_types=['image/jpeg', 'image/jpg', 'image/png', 'image/webp'], max_size_mb=5)
-    
-    upload_dir = "uploads/profile_pictures"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    if current_user.profile_picture and os.path.exists(current_user.profile_picture):
-        try:
-            os.remove(current_user.profile_picture)
-        except:
-            pass
-    
-    file_extension = os.path.splitext(file.filename)[1]
-    filename = f"user_{current_user.id}_{datetime.utcnow().timestamp()}{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    stored = await blob_store.save_upload(
+        db, file, max_bytes=5 * MB, allowed_extensions=IMAGE_EXTENSIONS, variants=AVATAR_VARIANTS
+    )
     
-    current_user.profile_picture = f"/{file_path}"
+    # The previous picture's blob is collected by the blob GC once nothing uses it
+    current_user.profile_picture_sha256 = stored.sha256
+    current_user.profile_picture = f"/api/users/{current_user.id}/profile-picture?v={stored.sha256[:16]}"
     current_user.updated_at = datetime.utcnow()
     db.commit()
     
-    return {"profile_picture": current_user.profile_picture, "message": "Profile picture uploaded successfully"}
+    return {
+        "profile_picture": current_user.profile_picture,
+        "profile_picture_urls": avatar_urls(current_user.id, stored.sha256),
+        "message": "Profile picture uploaded successfully"
+    }
+
+@app.get("/api/users/{user_id}/profile-picture")
+async def get_profile_picture(
+    request: Request,
+    user_id: int,
+    size: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    row = (await db.execute(
+        select(Blob.sha256, Blob.mime_type).join(User, User.profile_picture_sha256 == Blob.sha256).where(User.id == user_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Profile picture not found")
+    target = DownloadTarget("profile-picture", user_id, None, row.sha256, f"profile-{user_id}", row.mime_type, "")
+    # Always a resized copy: it has no EXIF, and this endpoint is public, so never the original
+    try:
+        target = await image_service.resolve(target, AVATAR_VARIANTS, size, fallback=False)
+    except ImageServiceBusy:
+        raise HTTPException(
+            status_code=503, detail="Profile picture is being prepared, please retry shortly",
+            headers={"Retry-After": "5", "Cache-Control": "no-store"}
+        )
+    except ImageUnavailable:
+        raise HTTPException(status_code=404, detail="Profile picture not found")
+    # The URL carries the content hash, so a given URL never changes
+    return await file_response(
+        request, target, cache_control="public, max-age=31536000, immutable", disposition="inline"
+    )
 
 @app.post("/api/users/change-password")
-def change_own_password(
+async def change_own_password(
     password_data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await password_service.verify(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    validate_new_password(password_data.new_password)
+    current_user.hashed_password = await password_service.hash(password_data.new_password)
     current_user.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return {"message": "Password changed successfully"}
 
 @app.post("/api/users/update-email")
-def update_user_email(
+async def update_user_email(
     email_data: EmailUpdateRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not verify_password(email_data.current_password, current_user.hashed_password):
+    if not await password_service.verify(email_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    existing_user = db.query(User).filter(User.email == email_data.new_email).first()
+    existing_user = (await db.execute(select(User.id).where(User.email == email_data.new_email))).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -718,7 +725,7 @@ def update_user_email(
     old_email = current_user.email
     current_user.email = email_data.new_email
     current_user.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     create_audit_log(
         db,
@@ -822,16 +829,18 @@ def check_complaint_duplicate(
     )
     return result
 
-@app.post("/api/complaints", response_model=ComplaintResponse)
-@limiter.limit(COMPLAINT_RATE_LIMIT)
+@app.post("/api/complaints", response_model=ComplaintResponse,
+          dependencies=[Depends(limiter.limit(COMPLAINT_RATE_LIMIT))])
 async def create_complaint(
     request: Request,
     complaint_data: ComplaintCreate,
-    current_user: User = Depends(require_role(UserRole.TRADER)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.TRADER)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     from subscription_middleware import require_active_subscription
-    require_active_subscription(current_user, db)
+    # Sync helpers run through run_sync: same session and connection, and the
+    # queries still await asyncpg rather than blocking the loop
+    await db.run_sync(lambda session: require_active_subscription(current_user, session))
     
     new_complaint = Complaint(
         user_id=current_user.id,
@@ -839,15 +848,15 @@ async def create_complaint(
     )
     
     db.add(new_complaint)
-    db.commit()
-    db.refresh(new_complaint)
-    
-    auto_assign_complaint(db, new_complaint)
-    db.refresh(new_complaint)
+    await db.flush()
     
     create_audit_log(db, current_user.id, "CREATE_COMPLAINT", "complaint", new_complaint.id,
                      f"Created complaint #{new_complaint.id}")
-    db.commit()
+    await db.commit()
+    await db.refresh(new_complaint)
+    
+    await db.run_sync(auto_assign_complaint, new_complaint)
+    await db.refresh(new_complaint)
     
     if new_complaint.assigned_to_id:
         await notification_service.create_in_app_notification(
@@ -862,7 +871,8 @@ async def create_complaint(
             action_url=f"/complaints/{new_complaint.id}"
         )
     
-    return ComplaintResponse.model_validate(new_complaint)
+    # Relationships in the response are lazy-loaded, which needs run_sync under asyncio
+    return await db.run_sync(lambda session: ComplaintResponse.model_validate(new_complaint))
 
 @app.get("/api/complaints", response_model=ComplaintsListResponse)
 def get_complaints(
@@ -875,30 +885,25 @@ def get_complaints(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    from sqlalchemy.orm import selectinload
-    query = db.query(Complaint).options(
-        selectinload(Complaint.user),
-        selectinload(Complaint.category),
-        selectinload(Complaint.assigned_to_user)
-    )
-    
+    # List columns only, as Core rows serialized straight to JSON (complaint_list.py)
+    criteria = []
     if current_user.role == UserRole.TRADER:
-        query = query.filter(Complaint.user_id == current_user.id)
+        criteria.append(Complaint.user_id == current_user.id)
     elif current_user.role == UserRole.TECHNICAL_COMMITTEE:
-        query = query.filter(
+        criteria.append(
             (Complaint.status == ComplaintStatus.SUBMITTED) |
             (Complaint.status == ComplaintStatus.UNDER_REVIEW) |
             (Complaint.assigned_to_id == current_user.id)
         )
     
     if status:
-        query = query.filter(Complaint.status == status)
+        criteria.append(Complaint.status == status)
     if category_id:
-        query = query.filter(Complaint.category_id == category_id)
+        criteria.append(Complaint.category_id == category_id)
     if priority:
-        query = query.filter(Complaint.priority == priority)
+        criteria.append(Complaint.priority == priority)
     if search:
-        query = query.filter(
+        criteria.append(
             or_(
                 Complaint.title.ilike(f"%{search}%"),
                 Complaint.description.ilike(f"%{search}%"),
@@ -906,16 +911,7 @@ def get_complaints(
             )
         )
     
-    total = query.count()
-    offset = (page - 1) * page_size
-    complaints = query.order_by(Complaint.created_at.desc()).offset(offset).limit(page_size).all()
-    
-    return ComplaintsListResponse(
-        complaints=complaints,
-        total=total,
-        page=page,
-        page_size=page_size
-    )
+    return list_response(db, criteria, page, page_size)
 
 @app.get("/api/complaints/{complaint_id}", response_model=ComplaintResponse)
 def get_complaint(
@@ -964,12 +960,11 @@ def update_complaint(
             complaint.status = ComplaintStatus.UNDER_REVIEW
     
     complaint.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(complaint)
     
     create_audit_log(db, current_user.id, "UPDATE_COMPLAINT", "complaint", complaint.id, 
                      f"Updated complaint status to {complaint.status}")
     db.commit()
+    db.refresh(complaint)
     
     return ComplaintResponse.model_validate(complaint)
 
@@ -1113,138 +1108,65 @@ async def reopen_complaint(
     return ComplaintResponse.model_validate(complaint)
 
 @app.post("/api/complaints/bulk-assign", response_model=BulkActionResponse)
-def bulk_assign_complaints(
+async def bulk_assign_complaints(
     request_data: BulkAssignRequest,
-    current_user: User = Depends(require_role(UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Bulk assign multiple complaints to a user"""
-    successful_ids = []
-    failed_ids = []
-    errors = []
+    from bulk_operations import bulk_operation_service
     
     # Verify the assigned_to user exists and has appropriate role
-    assigned_to_user = db.query(User).filter(User.id == request_data.assigned_to_id).first()
+    assigned_to_user = await db.get(User, request_data.assigned_to_id)
     if not assigned_to_user:
         raise HTTPException(status_code=404, detail="Assigned user not found")
     
     if assigned_to_user.role not in [UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE]:
         raise HTTPException(status_code=400, detail="Can only assign to technical or higher committee members")
     
-    # Process each complaint
-    for complaint_id in request_data.complaint_ids:
-        try:
-            complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
-            if not complaint:
-                failed_ids.append(complaint_id)
-                errors.append(f"Complaint #{complaint_id} not found")
-                continue
-            
-            old_assigned_to_id = complaint.assigned_to_id
-            complaint.assigned_to_id = request_data.assigned_to_id
-            
-            # Update status if currently submitted
-            if complaint.status == ComplaintStatus.SUBMITTED:
-                complaint.status = ComplaintStatus.UNDER_REVIEW
-            
-            complaint.updated_at = datetime.utcnow()
-            
-            # Create audit log entry
-            create_audit_log(
-                db,
-                current_user.id,
-                "BULK_ASSIGN_COMPLAINT",
-                "complaint",
-                complaint.id,
-                f"Bulk assigned complaint #{complaint.id} from user {old_assigned_to_id} to user {request_data.assigned_to_id}"
-            )
-            
-            successful_ids.append(complaint_id)
-            
-        except Exception as e:
-            failed_ids.append(complaint_id)
-            errors.append(f"Error processing complaint #{complaint_id}: {str(e)}")
-            db.rollback()
-    
-    # Commit all successful changes
+    actor_id = current_user.id
     try:
-        db.commit()
+        # The set-based service is sync; run_sync awaits its queries on the async driver
+        result = await db.run_sync(
+            bulk_operation_service.assign, actor_id, request_data.complaint_ids, request_data.assigned_to_id
+        )
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to commit changes: {str(e)}")
     
-    return BulkActionResponse(
-        success_count=len(successful_ids),
-        failed_count=len(failed_ids),
-        total=len(request_data.complaint_ids),
-        successful_ids=successful_ids,
-        failed_ids=failed_ids,
-        errors=errors
-    )
+    try:
+        await notification_service.create_in_app_notifications(db, result.notifications)
+    except Exception as e:
+        print(f"⚠ Failed to send bulk assignment notifications: {e}")
+    
+    return BulkActionResponse(**result.to_response())
 
 @app.post("/api/complaints/bulk-status", response_model=BulkActionResponse)
-def bulk_update_complaint_status(
+async def bulk_update_complaint_status(
     request_data: BulkStatusRequest,
-    current_user: User = Depends(require_role(UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Bulk update status of multiple complaints"""
-    successful_ids = []
-    failed_ids = []
-    errors = []
-    
-    # Process each complaint
-    for complaint_id in request_data.complaint_ids:
-        try:
-            complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
-            if not complaint:
-                failed_ids.append(complaint_id)
-                errors.append(f"Complaint #{complaint_id} not found")
-                continue
-            
-            old_status = complaint.status
-            complaint.status = request_data.status
-            
-            # Handle status-specific logic
-            if request_data.status in [ComplaintStatus.RESOLVED, ComplaintStatus.REJECTED]:
-                complaint.resolved_at = datetime.utcnow()
-                from dateutil.relativedelta import relativedelta
-                complaint.can_reopen_until = datetime.utcnow() + relativedelta(days=7)
-            
-            complaint.updated_at = datetime.utcnow()
-            
-            # Create audit log entry
-            create_audit_log(
-                db,
-                current_user.id,
-                "BULK_UPDATE_STATUS",
-                "complaint",
-                complaint.id,
-                f"Bulk updated complaint #{complaint.id} status from {old_status.value} to {request_data.status.value}"
-            )
-            
-            successful_ids.append(complaint_id)
-            
-        except Exception as e:
-            failed_ids.append(complaint_id)
-            errors.append(f"Error processing complaint #{complaint_id}: {str(e)}")
-            db.rollback()
+    from bulk_operations import bulk_operation_service
     
-    # Commit all successful changes
+    actor_id = current_user.id
     try:
-        db.commit()
+        result = await db.run_sync(
+            bulk_operation_service.update_status, actor_id, request_data.complaint_ids, request_data.status
+        )
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to commit changes: {str(e)}")
     
-    return BulkActionResponse(
-        success_count=len(successful_ids),
-        failed_count=len(failed_ids),
-        total=len(request_data.complaint_ids),
-        successful_ids=successful_ids,
-        failed_ids=failed_ids,
-        errors=errors
-    )
+    try:
+        await notification_service.create_in_app_notifications(db, result.notifications)
+    except Exception as e:
+        print(f"⚠ Failed to send bulk status notifications: {e}")
+    
+    return BulkActionResponse(**result.to_response())
 
 @app.post("/api/complaints/{complaint_id}/comments", response_model=CommentResponse)
 def create_comment(
@@ -1346,10 +1268,17 @@ def get_comments(
         query = query.filter(Comment.is_internal == 0)
     
     comments = query.order_by(Comment.created_at.asc()).all()
-    return comments
+    return model_list_response(CommentResponse, comments)
 
-@app.post("/api/complaints/{complaint_id}/attachments", response_model=AttachmentResponse)
-@limiter.limit(UPLOAD_RATE_LIMIT)
+def attachment_response(attachment: Attachment, user_id: int) -> AttachmentResponse:
+    response = AttachmentResponse.model_validate(attachment)
+    if attachment.blob_sha256 and (attachment.file_type or "").startswith("image/"):
+        url, _ = sign_url("attachment", attachment.id, user_id)
+        response.preview_url = f"{url}&preview={PREVIEW_SIZES[0]}"
+    return response
+
+@app.post("/api/complaints/{complaint_id}/attachments", response_model=AttachmentResponse,
+          dependencies=[Depends(limiter.limit(UPLOAD_RATE_LIMIT))])
 async def upload_attachment(
     request: Request,
     complaint_id: int,
@@ -1364,23 +1293,15 @@ async def upload_attachment(
     if current_user.role == UserRole.TRADER and complaint.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    await validate_upload_file(file)
-    
-    file_extension = os.path.splitext(file.filename)[1]
-    filename = f"{complaint_id}_{datetime.utcnow().timestamp()}{file_extension}"
-    filepath = os.path.join("uploads", filename)
-    
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    file_size = os.path.getsize(filepath)
+    stored = await blob_store.save_upload(db, file, variants=PREVIEW_VARIANTS)
     
     new_attachment = Attachment(
         complaint_id=complaint_id,
         filename=file.filename,
-        filepath=filepath,
-        file_type=file.content_type,
-        file_size=file_size
+        filepath=stored.path,
+        blob_sha256=stored.sha256,
+        file_type=stored.mime_type,
+        file_size=stored.size
     )
     
     db.add(new_attachment)
@@ -1397,12 +1318,13 @@ async def upload_attachment(
         metadata={
             "complaint_id": complaint_id,
             "filename": file.filename,
-            "file_type": file.content_type,
-            "file_size": file_size
+            "file_type": stored.mime_type,
+            "file_size": stored.size,
+            "sha256": stored.sha256
         }
     )
     
-    return AttachmentResponse.model_validate(new_attachment)
+    return attachment_response(new_attachment, current_user.id)
 
 @app.get("/api/complaints/{complaint_id}/attachments", response_model=List[AttachmentResponse])
 def get_attachments(
@@ -1418,44 +1340,54 @@ def get_attachments(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     attachments = db.query(Attachment).filter(Attachment.complaint_id == complaint_id).all()
-    return attachments
+    return [attachment_response(attachment, current_user.id) for attachment in attachments]
 
 @app.get("/api/attachments/{attachment_id}/download")
 async def download_attachment(
+    request: Request,
     attachment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    from fastapi.responses import FileResponse
-    
-    attachment = db.query(Attachment).filter(Attachment.id == attachment_id).first()
-    if not attachment:
-        raise HTTPException(status_code=404, detail="Attachment not found")
-    
-    complaint = db.query(Complaint).filter(Complaint.id == attachment.complaint_id).first()
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    
-    if current_user.role == UserRole.TRADER and complaint.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to download this attachment")
-    
-    if not os.path.exists(attachment.filepath):
-        raise HTTPException(status_code=404, detail="File not found on server")
-    
-    create_audit_log(
-        db,
-        current_user.id,
-        "DOWNLOAD_ATTACHMENT",
-        "attachment",
-        attachment.id,
-        f"Downloaded file '{attachment.filename}' from complaint #{complaint.id}"
-    )
-    
-    return FileResponse(
-        path=attachment.filepath,
-        filename=attachment.filename,
-        media_type=attachment.file_type or "application/octet-stream"
-    )
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Access is checked in the same query that finds the file; no separate user lookup
+    user_id = user_id_from_token(credentials)
+    target = await load_target(db, "attachment", attachment_id, user_id)
+    await audit_download(user_id, target)
+    return await file_response(request, target)
+
+@app.post("/api/files/{kind}/{object_id}/url")
+async def create_download_url(
+    kind: str,
+    object_id: int,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Short-lived link to an attachment, payment proof or business license, usable without a token."""
+    user_id = user_id_from_token(credentials)
+    await load_target(db, kind, object_id, user_id)
+    url, expires_at = sign_url(kind, object_id, user_id)
+    return {"url": url, "expires_at": expires_at}
+
+@app.get("/api/files/{kind}/{object_id}")
+async def download_signed_file(
+    request: Request,
+    kind: str,
+    object_id: int,
+    user: int,
+    expires: int,
+    signature: str,
+    inline: bool = False,
+    preview: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    verify_signature(kind, object_id, user, expires, signature)
+    target = await load_target(db, kind, object_id, None)
+    if preview:
+        # A resized copy for display; viewing a thumbnail is not a download worth auditing
+        target = await image_service.resolve(target, PREVIEW_VARIANTS, preview)
+        return await file_response(request, target, disposition="inline")
+    await audit_download(user, target)
+    return await file_response(request, target, disposition="inline" if inline else "attachment")
 
 
 @app.post("/api/complaints/{complaint_id}/accept-task", response_model=ComplaintResponse)
@@ -1588,10 +1520,14 @@ async def create_approval_request(
 async def update_approval(
     approval_id: int,
     approval_update: ComplaintApprovalUpdate,
-    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.HIGHER_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    approval = db.query(ComplaintApproval).filter(ComplaintApproval.id == approval_id).first()
+    from sqlalchemy.orm import selectinload
+    
+    approval = (await db.execute(
+        select(ComplaintApproval).options(selectinload(ComplaintApproval.approver)).where(ComplaintApproval.id == approval_id)
+    )).scalar_one_or_none()
     
     if not approval:
         raise HTTPException(status_code=404, detail="Approval not found")
@@ -1603,10 +1539,11 @@ async def update_approval(
     approval.approval_notes = approval_update.approval_notes or approval.approval_notes
     approval.approved_at = datetime.utcnow()
     
-    complaint = db.query(Complaint).filter(Complaint.id == approval.complaint_id).first()
-    assigned_user = db.query(User).filter(User.id == complaint.assigned_to_id).first()
-    complainant = db.query(User).filter(User.id == complaint.user_id).first()
+    complaint = await db.get(Complaint, approval.complaint_id)
+    assigned_user = await db.get(User, complaint.assigned_to_id) if complaint.assigned_to_id else None
+    complainant = await db.get(User, complaint.user_id)
     approver_name = f"{current_user.first_name} {current_user.last_name}"
+    old_status = complaint.status
     
     if approval_update.approval_status == ApprovalStatus.APPROVED:
         complaint.status = ComplaintStatus.RESOLVED
@@ -1634,10 +1571,10 @@ async def update_approval(
             f"Rejected approval for complaint #{complaint.id}"
         )
     
-    db.commit()
-    db.refresh(approval)
+    await db.commit()
     
     decision = "approved" if approval_update.approval_status == ApprovalStatus.APPROVED else "rejected"
+    dashboard_url = get_dashboard_url(f"complaints/{complaint.id}")
     
     if assigned_user:
         await notification_service.send_approval_decision_notification(
@@ -1645,10 +1582,12 @@ async def update_approval(
             assigned_user.id,
             assigned_user.email,
             assigned_user.phone,
-            complaint.id,
-            decision,
-            approver_name,
-            approval.approval_notes,
+            complaint_id=complaint.id,
+            complaint_title=complaint.title,
+            decision=decision,
+            approver_name=approver_name,
+            notes=approval.approval_notes,
+            dashboard_url=dashboard_url,
             language="ar"
         )
     
@@ -1658,12 +1597,16 @@ async def update_approval(
             complainant.id,
             complainant.email,
             complainant.phone,
-            complaint.id,
-            complaint.status.value,
+            complaint_id=complaint.id,
+            complaint_title=complaint.title,
+            old_status=old_status.value,
+            new_status=complaint.status.value,
+            updated_by=approver_name,
+            dashboard_url=dashboard_url,
             language="ar"
         )
     
-    return approval
+    return ComplaintApprovalResponse.model_validate(approval)
 
 
 @app.get("/api/approvals/complaint/{complaint_id}", response_model=List[ComplaintApprovalResponse])
@@ -1679,17 +1622,24 @@ async def get_complaint_approvals(
     return approvals
 
 
-@app.get("/api/approvals/pending", response_model=List[ComplaintApprovalResponse])
-async def get_pending_approvals(
+APPROVAL_SORTING = Sorting({"created_at": (ComplaintApproval.created_at,)}, "created_at", ComplaintApproval.id)
+
+@app.get("/api/approvals/pending", response_model=Page[ComplaintApprovalResponse])
+def get_pending_approvals(
+    params: PageParams = Depends(),
+    complaint_id: Optional[int] = None,
     current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
     db: Session = Depends(get_db)
 ):
-    approvals = db.query(ComplaintApproval).filter(
+    from sqlalchemy.orm import selectinload
+    query = db.query(ComplaintApproval).options(selectinload(ComplaintApproval.approver)).filter(
         ComplaintApproval.approver_id == current_user.id,
         ComplaintApproval.approval_status == ApprovalStatus.PENDING
-    ).all()
+    )
+    if complaint_id is not None:
+        query = query.filter(ComplaintApproval.complaint_id == complaint_id)
     
-    return approvals
+    return paginate(query, params, APPROVAL_SORTING, ComplaintApprovalResponse)
 
 
 @app.post("/api/complaints/{complaint_id}/manual-escalate", response_model=ComplaintResponse)
@@ -1923,10 +1873,17 @@ async def update_appeal(
 async def reassign_complaint(
     complaint_id: int,
     reassignment_data: ReassignmentRequest,
-    current_user: User = Depends(require_role(UserRole.TECHNICAL_COMMITTEE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.TECHNICAL_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    from sqlalchemy.orm import selectinload
+    
+    complaint = (await db.execute(
+        select(Complaint).options(
+            selectinload(Complaint.category),
+            selectinload(Complaint.user)
+        ).where(Complaint.id == complaint_id)
+    )).scalar_one_or_none()
     
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
@@ -1937,11 +1894,13 @@ async def reassign_complaint(
     from task_queue_service import task_queue_service
     
     if reassignment_data.target_user_id:
-        target_user = db.query(User).filter(
-            User.id == reassignment_data.target_user_id,
-            User.role == UserRole.TECHNICAL_COMMITTEE,
-            User.is_active == True
-        ).first()
+        target_user = (await db.execute(
+            select(User).where(
+                User.id == reassignment_data.target_user_id,
+                User.role == UserRole.TECHNICAL_COMMITTEE,
+                User.is_active == True
+            )
+        )).scalars().first()
         
         if not target_user:
             raise HTTPException(status_code=404, detail="Target user not found or not eligible")
@@ -1949,19 +1908,23 @@ async def reassign_complaint(
         complaint.assigned_to_id = target_user.id
         complaint.task_status = TaskStatus.ASSIGNED
         
-        queue_entry = db.query(TaskQueue).filter(
-            TaskQueue.complaint_id == complaint_id,
-            TaskQueue.assigned_role == UserRole.TECHNICAL_COMMITTEE
-        ).first()
+        queue_entry = (await db.execute(
+            select(TaskQueue).where(
+                TaskQueue.complaint_id == complaint_id,
+                TaskQueue.assigned_role == UserRole.TECHNICAL_COMMITTEE
+            )
+        )).scalars().first()
         
         if queue_entry:
             queue_entry.assigned_user_id = target_user.id
             queue_entry.assigned_at = datetime.utcnow()
     else:
-        new_assignee = task_queue_service.reassign_task(
-            complaint_id=complaint_id,
-            excluding_user_id=current_user.id,
-            db=db
+        new_assignee = await db.run_sync(
+            lambda session: task_queue_service.reassign_task(
+                complaint_id=complaint_id,
+                excluding_user_id=current_user.id,
+                db=session
+            )
         )
         
         if new_assignee:
@@ -1997,11 +1960,11 @@ async def reassign_complaint(
         f"Reassigned complaint #{complaint.id}. Reason: {reassignment_data.reason}"
     )
     
-    db.commit()
-    db.refresh(complaint)
+    await db.commit()
+    await db.refresh(complaint)
     
     if complaint.assigned_to_id:
-        assigned_user = db.query(User).filter(User.id == complaint.assigned_to_id).first()
+        assigned_user = await db.get(User, complaint.assigned_to_id)
         if assigned_user and assigned_user.id != current_user.id:
             assigner_name = f"{current_user.first_name} {current_user.last_name}"
             dashboard_url = get_dashboard_url(f"complaints/{complaint.id}")
@@ -2010,15 +1973,16 @@ async def reassign_complaint(
                 assigned_user.id,
                 assigned_user.email,
                 assigned_user.phone,
-                complaint.id,
-                complaint.title,
-                assigner_name,
-                dashboard_url,
+                complaint_id=complaint.id,
+                complaint_title=complaint.title,
+                complaint_category=complaint.category.name_ar if complaint.category else "",
+                priority=complaint.priority.value,
+                submitted_by=f"{complaint.user.first_name} {complaint.user.last_name}" if complaint.user else assigner_name,
+                dashboard_url=dashboard_url,
                 language="ar"
             )
     
-    return complaint
-
+    return await db.run_sync(lambda session: ComplaintResponse.model_validate(complaint))
 
 @app.post("/api/complaints/{complaint_id}/approvals/multi-review", response_model=ComplaintApprovalResponse)
 async def create_multi_review_approval(
@@ -2252,13 +2216,23 @@ async def update_mediation_request(
     return mediation_request
 
 
-@app.get("/api/mediation-requests", response_model=List[ComplaintMediationRequestResponse])
+MEDIATION_SORTING = Sorting(
+    {"created_at": (ComplaintMediationRequest.created_at,)}, "-created_at", ComplaintMediationRequest.id
+)
+
+@app.get("/api/mediation-requests", response_model=Page[ComplaintMediationRequestResponse])
 def get_mediation_requests(
+    params: PageParams = Depends(),
+    complaint_id: Optional[int] = None,
     current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
     db: Session = Depends(get_db),
     status_filter: Optional[str] = Query(None)
 ):
-    query = db.query(ComplaintMediationRequest)
+    from sqlalchemy.orm import selectinload
+    query = db.query(ComplaintMediationRequest).options(
+        selectinload(ComplaintMediationRequest.requested_by),
+        selectinload(ComplaintMediationRequest.mediator)
+    )
     
     if status_filter:
         try:
@@ -2266,16 +2240,16 @@ def get_mediation_requests(
             query = query.filter(ComplaintMediationRequest.status == status_enum)
         except ValueError:
             pass
+    if complaint_id is not None:
+        query = query.filter(ComplaintMediationRequest.complaint_id == complaint_id)
     
-    mediation_requests = query.order_by(ComplaintMediationRequest.created_at.desc()).all()
-    
-    return mediation_requests
+    return paginate(query, params, MEDIATION_SORTING, ComplaintMediationRequestResponse)
 
 
 @app.get("/api/dashboard/stats", response_model=DashboardStats)
 def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(Complaint)
     
@@ -2327,7 +2301,7 @@ def get_enhanced_analytics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     from datetime import datetime, timedelta
     
@@ -2422,19 +2396,49 @@ def get_enhanced_analytics(
         resolution_rate=resolution_rate
     )
 
-@app.get("/api/users/committee", response_model=List[UserResponse])
+USER_SORT_KEYS = {
+    "created_at": (User.created_at,),
+    "name": (User.last_name, User.first_name),
+}
+COMMITTEE_USER_SORTING = Sorting(USER_SORT_KEYS, "name", User.id)
+USER_SORTING = Sorting(USER_SORT_KEYS, "-created_at", User.id)
+
+def filter_users(query, search: Optional[str], is_active: Optional[bool]):
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if search:
+        search_filter = f"%{search}%"
+        query = query.filter(
+            (User.first_name.ilike(search_filter)) |
+            (User.last_name.ilike(search_filter)) |
+            (User.email.ilike(search_filter))
+        )
+    return query
+
+@app.get("/api/users/committee", response_model=Page[UserResponse])
 def get_committee_users(
+    params: PageParams = Depends(),
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
     current_user: User = Depends(require_role(UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE)),
     db: Session = Depends(get_db)
 ):
-    users = db.query(User).filter(
-        (User.role == UserRole.TECHNICAL_COMMITTEE) |
-        (User.role == UserRole.HIGHER_COMMITTEE)
-    ).all()
-    return users
+    if role == UserRole.TRADER:
+        raise HTTPException(status_code=400, detail="Only committee roles can be listed here")
+    if role:
+        query = db.query(User).filter(User.role == role)
+    else:
+        query = db.query(User).filter(
+            (User.role == UserRole.TECHNICAL_COMMITTEE) |
+            (User.role == UserRole.HIGHER_COMMITTEE)
+        )
+    query = filter_users(query, search, is_active)
+    return paginate(query, params, COMMITTEE_USER_SORTING, UserResponse)
 
-@app.get("/api/admin/users", response_model=List[UserResponse])
+@app.get("/api/admin/users", response_model=Page[UserResponse])
 def list_all_users(
+    params: PageParams = Depends(),
     role: Optional[UserRole] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None,
@@ -2445,18 +2449,9 @@ def list_all_users(
     
     if role:
         query = query.filter(User.role == role)
-    if is_active is not None:
-        query = query.filter(User.is_active == is_active)
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (User.first_name.ilike(search_filter)) |
-            (User.last_name.ilike(search_filter)) |
-            (User.email.ilike(search_filter))
-        )
+    query = filter_users(query, search, is_active)
     
-    users = query.order_by(User.created_at.desc()).all()
-    return users
+    return paginate(query, params, USER_SORTING, UserResponse)
 
 @app.post("/api/admin/users", response_model=UserResponse)
 def create_committee_user(
@@ -2486,12 +2481,12 @@ def create_committee_user(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    db.flush()
     
     create_audit_log(db, current_user.id, "CREATE_USER", "user", new_user.id, 
                      f"Created user {new_user.email} with role {new_user.role}")
     db.commit()
+    db.refresh(new_user)
     
     return UserResponse.model_validate(new_user)
 
@@ -2539,12 +2534,11 @@ def update_user(
         setattr(user, key, value)
     
     user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
     
     create_audit_log(db, current_user.id, "UPDATE_USER", "user", user.id, 
                      f"Updated user {user.email}")
     db.commit()
+    db.refresh(user)
     
     return UserResponse.model_validate(user)
 
@@ -2578,7 +2572,6 @@ def deactivate_user(
     
     user.is_active = False
     user.updated_at = datetime.utcnow()
-    db.commit()
     
     create_audit_log(db, current_user.id, "DEACTIVATE_USER", "user", user.id, 
                      f"Deactivated user {user.email}")
@@ -2587,13 +2580,13 @@ def deactivate_user(
     return {"message": "User deactivated successfully"}
 
 @app.post("/api/admin/users/{user_id}/reset-password")
-def reset_user_password(
+async def reset_user_password(
     user_id: int,
     password_data: PasswordReset,
-    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.HIGHER_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -2603,9 +2596,10 @@ def reset_user_password(
             detail="Password must be at least 6 characters long"
         )
     
-    user.hashed_password = get_password_hash(password_data.new_password)
+    validate_new_password(password_data.new_password)
+    user.hashed_password = await password_service.hash(password_data.new_password)
     user.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return {"message": "Password reset successfully"}
 
@@ -2774,17 +2768,24 @@ def get_my_subscription(
     
     return subscription
 
-@app.get("/api/subscriptions", response_model=List[SubscriptionResponse])
+SUBSCRIPTION_SORTING = Sorting(
+    {"created_at": (Subscription.created_at,), "end_date": (Subscription.end_date,)}, "-created_at", Subscription.id
+)
+
+@app.get("/api/subscriptions", response_model=Page[SubscriptionResponse])
 def get_all_subscriptions(
+    params: PageParams = Depends(),
     status: Optional[SubscriptionStatus] = None,
+    user_id: Optional[int] = None,
     current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
     db: Session = Depends(get_db)
 ):
     query = db.query(Subscription)
     if status:
         query = query.filter(Subscription.status == status)
-    subscriptions = query.order_by(Subscription.created_at.desc()).all()
-    return subscriptions
+    if user_id is not None:
+        query = query.filter(Subscription.user_id == user_id)
+    return paginate(query, params, SUBSCRIPTION_SORTING, SubscriptionResponse)
 
 @app.post("/api/payments", response_model=PaymentResponse)
 async def submit_payment(
@@ -2805,14 +2806,7 @@ async def submit_payment(
     if not payment_method:
         raise HTTPException(status_code=404, detail="Payment method not found or inactive")
     
-    validate_upload_file(file)
-    
-    file_extension = os.path.splitext(file.filename)[1]
-    filename = f"payment_{current_user.id}_{datetime.utcnow().timestamp()}{file_extension}"
-    filepath = os.path.join("uploads", filename)
-    
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    stored = await blob_store.save_upload(db, file)
     
     new_payment = Payment(
         user_id=current_user.id,
@@ -2821,7 +2815,8 @@ async def submit_payment(
         method=method,
         reference_number=reference_number,
         account_details=account_details,
-        proof_path=filepath,
+        proof_path=stored.path,
+        proof_sha256=stored.sha256,
         status=PaymentStatus.PENDING
     )
     
@@ -2836,21 +2831,28 @@ async def submit_payment(
     
     return PaymentResponse.model_validate(new_payment)
 
-@app.get("/api/payments", response_model=List[PaymentResponse])
+PAYMENT_SORTING = Sorting({"created_at": (Payment.created_at,)}, "-created_at", Payment.id)
+
+@app.get("/api/payments", response_model=Page[PaymentResponse])
 def get_payments(
+    params: PageParams = Depends(),
     status: Optional[PaymentStatus] = None,
+    user_id: Optional[int] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Payment)
+    from sqlalchemy.orm import selectinload
+    query = db.query(Payment).options(selectinload(Payment.user), selectinload(Payment.payment_method))
     
     if current_user.role == UserRole.TRADER:
         query = query.filter(Payment.user_id == current_user.id)
-    elif status:
-        query = query.filter(Payment.status == status)
+    else:
+        if status:
+            query = query.filter(Payment.status == status)
+        if user_id is not None:
+            query = query.filter(Payment.user_id == user_id)
     
-    payments = query.order_by(Payment.created_at.desc()).all()
-    return payments
+    return paginate(query, params, PAYMENT_SORTING, PaymentResponse)
 
 @app.patch("/api/payments/{payment_id}", response_model=PaymentResponse)
 async def update_payment(
@@ -2974,18 +2976,10 @@ async def upload_business_verification(
     current_user: User = Depends(require_role(UserRole.TRADER)),
     db: Session = Depends(get_db)
 ):
-    validate_upload_file(document)
-    
-    file_extension = os.path.splitext(document.filename)[1]
-    filename = f"business_license_{current_user.id}_{datetime.utcnow().timestamp()}{file_extension}"
-    filepath = os.path.join("uploads", filename)
-    
-    os.makedirs("uploads", exist_ok=True)
+    stored = await blob_store.save_upload(db, document)
     
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(document.file, buffer)
-    
-    current_user.business_license_path = filepath
+    current_user.business_license_path = stored.path
+    current_user.business_license_sha256 = stored.sha256
     current_user.business_verification_status = models.BusinessVerificationStatus.PENDING
     
     db.commit()
@@ -3003,7 +2997,7 @@ async def upload_business_verification(
     return {
         "message": "Business verification document uploaded successfully",
         "status": current_user.business_verification_status.value,
-        "file_path": filepath
+        "file_path": stored.path
     }
 
 @app.get("/api/users/subscription-status")
@@ -3294,22 +3288,54 @@ def get_audit_logs(
     user_id: Optional[int] = None,
     action: Optional[str] = None,
     target_type: Optional[str] = None,
-    limit: int = 100,
-    offset: int = 0,
+    target_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(AuditLog)
+    from sqlalchemy.orm import selectinload
+    query = db.query(AuditLog).options(selectinload(AuditLog.actor))
     
     if user_id:
         query = query.filter(AuditLog.actor_user_id == user_id)
     if action:
-        query = query.filter(AuditLog.action.ilike(f"%{action}%"))
+        actions = [a.strip().upper() for a in action.split(",") if a.strip()]
+        query = query.filter(AuditLog.action.in_(actions))
     if target_type:
-        query = query.filter(AuditLog.target_type == target_type)
-    
-    logs = query.order_by(AuditLog.created_at.desc()).limit(limit).offset(offset).all()
-    return logs
+        query = query.filter(AuditLog.target_type == target_type.lower())
+    if target_id is not None:
+        query = query.filter(AuditLog.target_id == target_id)
+    if start_date:
+        query = query.filter(AuditLog.created_at >= start_date)
+    if end_date:
+        query = query.filter(AuditLog.created_at <= end_date)
+    
+    logs = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit).offset(offset).all()
+    return model_list_response(AuditLogResponse, logs)
+
+@app.get("/api/admin/audit-logs/actions", response_model=List[str])
+def get_audit_log_actions(
+    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE)),
+    db: Session = Depends(get_read_db)
+):
+    return [name for (name,) in db.query(AuditAction.name).order_by(AuditAction.name).all()]
+
+@app.get("/api/admin/query-metrics")
+def get_query_metrics(
+    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE))
+):
+    """Per-route query counts and DB time for this worker since start (or the last reset)."""
+    return {"routes": query_metrics.snapshot()}
+
+@app.delete("/api/admin/query-metrics")
+def reset_query_metrics(
+    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE))
+):
+    query_metrics.reset()
+    return {"message": "Query metrics reset"}
 
 @app.post("/api/admin/automation/run-periodic-tasks")
 def trigger_periodic_tasks(
@@ -3436,179 +3462,254 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...), db:
         await websocket.close(code=1008)
 
 
+@app.post("/api/export/jobs", response_model=ExportJobResponse)
+def create_export_job(
+    job_data: ExportJobCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a background export. Identical pending/recent exports are reused."""
+    from export_job_service import EXPORT_TYPES
+    
+    if EXPORT_TYPES[job_data.export_type][0] == "analytics" and not export_job_service.can_access(current_user, job_data.export_type, {}):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    filters = {
+        "status": job_data.status.value if job_data.status else None,
+        "category_id": job_data.category_id,
+        "priority": job_data.priority.value if job_data.priority else None,
+        "search": job_data.search
+    }
+    job, created = export_job_service.create_job(db, current_user, job_data.export_type, filters)
+    response.status_code = 202 if created else 200
+    return job
+
+
+def _get_accessible_export_job(job_id: int, current_user: User, db: Session):
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if not export_job_service.can_access(current_user, job.export_type, job.params or {}):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return job
+
+
+@app.get("/api/export/jobs/{job_id}", response_model=ExportJobResponse)
+def get_export_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return _get_accessible_export_job(job_id, current_user, db)
+
+
+@app.get("/api/export/jobs/{job_id}/download")
+def download_export_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Serve a finished export. FileResponse handles Range / If-Range for resumable downloads."""
+    from fastapi.responses import FileResponse
+    from export_job_service import EXPORT_TYPES
+    
+    job = _get_accessible_export_job(job_id, current_user, db)
+    if job.status != ExportJobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status.value}")
+    if (job.expires_at and job.expires_at < datetime.utcnow()) or not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(status_code=410, detail="Export has expired")
+    
+    kind, extension, media_type = EXPORT_TYPES[job.export_type]
+    return FileResponse(
+        job.file_path,
+        media_type=media_type,
+        filename=f"{kind}_{job.created_at.strftime('%Y%m%d')}.{extension}"
+    )
+
+
 @app.get("/api/export/complaints/csv")
-async def export_complaints_csv(
+def export_complaints_csv(
     status: Optional[ComplaintStatus] = None,
     category_id: Optional[int] = None,
     priority: Optional[Priority] = None,
     search: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    pinned: bool = Depends(primary_pin)
 ):
-    query = db.query(Complaint)
-    
-    if current_user.role == UserRole.TRADER:
-        query = query.filter(Complaint.user_id == current_user.id)
-    
-    if status:
-        query = query.filter(Complaint.status == status)
-    if category_id:
-        query = query.filter(Complaint.category_id == category_id)
-    if priority:
-        query = query.filter(Complaint.priority == priority)
-    if search:
-        query = query.filter(
-            or_(
-                Complaint.title.ilike(f"%{search}%"),
-                Complaint.description.ilike(f"%{search}%")
-            )
-        )
-    
-    complaints = query.all()
-    data = [
-        {
-            "ID": c.id,
-            "Title": c.title,
-            "Status": c.status.value,
-            "Priority": c.priority.value,
-            "Category": c.category.name_en if c.category else "",
-            "Created": c.created_at.isoformat(),
-            "Trader": f"{c.user.first_name} {c.user.last_name}" if c.user else ""
-        }
-        for c in complaints
-    ]
+    from export_service import COMPLAINT_EXPORT_HEADERS
     
-    csv_buffer = export_service.export_to_csv(data)
+    stmt = export_service.complaint_export_statement(
+        trader_id=current_user.id if current_user.role == UserRole.TRADER else None,
+        status=status,
+        category_id=category_id,
+        priority=priority,
+        search=search
+    )
     
     return StreamingResponse(
-        iter([csv_buffer.getvalue()]),
+        export_service.stream_csv(COMPLAINT_EXPORT_HEADERS, export_service.iter_complaint_export_rows(stmt, pinned=pinned)),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=complaints_{datetime.now().strftime('%Y%m%d')}.csv"}
     )
 
 
 @app.get("/api/export/complaints/excel")
-async def export_complaints_excel(
+def export_complaints_excel(
     status: Optional[ComplaintStatus] = None,
     category_id: Optional[int] = None,
     priority: Optional[Priority] = None,
     search: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    pinned: bool = Depends(primary_pin)
 ):
-    query = db.query(Complaint)
-    
-    if current_user.role == UserRole.TRADER:
-        query = query.filter(Complaint.user_id == current_user.id)
-    
-    if status:
-        query = query.filter(Complaint.status == status)
-    if category_id:
-        query = query.filter(Complaint.category_id == category_id)
-    if priority:
-        query = query.filter(Complaint.priority == priority)
-    if search:
-        query = query.filter(
-            or_(
-                Complaint.title.ilike(f"%{search}%"),
-                Complaint.description.ilike(f"%{search}%")
-            )
-        )
-    
-    complaints = query.all()
-    data = [
-        {
-            "ID": c.id,
-            "Title": c.title,
-            "Status": c.status.value,
-            "Priority": c.priority.value,
-            "Category": c.category.name_en if c.category else "",
-            "Created": c.created_at.isoformat(),
-            "Trader": f"{c.user.first_name} {c.user.last_name}" if c.user else ""
-        }
-        for c in complaints
-    ]
+    from export_service import COMPLAINT_EXPORT_HEADERS
+    from fastapi.responses import FileResponse
+    from starlette.background import BackgroundTask
+    
+    stmt = export_service.complaint_export_statement(
+        trader_id=current_user.id if current_user.role == UserRole.TRADER else None,
+        status=status,
+        category_id=category_id,
+        priority=priority,
+        search=search
+    )
     
-    excel_buffer = export_service.export_to_excel(data, "Complaints")
+    # Sync handler: runs in the threadpool, so building the workbook never blocks the event loop
+    path = export_service.write_excel_file(
+        COMPLAINT_EXPORT_HEADERS,
+        export_service.iter_complaint_export_rows(stmt, pinned=pinned),
+        "Complaints"
+    )
     
-    return StreamingResponse(
-        iter([excel_buffer.getvalue()]),
+    return FileResponse(
+        path,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=complaints_{datetime.now().strftime('%Y%m%d')}.xlsx"}
+        filename=f"complaints_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        background=BackgroundTask(os.remove, path)
     )
 
 
+PDF_BUSY_DETAIL = "PDF rendering is at capacity, please retry shortly"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @app.get("/api/export/complaint/{complaint_id}/pdf")
 async def export_complaint_pdf(
     complaint_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
-    if not complaint:
+    import asyncio
+    from sqlalchemy.orm import selectinload
+    from export_service import COMPLAINT_PDF_TEMPLATE_VERSION
+    from pdf_cache import complaint_pdf_cache
+    
+    # Only the columns that decide access and the cache key; the full
+    # complaint is loaded only when the PDF has to be rendered.
+    version = (await db.execute(
+        select(
+            Complaint.user_id, Complaint.lock_version, Complaint.updated_at,
+            Category.name_en, User.first_name, User.last_name
+        ).outerjoin(Category, Complaint.category_id == Category.id).outerjoin(
+            User, Complaint.user_id == User.id
+        ).where(Complaint.id == complaint_id)
+    )).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    if current_user.role == UserRole.TRADER and complaint.user_id != current_user.id:
+    if current_user.role == UserRole.TRADER and version.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    complaint_data = {
-        "id": complaint.id,
-        "title": complaint.title,
-        "status": complaint.status.value,
-        "priority": complaint.priority.value,
-        "category": complaint.category.name_en if complaint.category else "",
-        "description": complaint.description,
-        "created_at": complaint.created_at.isoformat(),
-        "trader_name": f"{complaint.user.first_name} {complaint.user.last_name}" if complaint.user else ""
+    cache_key = complaint_pdf_cache.make_key(
+        "complaint", complaint_id, version.lock_version, version.updated_at,
+        version.name_en, version.first_name, version.last_name, COMPLAINT_PDF_TEMPLATE_VERSION
+    )
+    etag = f'"{cache_key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename=complaint_{complaint_id}.pdf"
     }
     
-    pdf_buffer = export_service.generate_complaint_pdf(complaint_data)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]})
+    
+    # Disk reads, writes and eviction scans run in a thread, never on the event loop
+    pdf_bytes = await asyncio.to_thread(complaint_pdf_cache.get, cache_key)
+    record_cache("complaint_pdf", pdf_bytes is not None)
+    if pdf_bytes is None:
+        complaint = (await db.execute(
+            select(Complaint).options(
+                selectinload(Complaint.category),
+                selectinload(Complaint.user)
+            ).where(Complaint.id == complaint_id)
+        )).scalar_one()
+        complaint_data = export_service.complaint_pdf_data(complaint)
+        
+        try:
+            pdf_bytes = await pdf_render_service.render_complaint(complaint_data)
+        except PdfRenderBusy:
+            raise HTTPException(status_code=429, detail=PDF_BUSY_DETAIL, headers={"Retry-After": "5"})
+        
+        try:
+            await asyncio.to_thread(complaint_pdf_cache.put, cache_key, pdf_bytes)
+        except OSError as e:
+            print(f"⚠ Could not cache complaint PDF {complaint_id}: {e}")
     
-    return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=complaint_{complaint_id}.pdf"}
+    return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
+
+
+@app.post("/api/export/complaints/pdf-batch")
+async def export_complaints_pdf_batch(
+    request_data: ComplaintPdfBatchRequest,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Render several complaint PDFs in parallel and return them as one ZIP."""
+    from sqlalchemy.orm import selectinload
+    
+    # The schema caps the batch at PDF_BATCH_MAX_COMPLAINTS (422 beyond that)
+    complaint_ids = list(dict.fromkeys(request_data.complaint_ids))
+    
+    stmt = select(Complaint).options(
+        selectinload(Complaint.category),
+        selectinload(Complaint.user)
+    ).where(Complaint.id.in_(complaint_ids))
+    if current_user.role == UserRole.TRADER:
+        stmt = stmt.where(Complaint.user_id == current_user.id)
+    complaints = (await db.execute(stmt.order_by(Complaint.id))).scalars().all()
+    
+    if not complaints:
+        raise HTTPException(status_code=404, detail="No accessible complaints found")
+    
+    try:
+        zip_bytes = await pdf_render_service.render_complaints_zip(
+            [export_service.complaint_pdf_data(c) for c in complaints]
+        )
+    except PdfRenderBusy:
+        raise HTTPException(status_code=429, detail=PDF_BUSY_DETAIL, headers={"Retry-After": "10"})
+    
+    return Response(
+        content=zip_bytes,
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=complaints_{datetime.now().strftime('%Y%m%d')}.zip"}
     )
 
 
 @app.get("/api/export/analytics/excel")
 async def export_analytics_excel(
-    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE)),
-    db: Session = Depends(get_db)
-):
-    total_complaints = db.query(func.count(Complaint.id)).scalar()
-    submitted = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.SUBMITTED).scalar()
-    under_review = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.UNDER_REVIEW).scalar()
-    escalated = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.ESCALATED).scalar()
-    resolved = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.RESOLVED).scalar()
-    rejected = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.REJECTED).scalar()
-    
-    data = [
-        {
-            "Metric": "Total Complaints",
-            "Value": total_complaints
-        },
-        {
-            "Metric": "Submitted",
-            "Value": submitted
-        },
-        {
-            "Metric": "Under Review",
-            "Value": under_review
-        },
-        {
-            "Metric": "Escalated",
-            "Value": escalated
-        },
-        {
-            "Metric": "Resolved",
-            "Value": resolved
-        },
-        {
-            "Metric": "Rejected",
-            "Value": rejected
-        }
-    ]
+    current_user: User = Depends(require_role_async(UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    data = await db.run_sync(export_service.analytics_export_data)
     
     excel_buffer = export_service.export_to_excel(data, "Analytics")
     
@@ -3621,42 +3722,10 @@ async def export_analytics_excel(
 
 @app.get("/api/export/analytics/csv")
 async def export_analytics_csv(
-    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE)),
-    db: Session = Depends(get_db)
-):
-    total_complaints = db.query(func.count(Complaint.id)).scalar()
-    submitted = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.SUBMITTED).scalar()
-    under_review = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.UNDER_REVIEW).scalar()
-    escalated = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.ESCALATED).scalar()
-    resolved = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.RESOLVED).scalar()
-    rejected = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.REJECTED).scalar()
-    
-    data = [
-        {
-            "Metric": "Total Complaints",
-            "Value": total_complaints
-        },
-        {
-            "Metric": "Submitted",
-            "Value": submitted
-        },
-        {
-            "Metric": "Under Review",
-            "Value": under_review
-        },
-        {
-            "Metric": "Escalated",
-            "Value": escalated
-        },
-        {
-            "Metric": "Resolved",
-            "Value": resolved
-        },
-        {
-            "Metric": "Rejected",
-            "Value": rejected
-        }
-    ]
+    current_user: User = Depends(require_role_async(UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    data = await db.run_sync(export_service.analytics_export_data)
     
     csv_buffer = export_service.export_to_csv(data)
     
@@ -3669,27 +3738,28 @@ async def export_analytics_csv(
 
 @app.get("/api/export/analytics/pdf")
 async def export_analytics_pdf(
-    current_user: User = Depends(require_role(UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE)),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role_async(UserRole.HIGHER_COMMITTEE, UserRole.TECHNICAL_COMMITTEE)),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    total_complaints = db.query(func.count(Complaint.id)).scalar()
-    pending = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.SUBMITTED).scalar()
-    in_progress = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.UNDER_REVIEW).scalar()
-    resolved = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.RESOLVED).scalar()
-    rejected = db.query(func.count(Complaint.id)).filter(Complaint.status == ComplaintStatus.REJECTED).scalar()
+    counts = dict((await db.execute(
+        select(Complaint.status, func.count(Complaint.id)).group_by(Complaint.status)
+    )).all())
     
     analytics_data = {
-        "total_complaints": total_complaints,
-        "pending_count": pending,
-        "in_progress_count": in_progress,
-        "resolved_count": resolved,
-        "rejected_count": rejected
+        "total_complaints": sum(counts.values()),
+        "pending_count": counts.get(ComplaintStatus.SUBMITTED, 0),
+        "in_progress_count": counts.get(ComplaintStatus.UNDER_REVIEW, 0),
+        "resolved_count": counts.get(ComplaintStatus.RESOLVED, 0),
+        "rejected_count": counts.get(ComplaintStatus.REJECTED, 0)
     }
     
-    pdf_buffer = export_service.generate_analytics_report(analytics_data)
+    try:
+        pdf_bytes = await pdf_render_service.render_analytics(analytics_data)
+    except PdfRenderBusy:
+        raise HTTPException(status_code=429, detail=PDF_BUSY_DETAIL, headers={"Retry-After": "5"})
     
-    return StreamingResponse(
-        iter([pdf_buffer.getvalue()]),
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=analytics_{datetime.now().strftime('%Y%m%d')}.pdf"}
     )
@@ -3708,24 +3778,33 @@ async def get_password_requirements():
     }
 
 
-@app.get("/api/task-queue/my-queue", response_model=List[TaskQueueResponse])
-async def get_my_task_queue(
+TASK_QUEUE_SORTING = Sorting(
+    {"queue_position": (TaskQueue.queue_position,), "created_at": (TaskQueue.created_at,)}, "queue_position", TaskQueue.id
+)
+
+@app.get("/api/task-queue/my-queue", response_model=Page[TaskQueueResponse])
+def get_my_task_queue(
+    params: PageParams = Depends(),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     from task_queue_service import task_queue_service
-    queue_items = task_queue_service.get_my_queue(current_user.id, db)
-    return queue_items
+    query = task_queue_service.my_queue_query(current_user.id, db)
+    return paginate(query, params, TASK_QUEUE_SORTING, TaskQueueResponse)
 
 
-@app.get("/api/task-queue/role-queue", response_model=List[TaskQueueResponse])
-async def get_role_task_queue(
+@app.get("/api/task-queue/role-queue", response_model=Page[TaskQueueResponse])
+def get_role_task_queue(
+    params: PageParams = Depends(),
+    assigned_user_id: Optional[int] = None,
     current_user: User = Depends(require_role(UserRole.TECHNICAL_COMMITTEE, UserRole.HIGHER_COMMITTEE)),
     db: Session = Depends(get_db)
 ):
     from task_queue_service import task_queue_service
-    queue_items = task_queue_service.get_role_queue(current_user.role, db)
-    return queue_items
+    query = task_queue_service.role_queue_query(current_user.role, db)
+    if assigned_user_id is not None:
+        query = query.filter(TaskQueue.assigned_user_id == assigned_user_id)
+    return paginate(query, params, TASK_QUEUE_SORTING, TaskQueueResponse)
 
 
 @app.post("/api/task-queue/rebalance")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum, Float, Boolean, Numeric, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Enum as SQLEnum, Float, Boolean, Numeric, UniqueConstraint, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -99,6 +100,12 @@ class NotificationType(str, enum.Enum):
     ACCOUNT_APPROVED = "ACCOUNT_APPROVED"
     ACCOUNT_REJECTED = "ACCOUNT_REJECTED"
 
+class ExportJobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
 class PaymentProvider(str, enum.Enum):
     STRIPE = "STRIPE"
     MANUAL = "MANUAL"
@@ -122,12 +129,14 @@ class User(Base):
     telegram = Column(String)
     address = Column(String)
     profile_picture = Column(String)
+    profile_picture_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
     is_active = Column(Boolean, default=True, nullable=False)
     account_status = Column(SQLEnum(AccountStatus), default=AccountStatus.PENDING, nullable=False)
     approved_at = Column(DateTime, nullable=True)
     approved_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     rejection_reason = Column(Text, nullable=True)
     business_license_path = Column(String, nullable=True)
+    business_license_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
     business_verification_status = Column(SQLEnum(BusinessVerificationStatus), default=BusinessVerificationStatus.PENDING, nullable=True)
     business_verified_at = Column(DateTime, nullable=True)
     business_verified_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -232,6 +241,21 @@ class Comment(Base):
     complaint = relationship("Complaint", back_populates="comments")
     user = relationship("User", back_populates="comments")
 
+class Blob(Base):
+    """
+    A stored file, keyed by the SHA-256 of its content (see blob_store.py).
+    Its references are the attachment, payment and user rows holding the key;
+    once none are left the blob GC job deletes it.
+    """
+    __tablename__ = "blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every upload of the same content; GC leaves recently seen blobs alone
+    last_uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
 class Attachment(Base):
     __tablename__ = "attachments"
     
@@ -239,6 +263,7 @@ class Attachment(Base):
     complaint_id = Column(Integer, ForeignKey("complaints.id"), nullable=False)
     filename = Column(String, nullable=False)
     filepath = Column(String, nullable=False)
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
     file_type = Column(String)
     file_size = Column(Integer)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -270,6 +295,7 @@ class Payment(Base):
     amount = Column(Numeric(10, 2), nullable=False)
     method = Column(String, nullable=False)
     proof_path = Column(String)
+    proof_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
     reference_number = Column(String)
     account_details = Column(Text)
     approved_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -304,18 +330,39 @@ class ComplaintFeedback(Base):
     user = relationship("User", back_populates="feedbacks")
 
 class AuditLog(Base):
+    """
+    Audit trail entry. On PostgreSQL the table is range-partitioned by month
+    on created_at (see the audit partitioning migration), which is why
+    created_at is part of the primary key.
+    """
     __tablename__ = "audit_logs"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     actor_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String, nullable=False)
     target_type = Column(String, nullable=False)
     target_id = Column(Integer, nullable=False)
     details = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    audit_metadata = Column("metadata", JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_audit_logs_target', 'target_type', 'target_id', created_at.desc()),
+        Index('idx_audit_logs_actor_created', 'actor_user_id', created_at.desc()),
+        Index('idx_audit_logs_action_created', 'action', created_at.desc()),
+        Index('idx_audit_logs_created_at', created_at.desc()),
+        Index('idx_audit_logs_metadata', audit_metadata, postgresql_using='gin', postgresql_ops={'metadata': 'jsonb_path_ops'}),
+    )
     
     actor = relationship("User", back_populates="audit_logs")
 
+class AuditAction(Base):
+    """Lookup of every distinct audit action code, kept in sync by audit_helper."""
+    __tablename__ = "audit_actions"
+    
+    name = Column(String, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class PaymentMethod(Base):
     __tablename__ = "payment_methods"
     
@@ -498,3 +545,52 @@ class Notification(Base):
     related_complaint = relationship("Complaint", foreign_keys=[related_complaint_id])
     related_user = relationship("User", foreign_keys=[related_user_id])
     related_payment = relationship("Payment", foreign_keys=[related_payment_id])
+
+class ExportJob(Base):
+    """
+    Background export request. dedup_key identifies the export type, filters
+    and data scope; at most one PENDING/RUNNING job exists per key.
+    """
+    __tablename__ = "export_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    requested_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    export_type = Column(String, nullable=False)
+    params = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False, default=dict)
+    dedup_key = Column(String(64), nullable=False)
+    status = Column(SQLEnum(ExportJobStatus), default=ExportJobStatus.PENDING, nullable=False)
+    progress = Column(Integer, default=0, nullable=False)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    total_rows = Column(Integer, nullable=True)
+    file_path = Column(String, nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+    # "host:pid:token" of the worker process that queued the job; it refreshes
+    # heartbeat_at while the job is PENDING/RUNNING
+    owner = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    requested_by = relationship("User", foreign_keys=[requested_by_id])
+    
+    __table_args__ = (
+        Index(
+            "uq_export_jobs_active_dedup", "dedup_key", unique=True,
+            postgresql_where=status.in_([ExportJobStatus.PENDING, ExportJobStatus.RUNNING]),
+            sqlite_where=status.in_([ExportJobStatus.PENDING, ExportJobStatus.RUNNING])
+        ),
+        Index("idx_export_jobs_dedup_status", "dedup_key", "status"),
+        Index("idx_export_jobs_expires_at", "expires_at"),
+        Index("idx_export_jobs_owner_status", "owner", "status"),
+    )
+
+
+class ExportJobSubscriber(Base):
+    """A user waiting on an export job's progress, in whichever worker they are connected to."""
+    __tablename__ = "export_job_subscribers"
+    
+    job_id = Column(Integer, ForeignKey("export_jobs.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
@@ -1,13 +1,13 @@
-from typing import Optional, List
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
-from twilio.rest import Client
+import time
+from typing import Optional, List, Union
 from config import get_settings
 from replit_connectors import get_twilio_credentials, get_sendgrid_credentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import or_
 from models import NotificationPreference
 import email_templates as templates
+from metrics import NOTIFICATION_LATENCY, NOTIFICATION_FAILURES
 
 settings = get_settings()
 
@@ -39,8 +39,16 @@ class NotificationService:
             db.refresh(prefs)
         return prefs
     
+    async def _load_preferences(self, db, user_id: int) -> NotificationPreference:
+        # The send_* methods accept either session type
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(self._get_user_preferences, user_id)
+        return self._get_user_preferences(db, user_id)
+    
     async def _get_sendgrid_client(self):
         try:
+            from sendgrid import SendGridAPIClient
+            
             creds = await get_sendgrid_credentials()
             return SendGridAPIClient(creds["api_key"]), creds["from_email"]
         except Exception as e:
@@ -49,6 +57,8 @@ class NotificationService:
     
     async def _get_twilio_client(self):
         try:
+            from twilio.rest import Client
+            
             creds = await get_twilio_credentials()
             client = Client(creds["api_key"], creds["api_key_secret"], creds["account_sid"])
             return client, creds["phone_number"]
@@ -69,6 +79,8 @@ class NotificationService:
             return False
         
         try:
+            from sendgrid.helpers.mail import Mail, Email, To, Content
+            
             message = Mail(
                 from_email=Email(from_email),
                 to_emails=To(to_email),
@@ -82,9 +94,14 @@ class NotificationService:
                     Content("text/html", html_content)
                 ]
             
+            started = time.perf_counter()
             response = sendgrid_client.send(message)
+            NOTIFICATION_LATENCY.labels("email").observe(time.perf_counter() - started)
+            if response.status_code != 202:
+                NOTIFICATION_FAILURES.labels("email").inc()
             return response.status_code == 202
         except Exception as e:
+            NOTIFICATION_FAILURES.labels("email").inc()
             print(f"Error sending email: {e}")
             return False
     
@@ -95,13 +112,16 @@ class NotificationService:
             return False
         
         try:
+            started = time.perf_counter()
             result = twilio_client.messages.create(
                 body=message,
                 from_=from_phone,
                 to=to_phone
             )
+            NOTIFICATION_LATENCY.labels("sms").observe(time.perf_counter() - started)
             return result.sid is not None
         except Exception as e:
+            NOTIFICATION_FAILURES.labels("sms").inc()
             print(f"Error sending SMS: {e}")
             return False
     
@@ -119,7 +139,7 @@ class NotificationService:
         dashboard_url: str = "https://allajnah.com/dashboard",
         language: str = "ar"
     ):
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_status_change:
             return False
@@ -186,7 +206,7 @@ class NotificationService:
         dashboard_url: str = "https://allajnah.com/dashboard",
         language: str = "ar"
     ):
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_assignment:
             return False
@@ -241,7 +261,7 @@ class NotificationService:
         dashboard_url: str = "https://allajnah.com/dashboard",
         language: str = "ar"
     ):
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_approval_request:
             return False
@@ -296,7 +316,7 @@ class NotificationService:
         dashboard_url: str = "https://allajnah.com/dashboard",
         language: str = "ar"
     ):
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_approval_decision:
             return False
@@ -350,7 +370,7 @@ class NotificationService:
         task_action: str,
         language: str = "ar"
     ):
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_assignment:
             return False
@@ -422,7 +442,7 @@ class NotificationService:
         language: str = "ar"
     ):
         """Send notification when a new comment is added to a complaint."""
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_comment:
             return False
@@ -479,7 +499,7 @@ class NotificationService:
         language: str = "ar"
     ):
         """Send notification when a complaint is escalated to Higher Committee."""
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_escalation:
             return False
@@ -534,7 +554,7 @@ class NotificationService:
         language: str = "ar"
     ):
         """Send notification when a complaint is approaching its SLA deadline."""
-        prefs = self._get_user_preferences(db, user_id)
+        prefs = await self._load_preferences(db, user_id)
         
         if not prefs.notify_sla_warning:
             return False
@@ -681,7 +701,7 @@ class NotificationService:
     
     async def create_in_app_notification(
         self,
-        db: Session,
+        db: Union[Session, AsyncSession],
         user_id: int,
         notification_type: str,
         title_ar: str,
@@ -709,8 +729,12 @@ class NotificationService:
             action_url=action_url
         )
         db.add(notification)
-        db.commit()
-        db.refresh(notification)
+        if isinstance(db, AsyncSession):
+            await db.commit()
+            await db.refresh(notification)
+        else:
+            db.commit()
+            db.refresh(notification)
         
         await manager.send_personal_message({
             "type": "notification",
@@ -731,7 +755,75 @@ class NotificationService:
         }, user_id)
         
         return notification
-    
+
+    async def create_in_app_notifications(self, db: Union[Session, AsyncSession], notifications: List[dict]):
+        """
+        Batch version of create_in_app_notification: inserts every row in one
+        flush and one commit, then pushes the WebSocket messages concurrently.
+        Each dict takes the same keys as create_in_app_notification, with
+        "type" in place of notification_type.
+        """
+        import asyncio
+        from models import Notification, NotificationType
+        from websocket_manager import manager
+
+        if not notifications:
+            return []
+
+        rows = [
+            Notification(
+                user_id=item["user_id"],
+                type=NotificationType(item["type"]),
+                title_ar=item["title_ar"],
+                title_en=item["title_en"],
+                message_ar=item["message_ar"],
+                message_en=item["message_en"],
+                related_complaint_id=item.get("related_complaint_id"),
+                related_user_id=item.get("related_user_id"),
+                related_payment_id=item.get("related_payment_id"),
+                action_url=item.get("action_url")
+            )
+            for item in notifications
+        ]
+        db.add_all(rows)
+        if isinstance(db, AsyncSession):
+            await db.flush()
+        else:
+            db.flush()
+
+        # Build payloads before commit expires the instances
+        messages = [
+            (notification.user_id, {
+                "type": "notification",
+                "data": {
+                    "id": notification.id,
+                    "type": notification.type.value,
+                    "title_ar": notification.title_ar,
+                    "title_en": notification.title_en,
+                    "message_ar": notification.message_ar,
+                    "message_en": notification.message_en,
+                    "is_read": False,
+                    "related_complaint_id": notification.related_complaint_id,
+                    "related_user_id": notification.related_user_id,
+                    "related_payment_id": notification.related_payment_id,
+                    "action_url": notification.action_url,
+                    "created_at": notification.created_at.isoformat()
+                }
+            })
+            for notification in rows
+        ]
+        if isinstance(db, AsyncSession):
+            await db.commit()
+        else:
+            db.commit()
+
+        await asyncio.gather(*[
+            manager.send_personal_message(message, user_id)
+            for user_id, message in messages
+        ])
+
+        return rows
+
     def get_user_notifications(
         self,
         db: Session,
@@ -0,0 +1,167 @@
+"""
+Password hashing off the request path.
+
+bcrypt is deliberately slow (~250ms at cost 12) and releases the GIL while it
+runs, so every hash and check goes through a small dedicated thread pool:
+request threads and the event loop stay free, at most PASSWORD_HASH_WORKERS
+bcrypt calls run at once per app worker, and at most PASSWORD_HASH_QUEUE_SIZE
+more wait. Beyond that PasswordServiceBusy is raised, which main.py answers
+with 429 rather than letting a login burst pile up behind the pool.
+
+New hashes use BCRYPT_ROUNDS. A stored hash with any other cost still
+verifies, and login replaces it with one at the configured cost, so raising
+(or lowering) the cost only needs a config change. `python -m
+password_service --calibrate 250` suggests a cost for a target time on the
+current hardware.
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from config import get_settings
+from metrics import PASSWORD_HASH_QUEUE_SECONDS, PASSWORD_HASH_SECONDS, PASSWORD_HASH_REJECTED
+
+settings = get_settings()
+
+# bcrypt only uses the first 72 bytes
+MAX_PASSWORD_BYTES = 72
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 429."""
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8")[:MAX_PASSWORD_BYTES], salt).decode("utf-8")
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode("utf-8")[:MAX_PASSWORD_BYTES], hashed_password.encode("utf-8"))
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    # $2b$12$<salt+hash>
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordService:
+    def __init__(self, max_workers: int, max_queue: int, rounds: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.rounds = rounds
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created on first use: threads started in the gunicorn master would not survive the fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return hash_rounds(hashed_password) != self.rounds
+
+    def _reserve(self, operation: str):
+        with self._lock:
+            if self._pending >= self.capacity:
+                PASSWORD_HASH_REJECTED.labels(operation).inc()
+                raise PasswordServiceBusy()
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    @staticmethod
+    def _timed(operation: str, fn, *args):
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            PASSWORD_HASH_QUEUE_SECONDS.labels(operation).observe(started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                PASSWORD_HASH_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+        return run
+
+    async def _run(self, operation: str, fn, *args):
+        self._reserve(operation)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._timed(operation, fn, *args))
+        finally:
+            self._release()
+
+    def _run_blocking(self, operation: str, fn, *args):
+        """For sync endpoints and scripts: same pool and limits, waiting on the calling thread."""
+        self._reserve(operation)
+        try:
+            return self.executor.submit(self._timed(operation, fn, *args)).result()
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", check_password, plain_password, hashed_password)
+
+    def hash_blocking(self, password: str) -> str:
+        return self._run_blocking("hash", hash_password, password, self.rounds)
+
+    def verify_blocking(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run_blocking("verify", check_password, plain_password, hashed_password)
+
+
+password_service = PasswordService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE,
+    rounds=settings.BCRYPT_ROUNDS
+)
+
+
+def calibrate(target_ms: float, samples: int = 3):
+    """Time each cost on this machine and return the highest one within target_ms (10 at least)."""
+    chosen = 10
+    for rounds in range(10, 17):
+        hashed = hash_password("calibration", rounds)
+        started = time.perf_counter()
+        for _ in range(samples):
+            check_password("calibration", hashed)
+        elapsed_ms = (time.perf_counter() - started) / samples * 1000
+        print(f"  cost {rounds}: {elapsed_ms:.0f}ms")
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bcrypt cost calibration")
+    parser.add_argument("--calibrate", type=float, metavar="MS", default=250,
+                        help="target time per hash on this machine")
+    args = parser.parse_args()
+    print(f"Timing bcrypt costs against a {args.calibrate:.0f}ms target...")
+    rounds = calibrate(args.calibrate)
+    print(f"✓ BCRYPT_ROUNDS={rounds} (currently {settings.BCRYPT_ROUNDS})")
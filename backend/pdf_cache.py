@@ -0,0 +1,113 @@
+from typing import Optional
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class RenderedArtifactCache:
+    """
+    Content-addressed disk cache for rendered files. Keys are derived from
+    everything that affects the output, so entries never need invalidation;
+    stale ones simply age out. Total size is bounded with LRU eviction
+    (file mtime is bumped on every hit). Writes are atomic, so several app
+    workers can share the directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Blocking file I/O; call it off the event loop."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+    def put(self, key: str, content: bytes):
+        """Blocking file I/O, and a directory scan when over budget; call it off the event loop."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Rewriting a key replaces its file, so only the difference counts
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(content) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Rescan: other workers share the directory, so the running total drifts
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        self._size = total
+        logger.info(f"Evicted {removed} cached artifacts from {self.directory}")
+
+
+complaint_pdf_cache = RenderedArtifactCache(
+    directory=settings.PDF_CACHE_DIR,
+    max_bytes=settings.PDF_CACHE_MAX_MB * 1024 * 1024,
+    suffix=".pdf"
+)
@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import zipfile
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# --- Child process side -----------------------------------------------------
+# Each worker builds one ExportService on start and loads ReportLab and the
+# Arabic TTF once for the life of the process.
+
+_renderer = None
+
+
+def _init_worker():
+    global _renderer
+    from export_service import ExportService
+    _renderer = ExportService()
+    _renderer.load_pdf_support()
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+def _render_complaint(complaint_data: Dict[str, Any]) -> bytes:
+    return _renderer.generate_complaint_pdf(complaint_data).getvalue()
+
+
+def _render_analytics(analytics_data: Dict[str, Any]) -> bytes:
+    return _renderer.generate_analytics_report(analytics_data).getvalue()
+
+
+# --- Parent process side ----------------------------------------------------
+
+class PdfRenderBusy(Exception):
+    """Raised when the render queue is full; callers should answer 429."""
+
+
+class PdfRenderService:
+    """
+    ReportLab layout is CPU-bound, so PDFs are rendered in a pre-warmed
+    process pool instead of on the event loop. Admission is bounded: at most
+    max_workers renders run and max_queue more wait; beyond that requests are
+    rejected immediately with PdfRenderBusy.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warming: Optional[asyncio.Task] = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn: children must not inherit the parent's DB connections or event loop
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+
+    async def start(self):
+        if self._executor is not None:
+            return
+        self._executor = self._create_executor()
+        pids = await self._warm(self._executor)
+        logger.info(f"PDF render pool ready ({len(set(pids))} processes)")
+
+    async def _warm(self, executor: ProcessPoolExecutor) -> List[int]:
+        # One task per worker: spawns every process and runs the initializer before real work arrives
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(executor, _warmup) for _ in range(self.max_workers)
+        ])
+
+    def stop(self):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _reserve(self, slots: int):
+        if self._executor is None:
+            raise RuntimeError("PDF render pool is not running")
+        if self._pending + slots > self.capacity:
+            raise PdfRenderBusy()
+        self._pending += slots
+
+    async def _submit(self, fn, payload) -> bytes:
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, fn, payload)
+        except BrokenProcessPool:
+            # A child died (e.g. OOM); replace the pool so later requests work. Every
+            # render on the broken pool fails at once, but only the first replaces it.
+            if self._executor is executor:
+                logger.error("PDF render pool broke; restarting it")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+                self._warming = asyncio.create_task(self._rewarm(self._executor))
+            raise
+
+    async def _rewarm(self, executor: ProcessPoolExecutor):
+        try:
+            pids = await self._warm(executor)
+            logger.info(f"PDF render pool restarted ({len(set(pids))} processes)")
+        except Exception as e:
+            logger.error(f"Could not warm the restarted PDF render pool: {e}")
+
+    async def render_complaint(self, complaint_data: Dict[str, Any]) -> bytes:
+        self._reserve(1)
+        try:
+            return await self._submit(_render_complaint, complaint_data)
+        finally:
+            self._pending -= 1
+
+    async def render_analytics(self, analytics_data: Dict[str, Any]) -> bytes:
+        self._reserve(1)
+        try:
+            return await self._submit(_render_analytics, analytics_data)
+        finally:
+            self._pending -= 1
+
+    async def render_complaints_zip(self, complaints: List[Dict[str, Any]]) -> bytes:
+        """
+        Render many complaint PDFs in parallel across the pool and pack them
+        into one ZIP. A batch occupies the whole pool while it runs: it
+        reserves max_workers slots and never has more renders than that in
+        flight, and each PDF is compressed into the archive as soon as it is
+        done, so only a pool's worth of uncompressed PDFs is held at a time.
+        """
+        slots = min(self.max_workers, self.capacity)
+        self._reserve(slots)
+        semaphore = asyncio.Semaphore(slots)
+
+        async def render(data: Dict[str, Any]) -> Tuple[str, bytes]:
+            async with semaphore:
+                return f"complaint_{data['id']}.pdf", await self._submit(_render_complaint, data)
+
+        buffer = io.BytesIO()
+        tasks = [asyncio.create_task(render(data)) for data in complaints]
+        try:
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                for next_done in asyncio.as_completed(tasks):
+                    name, pdf = await next_done
+                    await asyncio.to_thread(archive.writestr, name, pdf)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Retrieve the outcome of renders that failed alongside the one raised
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._pending -= slots
+        return buffer.getvalue()
+
+
+pdf_render_service = PdfRenderService(
+    max_workers=settings.PDF_RENDER_WORKERS,
+    max_queue=settings.PDF_RENDER_QUEUE_SIZE
+)
@@ -0,0 +1,74 @@
+"""
+pytest plugin: fail a test when an endpoint it calls exceeds its query budget.
+
+Enable it with `-p pytest_query_budget` (from backend/) or
+`pytest_plugins = ["pytest_query_budget"]` in a conftest, then declare the
+budget on the test:
+
+    @pytest.mark.query_budget(6)
+    def test_get_complaint(client, auth_headers):
+        client.get("/api/complaints/1", headers=auth_headers)
+
+Every request served by the app during the test (through TestClient or any
+other ASGI client) is checked against the budget, as is any query the test
+body runs directly. The failure lists the offending route, its slowest
+statements and any statement repeated often enough to be an N+1 candidate.
+`query_budget(n, n_plus_one=False)` additionally fails on any N+1 candidate
+even under budget.
+"""
+from typing import List, Tuple
+
+import pytest
+
+from query_metrics import QueryStats, query_metrics, track
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, n_plus_one=True): fail if a request (or the test body) "
+        "issues more than max_queries queries; n_plus_one=False also fails on repeated statements"
+    )
+
+
+def _describe(label: str, stats: QueryStats, budget: int) -> str:
+    lines = [f"{label}: {stats.count} queries (budget {budget}), {stats.total_ms:.1f}ms"]
+    for statement, count in stats.repeated(query_metrics.n_plus_one_threshold).items():
+        lines.append(f"    N+1 candidate, {count}x: {statement[:200]}")
+    for ms, statement in stats.slowest:
+        lines.append(f"    {ms:.1f}ms: {statement[:200]}")
+    return "\n".join(lines)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    budget = marker.args[0] if marker.args else marker.kwargs["max_queries"]
+    allow_n_plus_one = marker.kwargs.get("n_plus_one", True)
+    seen: List[Tuple[str, QueryStats]] = []
+
+    def observer(route: str, stats: QueryStats):
+        seen.append((route, stats))
+
+    query_metrics.add_observer(observer)
+    try:
+        with track() as direct:
+            result = yield
+    finally:
+        query_metrics.remove_observer(observer)
+
+    if direct.count:
+        seen.append(("test body", direct))
+
+    failures = []
+    for label, stats in seen:
+        over_budget = stats.count > budget
+        repeated = stats.repeated(query_metrics.n_plus_one_threshold)
+        if over_budget or (repeated and not allow_n_plus_one):
+            failures.append(_describe(label, stats, budget))
+    if failures:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(failures), pytrace=False)
+    return result
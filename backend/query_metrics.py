@@ -0,0 +1,181 @@
+"""
+Per-request database query instrumentation.
+
+SQLAlchemy cursor events on every Engine (primary, async, replicas) feed the
+QueryStats of the request being served, tracked through a context variable
+so concurrent requests never mix. The HTTP middleware in main.py wraps each
+request in `track()`, adds a `Server-Timing: db;dur=...` header and folds the
+result into per-route totals served by /api/admin/query-metrics.
+
+A statement that runs QUERY_N_PLUS_ONE_THRESHOLD or more times in one request
+(IN-lists collapsed, so batches of different sizes still count as one
+statement) is logged as an N+1 candidate.
+
+Outside a tracked request (scheduler jobs, background writers) the listeners
+only do one context variable lookup.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SLOWEST_KEPT = 5
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+_current: contextvars.ContextVar[Optional["QueryStats"]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Dict[str, List[float]] = {}
+        self.slowest: List[tuple] = []
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        key = normalize_statement(statement)
+        entry = self.statements.setdefault(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_ms
+        if len(self.slowest) < SLOWEST_KEPT or elapsed_ms > self.slowest[-1][0]:
+            self.slowest.append((elapsed_ms, key))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements executed at least `threshold` times: likely N+1 loops."""
+        return {statement: count for statement, (count, _) in self.statements.items() if count >= threshold}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.total_ms, 2),
+            "slowest": [{"ms": round(ms, 2), "statement": statement} for ms, statement in self.slowest],
+            "n_plus_one": self.repeated(settings.QUERY_N_PLUS_ONE_THRESHOLD),
+        }
+
+
+@contextmanager
+def track():
+    """Collect the queries issued inside the block (including worker threads it awaits)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+class RouteQueryMetrics:
+    """Per-route query totals for this worker process."""
+
+    def __init__(self, n_plus_one_threshold: int, slow_request_ms: float):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_request_ms = slow_request_ms
+        self._routes: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._observers: List[Callable[[str, QueryStats], None]] = []
+
+    def add_observer(self, observer: Callable[[str, QueryStats], None]):
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[str, QueryStats], None]):
+        self._observers.remove(observer)
+
+    def observe(self, route: str, stats: QueryStats):
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        if repeated:
+            worst, times = max(repeated.items(), key=lambda item: item[1])
+            logger.warning(f"Possible N+1 in {route}: {times}x {worst[:200]}")
+        if stats.total_ms >= self.slow_request_ms:
+            logger.warning(f"{route} spent {stats.total_ms:.0f}ms in {stats.count} queries")
+
+        with self._lock:
+            totals = self._routes.get(route)
+            if totals is None:
+                totals = self._routes[route] = {
+                    "requests": 0, "queries": 0, "db_ms": 0.0, "max_queries": 0,
+                    "n_plus_one_requests": 0, "slowest": [],
+                }
+            totals["requests"] += 1
+            totals["queries"] += stats.count
+            totals["db_ms"] += stats.total_ms
+            totals["max_queries"] = max(totals["max_queries"], stats.count)
+            if repeated:
+                totals["n_plus_one_requests"] += 1
+            slowest = totals["slowest"] + stats.slowest
+            slowest.sort(key=lambda item: item[0], reverse=True)
+            totals["slowest"] = slowest[:SLOWEST_KEPT]
+
+        for observer in self._observers:
+            observer(route, stats)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            routes = [(route, dict(totals)) for route, totals in self._routes.items()]
+        return sorted(
+            (
+                {
+                    "route": route,
+                    "requests": totals["requests"],
+                    "avg_queries": round(totals["queries"] / totals["requests"], 2),
+                    "max_queries": totals["max_queries"],
+                    "avg_db_ms": round(totals["db_ms"] / totals["requests"], 2),
+                    "total_db_ms": round(totals["db_ms"], 1),
+                    "n_plus_one_requests": totals["n_plus_one_requests"],
+                    "slowest": [{"ms": round(ms, 2), "statement": statement} for ms, statement in totals["slowest"]],
+                }
+                for route, totals in routes
+            ),
+            key=lambda row: row["total_db_ms"],
+            reverse=True
+        )
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+query_metrics = RouteQueryMetrics(
+    n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD,
+    slow_request_ms=settings.QUERY_SLOW_REQUEST_MS
+)
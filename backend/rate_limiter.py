@@ -1,11 +1,266 @@
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+"""
+Rate limits shared by every gunicorn worker.
+
+Limits use GCRA (the generic cell rate algorithm). For each key Redis holds
+a single number, the theoretical arrival time (TAT) of the next request. A
+Lua script reads, checks and advances it atomically in one round trip, using
+the Redis clock. That way all workers, and the app across restarts, count
+against the same limit. "5/minute" lets a burst of 5 through and then one
+every 12 seconds: a sliding window without a timestamp per hit.
+
+Each worker also remembers, per key, the TAT that Redis last reported. The
+shared TAT can only have moved further since, so when the local copy already
+says "over the limit" the request is refused without a round trip, and a
+flood from one client costs Redis nothing. Without REDIS_URL, or while Redis
+is unreachable, the same algorithm runs on the local copies alone (so limits
+are per worker until Redis is back).
+
+Limits are FastAPI dependencies:
+
+    @app.post("/api/auth/login", dependencies=[Depends(limiter.limit(LOGIN_RATE_LIMIT, key="ip"))])
+
+key="user" counts per signed-in user (the token subject, read without a DB
+query) and falls back to the client IP for anonymous requests; key="ip"
+always counts per client IP. Each route has its own counters. Allowed
+responses carry RateLimit-Policy / RateLimit-Limit / RateLimit-Remaining /
+RateLimit-Reset; refused ones are 429 with the same headers and Retry-After.
+"""
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
 from config import get_settings
+from metrics import RATE_LIMIT_DECISIONS
 
 settings = get_settings()
 
-limiter = Limiter(key_func=get_remote_address)
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# How long to stay on local limits after a Redis error before trying again
+REDIS_RETRY_SECONDS = 5
+
+# Verifying a JWT costs ~100µs; a token's subject is remembered this long. It
+# only names the bucket (the endpoint still authenticates), so a token expiring
+# in the meantime is harmless.
+TOKEN_SUBJECT_TTL_SECONDS = 60
+
+# KEYS[1] = bucket, ARGV = emission interval and period in microseconds.
+# Returns {allowed, microseconds from now to the TAT, microseconds until retry}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, math.ceil(tat - now), math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], string.format('%.0f', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return {1, math.ceil(new_tat - now), 0}
+"""
+
+
+class Rate:
+    """A parsed limit such as "5/minute": `limit` requests per `period` seconds."""
+
+    __slots__ = ("limit", "period", "interval", "policy")
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.policy = f"{limit};w={int(period)}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Rate":
+        count, _, unit = spec.partition("/")
+        return cls(int(count), PERIODS[unit.strip().rstrip("s")])
+
+    def __str__(self):
+        unit = next(name for name, seconds in PERIODS.items() if seconds == self.period)
+        return f"{self.limit} per 1 {unit}"
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, rate: Rate, headers: Dict[str, str]):
+        self.rate = rate
+        self.headers = headers
+        super().__init__(f"Rate limit exceeded: {rate}")
+
+
+def rate_limit_headers(rate: Rate, ahead: float, retry_after: float) -> Dict[str, str]:
+    """`ahead` is how far the key's TAT is past now: the time until the full burst is available again."""
+    remaining = max(0, min(rate.limit, math.floor((rate.period - ahead) / rate.interval + 1e-9)))
+    headers = {
+        "RateLimit-Policy": rate.policy,
+        "RateLimit-Limit": str(rate.limit),
+        "RateLimit-Remaining": str(remaining if not retry_after else 0),
+        "RateLimit-Reset": str(math.ceil(ahead)),
+    }
+    if retry_after:
+        headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return headers
+
+
+class LocalGCRA:
+    """In-process TATs: the fast path in front of Redis, and the whole limiter without it."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+
+    def peek(self, key: str, rate: Rate, now: float) -> Optional[Tuple[float, float]]:
+        """(ahead, retry_after) if a request now would be refused, else None; changes nothing."""
+        tat = self._tats.get(key)
+        if tat is None:
+            return None
+        allow_at = tat + rate.interval - rate.period
+        if allow_at > now:
+            return tat - now, allow_at - now
+        return None
+
+    def hit(self, key: str, rate: Rate, now: float) -> Tuple[bool, float, float]:
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + rate.interval
+        allow_at = new_tat - rate.period
+        if allow_at > now:
+            return False, tat - now, allow_at - now
+        self.store(key, new_tat, now)
+        return True, new_tat - now, 0.0
+
+    def store(self, key: str, tat: float, now: float):
+        if key not in self._tats and len(self._tats) >= self.max_keys:
+            self._evict(now)
+        self._tats[key] = tat
+
+    def _evict(self, now: float):
+        # Keys whose TAT has passed are back to a full burst, same as absent ones
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        if len(self._tats) >= self.max_keys:
+            self._tats.clear()
+
+
+class RateLimiter:
+    def __init__(self, redis_url: str, enabled: bool = True, timeout_ms: int = 50, max_local_keys: int = 100_000):
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self.timeout = timeout_ms / 1000
+        self.local = LocalGCRA(max_local_keys)
+        self.max_local_keys = max_local_keys
+        self._token_subjects: Dict[str, Tuple[Optional[str], float]] = {}
+        self._script = None
+        self._redis_down_until = 0.0
+
+    @property
+    def script(self):
+        # Created on first use, inside a worker: the asyncio connection pool is per process and event loop
+        if self._script is None:
+            import redis.asyncio as redis_asyncio
+            client = redis_asyncio.from_url(
+                self.redis_url, socket_timeout=self.timeout, socket_connect_timeout=self.timeout
+            )
+            self._script = client.register_script(GCRA_SCRIPT)
+        return self._script
+
+    async def stop(self):
+        if self._script is not None:
+            await self._script.registered_client.aclose()
+            self._script = None
+
+    async def hit(self, key: str, rate: Rate) -> Tuple[bool, float, float]:
+        """Count one request against `key`: (allowed, seconds to the TAT, seconds until retry)."""
+        now = time.monotonic()
+        if not self.redis_url or now < self._redis_down_until:
+            allowed, ahead, retry_after = self.local.hit(key, rate, now)
+            RATE_LIMIT_DECISIONS.labels("allowed" if allowed else "refused", "local").inc()
+            return allowed, ahead, retry_after
+
+        refused = self.local.peek(key, rate, now)
+        if refused is not None:
+            RATE_LIMIT_DECISIONS.labels("refused", "local").inc()
+            return (False,) + refused
+
+        try:
+            allowed, ahead_us, retry_us = await self.script(
+                keys=[key], args=[rate.interval * 1_000_000, rate.period * 1_000_000]
+            )
+        except Exception as e:
+            if self._redis_down_until == 0.0:
+                print(f"⚠ Rate limiter: Redis unavailable ({e}); enforcing limits per worker")
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+            allowed, ahead, retry_after = self.local.hit(key, rate, now)
+            RATE_LIMIT_DECISIONS.labels("allowed" if allowed else "refused", "local").inc()
+            return allowed, ahead, retry_after
+
+        if self._redis_down_until:
+            print("✓ Rate limiter: Redis is back; limits are shared again")
+            self._redis_down_until = 0.0
+        ahead = ahead_us / 1_000_000
+        # Mirror the shared TAT on this worker's clock for the fast path
+        self.local.store(key, now + ahead, now)
+        RATE_LIMIT_DECISIONS.labels("allowed" if allowed else "refused", "redis").inc()
+        return bool(allowed), ahead, retry_us / 1_000_000
+
+    def _token_subject(self, scheme: str, token: str) -> Optional[str]:
+        now = time.monotonic()
+        cached = self._token_subjects.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        from fastapi import HTTPException
+        from fastapi.security import HTTPAuthorizationCredentials
+        from auth import user_id_from_token
+        try:
+            subject = f"user:{user_id_from_token(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))}"
+        except HTTPException:
+            subject = None
+        if len(self._token_subjects) >= self.max_local_keys:
+            self._token_subjects.clear()
+        self._token_subjects[token] = (subject, now + TOKEN_SUBJECT_TTL_SECONDS)
+        return subject
+
+    def client_identity(self, request: Request, key: str) -> str:
+        if key == "user":
+            scheme, _, token = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                subject = self._token_subject(scheme, token)
+                if subject is not None:
+                    return subject
+        # uvicorn's proxy headers handling already resolved X-Forwarded-For from nginx
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    def limit(self, spec: str, key: str = "user"):
+        """Dependency enforcing `spec` (e.g. "5/minute") per route and per `key` ("user" or "ip")."""
+        rate = Rate.parse(spec)
+
+        async def rate_limit(request: Request, response: Response):
+            if not self.enabled:
+                return
+            route = request.scope.get("route")
+            path = route.path if route is not None else request.url.path
+            bucket = f"rl:{request.method}:{path}:{self.client_identity(request, key)}"
+            allowed, ahead, retry_after = await self.hit(bucket, rate)
+            headers = rate_limit_headers(rate, ahead, retry_after)
+            if not allowed:
+                raise RateLimitExceeded(rate, headers)
+            response.headers.update(headers)
+
+        return rate_limit
+
+
+limiter = RateLimiter(
+    redis_url=settings.RATE_LIMIT_REDIS_URL or settings.REDIS_URL,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    timeout_ms=settings.RATE_LIMIT_REDIS_TIMEOUT_MS,
+    max_local_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS
+)
 
 LOGIN_RATE_LIMIT = f"{settings.RATE_LIMIT_LOGIN_PER_MINUTE}/minute"
 COMPLAINT_RATE_LIMIT = f"{settings.RATE_LIMIT_COMPLAINTS_PER_HOUR}/hour"
@@ -0,0 +1,357 @@
+"""
+Read-replica routing for read-heavy endpoints.
+
+Replicas are listed in DATABASE_REPLICA_URLS (comma-separated). Endpoints that
+only read and tolerate a few seconds of lag (dashboards, analytics, audit log
+browsing, exports) take `get_read_db` / `get_async_read_db` instead of
+`get_db` / `get_async_db`; everything else stays on the primary.
+
+- Replicas are picked round-robin among those whose last health check passed
+  and whose replay lag is within REPLICA_MAX_LAG_SECONDS. The checks run in a
+  background task in every worker.
+- A replica that fails to hand out a connection is marked down until its next
+  successful check and the request falls back to the primary.
+- Read-your-writes: after a user's successful write request, that user's
+  reads are pinned to the primary for READ_YOUR_WRITES_SECONDS. Pins live in
+  Redis when REDIS_URL is set (shared by all workers), read and written on
+  the event loop with READ_YOUR_WRITES_REDIS_TIMEOUT_MS timeouts. Every worker
+  also keeps its own pins in-process, which are used without Redis and while
+  it is unreachable.
+
+Check the configured replicas from a shell (SQLite files work as stand-ins):
+
+    DATABASE_REPLICA_URLS=sqlite:////tmp/replica1.db,postgresql://... python read_replicas.py
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker, Session
+
+from auth import security, user_id_from_token
+from config import get_settings
+from database import SessionLocal, AsyncSessionLocal, AsyncBackedSession, async_database_url
+from json_codec import dumps_str, loads
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds since the last replayed transaction, or 0 when the replica has
+# replayed everything it received (an idle primary produces no new WAL, so
+# the replay timestamp alone would report growing lag)
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+PIN_KEY = "db_pin:{}"
+# After a Redis error, pins stay in-process this long before Redis is tried again
+REDIS_RETRY_SECONDS = 5.0
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = make_url(url)
+        self.name = self.url.render_as_string(hide_password=True)
+        self.is_postgres = self.url.get_backend_name() == "postgresql"
+        if self.is_postgres:
+            self.engine = create_engine(
+                self.url,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                pool_size=settings.REPLICA_POOL_SIZE,
+                max_overflow=settings.REPLICA_MAX_OVERFLOW,
+                json_serializer=dumps_str,
+                json_deserializer=loads,
+                connect_args={
+                    "connect_timeout": 5,
+                    "options": "-c statement_timeout=30000"
+                }
+            )
+            self.async_engine = create_async_engine(
+                async_database_url(url),
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                pool_size=settings.REPLICA_POOL_SIZE,
+                max_overflow=settings.REPLICA_MAX_OVERFLOW,
+                json_serializer=dumps_str,
+                json_deserializer=loads,
+                connect_args={
+                    "timeout": 5,
+                    "server_settings": {"statement_timeout": "30000"}
+                }
+            )
+        else:
+            self.engine = create_engine(
+                self.url, pool_pre_ping=True, json_serializer=dumps_str, json_deserializer=loads
+            )
+            self.async_engine = create_async_engine(
+                async_database_url(url), pool_pre_ping=True, json_serializer=dumps_str, json_deserializer=loads
+            )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine,
+            sync_session_class=AsyncBackedSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def status(self) -> dict:
+        return {
+            "replica": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "error": self.last_error,
+        }
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        pin_seconds: float,
+        redis_url: str = "",
+        redis_timeout_ms: int = 50
+    ):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.pin_seconds = pin_seconds
+        self._turn = itertools.count()
+        self._pins: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.redis_url = redis_url
+        self.redis_timeout = redis_timeout_ms / 1000
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def check(self, replica: Replica):
+        try:
+            with replica.engine.connect() as conn:
+                lag = conn.execute(POSTGRES_LAG_QUERY if replica.is_postgres else text("SELECT 0")).scalar()
+            lag = float(lag or 0)
+        except Exception as e:
+            if replica.healthy or replica.checked_at is None:
+                logger.warning(f"Replica {replica.name} is down: {e}")
+            replica.healthy = False
+            replica.last_error = str(e)
+        else:
+            if not replica.healthy:
+                logger.info(f"Replica {replica.name} is up (lag {lag:.1f}s)")
+            elif lag > self.max_lag_seconds >= (replica.lag_seconds or 0):
+                logger.warning(f"Replica {replica.name} is lagging {lag:.1f}s; routing reads to other nodes")
+            replica.healthy = True
+            replica.lag_seconds = lag
+            replica.last_error = None
+        replica.checked_at = time.monotonic()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def mark_down(self, replica: Replica, error: Exception):
+        logger.warning(f"Replica {replica.name} failed, falling back to primary until next check: {error}")
+        replica.healthy = False
+        replica.last_error = str(error)
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Replica router started ({len(self.replicas)} replicas)")
+
+    async def stop(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.check_all)
+            await asyncio.sleep(self.check_interval_seconds)
+
+    def available(self) -> List[Replica]:
+        return [
+            replica for replica in self.replicas
+            if replica.healthy and replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds
+        ]
+
+    def choose(self, pinned: bool = False) -> Optional[Replica]:
+        """The replica for the next read, or None to use the primary."""
+        candidates = self.available()
+        if not candidates or pinned:
+            return None
+        return candidates[next(self._turn) % len(candidates)]
+
+    def read_session(self, pinned: bool = False) -> Session:
+        """A sync session for threadpool code; resolve `pinned` on the event loop with is_pinned()."""
+        replica = self.choose(pinned)
+        if replica is not None:
+            db = replica.SessionLocal()
+            try:
+                db.connection()
+                return db
+            except Exception as e:
+                db.close()
+                self.mark_down(replica, e)
+        return SessionLocal()
+
+    async def async_read_session(self, user_id: Optional[int] = None) -> AsyncSession:
+        replica = self.choose(user_id is not None and await self.is_pinned(user_id))
+        if replica is not None:
+            db = replica.AsyncSessionLocal()
+            try:
+                await db.connection()
+                return db
+            except Exception as e:
+                await db.close()
+                self.mark_down(replica, e)
+        return AsyncSessionLocal()
+
+    @property
+    def redis(self):
+        """The shared pin store, or None without REDIS_URL and while it is unreachable."""
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        # Created on first use, inside a worker: the asyncio connection pool is per process and event loop
+        if self._redis is None:
+            import redis.asyncio as redis_asyncio
+            self._redis = redis_asyncio.from_url(
+                self.redis_url, socket_timeout=self.redis_timeout, socket_connect_timeout=self.redis_timeout
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        if self._redis_down_until == 0.0:
+            logger.warning(f"Redis unavailable for primary pins ({error}); pinning per worker")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _redis_ok(self):
+        if self._redis_down_until:
+            logger.info("Redis is back; primary pins are shared again")
+            self._redis_down_until = 0.0
+
+    async def pin(self, user_id: int):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if len(self._pins) > 10000:
+            self._pins = {uid: until for uid, until in self._pins.items() if until > now}
+        self._pins[user_id] = now + self.pin_seconds
+        client = self.redis
+        if client is None:
+            return
+        try:
+            await client.setex(PIN_KEY.format(user_id), max(1, round(self.pin_seconds)), 1)
+        except Exception as e:
+            self._redis_failed(e)
+        else:
+            self._redis_ok()
+
+    async def is_pinned(self, user_id: int) -> bool:
+        if not self.enabled:
+            return False
+        # This worker's own pins need no round trip
+        if self._pins.get(user_id, 0) > time.monotonic():
+            return True
+        client = self.redis
+        if client is None:
+            return False
+        try:
+            pinned = bool(await client.exists(PIN_KEY.format(user_id)))
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+        self._redis_ok()
+        return pinned
+
+    async def pin_request_user(self, request: Request):
+        """Pin the user behind a write request's bearer token, if any."""
+        if not self.enabled:
+            return
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return
+        try:
+            user_id = user_id_from_token(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+        except HTTPException:
+            return
+        await self.pin(user_id)
+
+    def status(self) -> List[dict]:
+        return [replica.status() for replica in self.replicas]
+
+
+replica_router = ReplicaRouter(
+    urls=[url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval_seconds=settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    redis_url=settings.REDIS_URL,
+    redis_timeout_ms=settings.READ_YOUR_WRITES_REDIS_TIMEOUT_MS
+)
+
+
+async def primary_pin(credentials: HTTPAuthorizationCredentials = Depends(security)) -> bool:
+    """Whether the caller has just written, checked on the event loop for sync read endpoints."""
+    return await replica_router.is_pinned(user_id_from_token(credentials))
+
+
+def get_read_db(pinned: bool = Depends(primary_pin)):
+    db = replica_router.read_session(pinned)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    db = await replica_router.async_read_session(user_id_from_token(credentials))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    if not replica_router.enabled:
+        print("⚠ DATABASE_REPLICA_URLS is empty; all reads go to the primary")
+    replica_router.check_all()
+    for replica in replica_router.replicas:
+        if replica.healthy:
+            print(f"✓ {replica.name}: lag {replica.lag_seconds:.1f}s")
+        else:
+            print(f"✗ {replica.name}: {replica.last_error}")
+    picks = [replica_router.choose() for _ in range(2 * len(replica_router.replicas) or 1)]
+    print("Routing order:", ", ".join(r.name if r else "primary" for r in picks))
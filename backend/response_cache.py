@@ -3,6 +3,8 @@ from datetime import datetime, timedelta
 import json
 import hashlib
 
+from metrics import record_cache
+
 cache_store = {}
 
 def cache_response(ttl_seconds=60):
@@ -14,10 +16,12 @@ def cache_response(ttl_seconds=60):
             if cache_key in cache_store:
                 cached_data, expiry = cache_store[cache_key]
                 if datetime.utcnow() < expiry:
+                    record_cache("response", True)
                     return cached_data
                 else:
                     del cache_store[cache_key]
             
+            record_cache("response", False)
             result = await func(*args, **kwargs)
             cache_store[cache_key] = (result, datetime.utcnow() + timedelta(seconds=ttl_seconds))
             _cleanup_expired_cache()
@@ -30,10 +34,12 @@ def cache_response(ttl_seconds=60):
             if cache_key in cache_store:
                 cached_data, expiry = cache_store[cache_key]
                 if datetime.utcnow() < expiry:
+                    record_cache("response", True)
                     return cached_data
                 else:
                     del cache_store[cache_key]
             
+            record_cache("response", False)
             result = func(*args, **kwargs)
             cache_store[cache_key] = (result, datetime.utcnow() + timedelta(seconds=ttl_seconds))
             _cleanup_expired_cache()
@@ -4,6 +4,8 @@ from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 import logging
 
+from metrics import track_job
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,7 @@ async def check_sla_violations_task():
             db.close()
     except Exception as e:
         logger.error(f"Error in SLA check task: {e}")
+        raise
 
 
 async def check_sla_warnings_task():
@@ -40,6 +43,7 @@ async def check_sla_warnings_task():
             db.close()
     except Exception as e:
         logger.error(f"Error in SLA warnings task: {e}")
+        raise
 
 
 async def auto_close_resolved_task():
@@ -56,6 +60,7 @@ async def auto_close_resolved_task():
             db.close()
     except Exception as e:
         logger.error(f"Error in auto-close task: {e}")
+        raise
 
 
 async def renewal_reminder_job():
@@ -98,11 +103,70 @@ async def renewal_reminder_job():
             db.close()
     except Exception as e:
         logger.error(f"Error in renewal reminder task: {e}")
+        raise
+
+
+async def ensure_audit_partitions_task():
+    logger.info("Ensuring upcoming audit log partitions exist...")
+    try:
+        from sqlalchemy import text
+        from database import engine
+        
+        if engine.dialect.name != "postgresql":
+            return
+        with engine.begin() as conn:
+            conn.execute(text("SELECT ensure_audit_log_partitions(3)"))
+        logger.info("Audit log partitions ensured")
+    except Exception as e:
+        logger.error(f"Error in audit partition task: {e}")
+        raise
+
+
+async def cleanup_export_jobs_task():
+    logger.info("Cleaning up export jobs...")
+    try:
+        from database import SessionLocal
+        from export_job_service import export_job_service
+        
+        db = SessionLocal()
+        try:
+            result = export_job_service.cleanup(db)
+            logger.info(f"Export job cleanup completed. Stale: {result['stale']}, expired: {result['expired']}")
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Error in export job cleanup task: {e}")
+        raise
+
+
+async def blob_gc_task():
+    logger.info("Collecting unreferenced blobs...")
+    try:
+        import asyncio
+        from database import SessionLocal
+        from blob_store import blob_store
+        
+        def collect():
+            db = SessionLocal()
+            try:
+                return blob_store.collect_garbage(db)
+            finally:
+                db.close()
+        
+        # Storage listing and deletes (possibly S3) stay off the event loop
+        result = await asyncio.to_thread(collect)
+        logger.info(
+            f"Blob GC completed. Blobs: {result['blobs']}, orphan files: {result['orphan_files']}, "
+            f"staging files: {result['staging_files']}"
+        )
+    except Exception as e:
+        logger.error(f"Error in blob GC task: {e}")
+        raise
 
 
 def start_scheduler():
     scheduler.add_job(
-        check_sla_warnings_task,
+        track_job('sla_warnings', check_sla_warnings_task),
         trigger=IntervalTrigger(hours=4),
         id='sla_warnings',
         name='Check SLA Warnings',
@@ -110,7 +174,7 @@ def start_scheduler():
     )
     
     scheduler.add_job(
-        check_sla_violations_task,
+        track_job('sla_check', check_sla_violations_task),
         trigger=IntervalTrigger(hours=4),
         id='sla_check',
         name='Check SLA Violations',
@@ -118,7 +182,7 @@ def start_scheduler():
     )
     
     scheduler.add_job(
-        auto_close_resolved_task,
+        track_job('auto_close', auto_close_resolved_task),
         trigger=CronTrigger(hour=2, minute=0),
         id='auto_close',
         name='Auto Close Resolved Complaints',
@@ -126,13 +190,37 @@ def start_scheduler():
     )
     
     scheduler.add_job(
-        renewal_reminder_job,
+        track_job('renewal_reminder', renewal_reminder_job),
         trigger=IntervalTrigger(hours=24),
         id='renewal_reminder',
         name='Subscription Renewal Reminder',
         replace_existing=True
     )
     
+    scheduler.add_job(
+        track_job('audit_partitions', ensure_audit_partitions_task),
+        trigger=CronTrigger(hour=3, minute=0),
+        id='audit_partitions',
+        name='Ensure Audit Log Partitions',
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        track_job('export_job_cleanup', cleanup_export_jobs_task),
+        trigger=IntervalTrigger(hours=1),
+        id='export_job_cleanup',
+        name='Clean Up Export Jobs',
+        replace_existing=True
+    )
+    
+    scheduler.add_job(
+        track_job('blob_gc', blob_gc_task),
+        trigger=CronTrigger(hour=4, minute=0),
+        id='blob_gc',
+        name='Collect Unreferenced Blobs',
+        replace_existing=True
+    )
+    
     scheduler.start()
     logger.info("Scheduler started successfully")
 
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, AliasChoices, computed_field
+from typing import Optional, List, Literal, Dict, Generic, TypeVar
+from typing_extensions import TypedDict
 from datetime import datetime
 from decimal import Decimal
+from config import get_settings
 from models import UserRole, ComplaintStatus, Priority, SubscriptionStatus, PaymentStatus, TaskStatus, ApprovalStatus, AccountStatus, EscalationType, AppealStatus, MediationStatus, EscalationState, NotificationType, PaymentProvider, BusinessVerificationStatus
 
 class UserCreate(BaseModel):
@@ -30,6 +32,7 @@ class UserResponse(BaseModel):
     telegram: Optional[str] = None
     address: Optional[str] = None
     profile_picture: Optional[str] = None
+    profile_picture_sha256: Optional[str] = Field(None, exclude=True)
     is_active: bool = True
     account_status: AccountStatus
     approved_at: Optional[datetime] = None
@@ -40,6 +43,13 @@ class UserResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
+    @computed_field
+    @property
+    def profile_picture_urls(self) -> Optional[Dict[str, str]]:
+        """Resized avatar URLs by pixel size ("64", "128", "256")."""
+        from image_derivatives import avatar_urls
+        return avatar_urls(self.id, self.profile_picture_sha256)
+    
     class Config:
         from_attributes = True
 
@@ -160,12 +170,40 @@ class ComplaintResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ComplaintListItem(TypedDict):
+    """A complaint as list views show it (complaint_list.py); the full record is on GET /api/complaints/{id}."""
+    id: int
+    user_id: int
+    category_id: int
+    assigned_to_id: Optional[int]
+    title: str
+    complaint_summary: str
+    status: ComplaintStatus
+    priority: Priority
+    task_status: TaskStatus
+    escalation_state: EscalationState
+    created_at: datetime
+    updated_at: datetime
+    resolved_at: Optional[datetime]
+    category_name: Optional[str]
+    trader_name: Optional[str]
+    assigned_to_name: Optional[str]
+
 class ComplaintsListResponse(BaseModel):
-    complaints: List['ComplaintResponse']
+    complaints: List[ComplaintListItem]
     total: int = 0
     page: int = 1
     page_size: int = 50
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """One page of a paginated list endpoint (pagination.py)."""
+    items: List[T]
+    total: int
+    page: int
+    page_size: int
+
 class CommentCreate(BaseModel):
     complaint_id: int
     content: str
@@ -191,6 +229,8 @@ class AttachmentResponse(BaseModel):
     file_type: Optional[str] = None
     file_size: Optional[int] = None
     uploaded_at: datetime
+    # Signed link to a small preview, for image attachments
+    preview_url: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -341,6 +381,7 @@ class AuditLogResponse(BaseModel):
     target_type: str
     target_id: int
     details: Optional[str] = None
+    metadata: Optional[dict] = Field(None, validation_alias=AliasChoices("audit_metadata", "metadata"))
     created_at: datetime
     actor: Optional[UserResponse] = None
     
@@ -499,6 +540,32 @@ class BulkStatusRequest(BaseModel):
     complaint_ids: List[int]
     status: ComplaintStatus
 
+class ComplaintPdfBatchRequest(BaseModel):
+    complaint_ids: List[int] = Field(..., min_length=1, max_length=get_settings().PDF_BATCH_MAX_COMPLAINTS)
+
+class ExportJobCreate(BaseModel):
+    export_type: Literal["complaints_csv", "complaints_excel", "analytics_csv", "analytics_excel"]
+    status: Optional[ComplaintStatus] = None
+    category_id: Optional[int] = None
+    priority: Optional[Priority] = None
+    search: Optional[str] = None
+
+class ExportJobResponse(BaseModel):
+    id: int
+    export_type: str
+    status: str
+    progress: int
+    rows_processed: int
+    total_rows: Optional[int] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
 class BulkActionResponse(BaseModel):
     success_count: int
     failed_count: int
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session, selectinload
 from sqlalchemy import func, and_
 from models import TaskQueue, Complaint, User, UserRole, TaskStatus, ComplaintStatus
 from datetime import datetime, timedelta
@@ -94,20 +94,17 @@ class TaskQueueService:
         return queue_entry
     
     @staticmethod
-    def get_my_queue(user_id: int, db: Session) -> List[TaskQueue]:
-        queue_items = db.query(TaskQueue).filter(
+    def my_queue_query(user_id: int, db: Session) -> Query:
+        """Unordered: the endpoint pages it (pagination.py), by queue position unless asked otherwise."""
+        return db.query(TaskQueue).options(selectinload(TaskQueue.assigned_user)).filter(
             TaskQueue.assigned_user_id == user_id
-        ).order_by(TaskQueue.queue_position).all()
-        
-        return queue_items
+        )
     
     @staticmethod
-    def get_role_queue(role: UserRole, db: Session) -> List[TaskQueue]:
-        queue_items = db.query(TaskQueue).filter(
+    def role_queue_query(role: UserRole, db: Session) -> Query:
+        return db.query(TaskQueue).options(selectinload(TaskQueue.assigned_user)).filter(
             TaskQueue.assigned_role == role
-        ).order_by(TaskQueue.queue_position).all()
-        
-        return queue_items
+        )
     
     @staticmethod
     def remove_from_queue(complaint_id: int, db: Session):
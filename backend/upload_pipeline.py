@@ -0,0 +1,132 @@
+"""
+Uploaded files from the request to their final path in one pass.
+
+save_upload checks the filename, then copies the UploadFile on a worker
+thread in CHUNK_SIZE pieces into a temporary file in the destination
+directory. During that single read it:
+
+- sniffs the MIME type from the first chunk (shared libmagic handle) and
+  stops at once if it does not match the extension;
+- counts bytes and stops with 413 as soon as the file passes max_bytes;
+- feeds every chunk to SHA-256.
+
+Only a complete, accepted file is renamed into place (atomically, same
+filesystem), so rejected or half-written uploads never show up under
+uploads/ and a failed copy leaves nothing behind.
+
+UploadSizeLimitMiddleware refuses multipart requests whose Content-Length
+is already over the largest upload limit, before the body is received and
+spooled at all.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.responses import JSONResponse
+
+from config import get_settings
+from file_validator import check_content, check_filename, detect_mime
+
+settings = get_settings()
+
+MB = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# Room for the multipart boundaries and the small form fields sent alongside the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class StoredUpload:
+    __slots__ = ("path", "size", "sha256", "mime_type")
+
+    def __init__(self, path: str, size: int, sha256: str, mime_type: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.mime_type = mime_type
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size exceeds maximum allowed size of {max_bytes // MB}MB"
+    )
+
+
+def _copy_upload(source: BinaryIO, directory: str, filename: str, file_extension: str, max_bytes: int) -> StoredUpload:
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    mime_type = None
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            source.seek(0)
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                if mime_type is None:
+                    mime_type = detect_mime(chunk)
+                    check_content(file_extension, mime_type)
+                digest.update(chunk)
+                out.write(chunk)
+        if mime_type is None:
+            mime_type = detect_mime(b"")
+            check_content(file_extension, mime_type)
+        # mkstemp creates 0600; uploads are read by whatever serves them
+        os.chmod(temp_path, 0o644)
+        path = os.path.join(directory, filename)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return StoredUpload(path, size, digest.hexdigest(), mime_type)
+
+
+async def save_upload(
+    file: UploadFile,
+    directory: str,
+    name: str,
+    max_bytes: Optional[int] = None,
+    allowed_extensions: Optional[List[str]] = None
+) -> StoredUpload:
+    """Validate and store `file` as `directory/name<ext>`; raises 400/413 HTTPExceptions."""
+    max_bytes = max_bytes or settings.MAX_UPLOAD_SIZE_MB * MB
+    file_extension = check_filename(file.filename, allowed_extensions)
+    # The multipart parser already knows the size; skip the copy when it is over
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    return await asyncio.to_thread(
+        _copy_upload, file.file, directory, f"{name}{file_extension}", file_extension, max_bytes
+    )
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_body = max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT", "PATCH"):
+            headers = dict(scope["headers"])
+            content_type = headers.get(b"content-type", b"")
+            content_length = headers.get(b"content-length", b"")
+            if content_type.startswith(b"multipart/") and content_length.isdigit() \
+                    and int(content_length) > self.max_body:
+                response = JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE_MB}MB"},
+                    headers={"Connection": "close"}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
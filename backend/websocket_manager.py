@@ -1,6 +1,8 @@
 from fastapi import WebSocket
 from typing import Dict, List, Set
-import json
+
+from json_codec import dumps_str
+from metrics import WEBSOCKET_CONNECTIONS
 
 
 class ConnectionManager:
@@ -18,6 +20,7 @@ class ConnectionManager:
         if user_role not in self.role_connections:
             self.role_connections[user_role] = []
         self.role_connections[user_role].append(websocket)
+        WEBSOCKET_CONNECTIONS.labels(user_role).inc()
     
     def disconnect(self, websocket: WebSocket, user_id: int, user_role: str):
         if user_id in self.active_connections:
@@ -29,30 +32,35 @@ class ConnectionManager:
         if user_role in self.role_connections:
             if websocket in self.role_connections[user_role]:
                 self.role_connections[user_role].remove(websocket)
+                WEBSOCKET_CONNECTIONS.labels(user_role).dec()
             if not self.role_connections[user_role]:
                 del self.role_connections[user_role]
     
+    # Each message is encoded once, however many connections it goes to
     async def send_personal_message(self, message: dict, user_id: int):
         if user_id in self.active_connections:
+            text = dumps_str(message)
             for connection in self.active_connections[user_id]:
                 try:
-                    await connection.send_text(json.dumps(message))
+                    await connection.send_text(text)
                 except:
                     pass
     
     async def send_to_role(self, message: dict, role: str):
         if role in self.role_connections:
+            text = dumps_str(message)
             for connection in self.role_connections[role]:
                 try:
-                    await connection.send_text(json.dumps(message))
+                    await connection.send_text(text)
                 except:
                     pass
     
     async def broadcast(self, message: dict):
+        text = dumps_str(message)
         for connections in self.active_connections.values():
             for connection in connections:
                 try:
-                    await connection.send_text(json.dumps(message))
+                    await connection.send_text(text)
                 except:
                     pass
 
@@ -218,6 +218,22 @@ def check_sla_warnings(db: Session, actor_id: Optional[int] = None) -> int:
             Complaint.status == ComplaintStatus.UNDER_REVIEW
         ).all()
         
+        # Complaints that already received a warning, fetched in one query.
+        # A warning is never older than its complaint, so bounding created_at
+        # lets Postgres skip audit_logs partitions that predate every candidate.
+        already_warned = set()
+        if complaints:
+            from models import AuditLog
+            oldest_created_at = min(c.created_at for c in complaints)
+            already_warned = {
+                target_id for (target_id,) in db.query(AuditLog.target_id).filter(
+                    AuditLog.action == "SLA_WARNING",
+                    AuditLog.target_type == "complaint",
+                    AuditLog.target_id.in_([c.id for c in complaints]),
+                    AuditLog.created_at >= oldest_created_at
+                ).distinct()
+            }
+        
         for complaint in complaints:
             sla_config = db.query(SLAConfig).filter(
                 (SLAConfig.category_id == complaint.category_id) |
@@ -234,15 +250,7 @@ def check_sla_warnings(db: Session, actor_id: Optional[int] = None) -> int:
             
             # Check if complaint is approaching deadline but not yet past it
             if time_since_creation > warning_threshold and time_since_creation < escalation_threshold:
-                # Check if we already sent a warning (using audit log)
-                from models import AuditLog
-                existing_warning = db.query(AuditLog).filter(
-                    AuditLog.action == "SLA_WARNING",
-                    AuditLog.target_type == "complaint",
-                    AuditLog.target_id == complaint.id
-                ).first()
-                
-                if existing_warning:
+                if complaint.id in already_warned:
                     continue  # Already sent warning for this complaint
                 
                 # Calculate time remaining
@@ -263,6 +271,7 @@ def check_sla_warnings(db: Session, actor_id: Optional[int] = None) -> int:
                             complaint_owner.email,
                             complaint_owner.phone,
                             complaint.id,
+                            complaint.title,
                             time_remaining_str,
                             sla_deadline,
                             language="ar"
@@ -280,6 +289,7 @@ def check_sla_warnings(db: Session, actor_id: Optional[int] = None) -> int:
                                 assigned_user.email,
                                 assigned_user.phone,
                                 complaint.id,
+                                complaint.title,
                                 time_remaining_str,
                                 sla_deadline,
                                 language="ar"
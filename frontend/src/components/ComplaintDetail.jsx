@@ -86,17 +86,15 @@ function ComplaintDetail({ complaint: propComplaint, onBack, role, embedded = fa
 
   const handleDownloadAttachment = async (attachmentId, filename) => {
     try {
-      const response = await api.get(`/attachments/${attachmentId}/download`, {
-        responseType: 'blob',
-      });
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      // A short-lived signed link: the browser downloads the file directly
+      // instead of buffering it in memory through axios
+      const { data } = await api.post(`/files/attachment/${attachmentId}/url`);
       const link = document.createElement('a');
-      link.href = url;
+      link.href = data.url;
       link.setAttribute('download', filename);
       document.body.appendChild(link);
       link.click();
       link.remove();
-      window.URL.revokeObjectURL(url);
     } catch (error) {
       console.error('Error downloading attachment:', error);
       alert('فشل تحميل الملف');
@@ -105,8 +103,8 @@ function ComplaintDetail({ complaint: propComplaint, onBack, role, embedded = fa
 
   const loadCommitteeUsers = async () => {
     try {
-      const response = await api.get('/users/committee');
-      setCommitteeUsers(response.data);
+      const response = await api.get('/users/committee', { params: { page_size: 100 } });
+      setCommitteeUsers(response.data.items);
     } catch (error) {
       console.error('Error loading users:', error);
     }
@@ -470,7 +468,16 @@ function ComplaintDetail({ complaint: propComplaint, onBack, role, embedded = fa
                 className="flex items-center justify-between p-4 bg-gray-50 rounded-lg border border-gray-200 hover:border-primary-500 transition-colors"
               >
                 <div className="flex items-center gap-3 flex-1 min-w-0">
-                  <PaperClipIcon className="w-5 h-5 text-gray-500 flex-shrink-0" />
+                  {attachment.preview_url ? (
+                    <img
+                      src={attachment.preview_url}
+                      alt={attachment.filename}
+                      loading="lazy"
+                      className="w-12 h-12 rounded object-cover flex-shrink-0"
+                    />
+                  ) : (
+                    <PaperClipIcon className="w-5 h-5 text-gray-500 flex-shrink-0" />
+                  )}
                   <div className="flex-1 min-w-0">
                     <p className="text-sm font-medium text-gray-900 truncate">
                       {attachment.filename}
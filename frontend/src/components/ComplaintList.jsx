@@ -75,8 +75,8 @@ function ComplaintList({ onUpdate, role, embedded = false }) {
 
   const loadCommitteeUsers = async () => {
     try {
-      const response = await api.get('/users/committee');
-      setCommitteeUsers(response.data);
+      const response = await api.get('/users/committee', { params: { page_size: 100 } });
+      setCommitteeUsers(response.data.items);
     } catch (error) {
       console.error('Error loading committee users:', error);
     }
@@ -337,6 +337,7 @@ function ComplaintList({ onUpdate, role, embedded = false }) {
         <div className="flex flex-wrap gap-3">
           <ExportButton
             endpoint="/api/export/complaints/excel"
+            jobType="complaints_excel"
             filename="complaints"
             params={{
               status: statusFilter !== 'all' ? statusFilter : undefined,
@@ -349,6 +350,7 @@ function ComplaintList({ onUpdate, role, embedded = false }) {
           />
           <ExportButton
             endpoint="/api/export/complaints/csv"
+            jobType="complaints_csv"
             filename="complaints"
             params={{
               status: statusFilter !== 'all' ? statusFilter : undefined,
@@ -525,7 +527,7 @@ function ComplaintList({ onUpdate, role, embedded = false }) {
                           )}
                         </div>
                         <p className="text-sm text-gray-900 dark:text-gray-100 font-medium line-clamp-2">
-                          {complaint.problem_description || 'بدون وصف'}
+                          {complaint.complaint_summary || 'بدون وصف'}
                         </p>
                         {complaint.trader_name && (
                           <p className="text-xs text-gray-600 dark:text-gray-400">
@@ -5,18 +5,36 @@ import { useTranslation } from 'react-i18next';
 import api from '../../api/axios';
 import { toast } from 'react-toastify';
 
-const ExportButton = ({ endpoint, filename, params = {}, label, format = 'excel' }) => {
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const waitForExportJob = async (jobId) => {
+  for (;;) {
+    const { data: job } = await api.get(`/export/jobs/${jobId}`);
+    if (job.status === 'COMPLETED') return job;
+    if (job.status === 'FAILED') throw new Error(job.error || 'Export failed');
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
+const ExportButton = ({ endpoint, jobType, filename, params = {}, label, format = 'excel' }) => {
   const { t } = useTranslation();
   const [loading, setLoading] = useState(false);
 
+  const fetchExport = async () => {
+    if (!jobType) {
+      return api.get(endpoint, { params, responseType: 'blob' });
+    }
+    // Large exports run as background jobs; identical requests share one job
+    const { data: job } = await api.post('/export/jobs', { export_type: jobType, ...params });
+    await waitForExportJob(job.id);
+    return api.get(`/export/jobs/${job.id}/download`, { responseType: 'blob' });
+  };
+
   const handleExport = async () => {
     try {
       setLoading(true);
       
-      const response = await api.get(endpoint, {
-        params,
-        responseType: 'blob'
-      });
+      const response = await fetchExport();
 
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
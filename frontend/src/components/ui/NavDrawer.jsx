@@ -1,6 +1,7 @@
 import React from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../../context/AuthContext';
+import { avatarUrl } from '../../utils/avatar';
 import { 
   HomeIcon, 
   DocumentTextIcon, 
@@ -71,7 +72,7 @@ const NavDrawer = ({ isOpen, onClose }) => {
             <div className="flex items-center gap-3">
               {user?.profile_picture ? (
                 <img
-                  src={user.profile_picture}
+                  src={avatarUrl(user, 48)}
                   alt="Profile"
                   className="w-12 h-12 rounded-full object-cover border-2 border-white shadow-md"
                 />
@@ -0,0 +1,33 @@
+import React from 'react';
+
+const buttonClasses = 'px-5 py-2.5 rounded-xl bg-white dark:bg-gray-800 border-2 border-gray-200 dark:border-gray-700 text-gray-700 dark:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-700 disabled:opacity-50 disabled:cursor-not-allowed font-bold transition-all shadow-sm hover:shadow-md';
+
+// Previous/next controls for a paginated list response ({ items, total, page, page_size })
+const Pager = ({ page, pageSize, total, onPageChange }) => {
+  const totalPages = Math.max(1, Math.ceil((total || 0) / pageSize));
+  if (totalPages <= 1) return null;
+
+  return (
+    <div className="flex items-center justify-center gap-3 mt-6">
+      <button
+        onClick={() => onPageChange(Math.max(1, page - 1))}
+        disabled={page <= 1}
+        className={buttonClasses}
+      >
+        السابق
+      </button>
+      <span className="text-sm font-semibold text-gray-600 dark:text-gray-400">
+        صفحة {page} من {totalPages} ({total})
+      </span>
+      <button
+        onClick={() => onPageChange(Math.min(totalPages, page + 1))}
+        disabled={page >= totalPages}
+        className={buttonClasses}
+      >
+        التالي
+      </button>
+    </div>
+  );
+};
+
+export default Pager;
@@ -4,6 +4,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { useAuth } from '../../context/AuthContext';
 import { toast } from 'react-toastify';
 import api from '../../api/axios';
+import { avatarUrl } from '../../utils/avatar';
 import {
   UserCircleIcon,
   Cog6ToothIcon,
@@ -84,7 +85,11 @@ function ProfileDropdown() {
         },
       });
 
-      const updatedUser = { ...user, profile_picture: response.data.profile_picture };
+      const updatedUser = {
+        ...user,
+        profile_picture: response.data.profile_picture,
+        profile_picture_urls: response.data.profile_picture_urls,
+      };
       localStorage.setItem('user', JSON.stringify(updatedUser));
       setUser(updatedUser);
       toast.success('تم تحديث الصورة الشخصية بنجاح');
@@ -139,7 +144,7 @@ function ProfileDropdown() {
       >
         {user?.profile_picture ? (
           <img
-            src={user.profile_picture}
+            src={avatarUrl(user, 32)}
             alt={`${user.first_name} ${user.last_name}`}
             className="w-8 h-8 rounded-full object-cover border-2 border-primary-500"
           />
@@ -177,7 +182,7 @@ function ProfileDropdown() {
                 <div className="relative group">
                   {user?.profile_picture ? (
                     <img
-                      src={user.profile_picture}
+                      src={avatarUrl(user, 48)}
                       alt={`${user.first_name} ${user.last_name}`}
                       className={`w-12 h-12 rounded-full object-cover border-2 border-primary-500 transition-all ${
                         uploading ? 'opacity-50 animate-pulse' : ''
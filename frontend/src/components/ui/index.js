@@ -18,3 +18,4 @@ export { default as LoadingFallback } from '../LoadingFallback';
 export { default as AdminNavMenu } from './AdminNavMenu';
 export { default as NotificationBell } from './NotificationBell';
 export { default as ExportButton } from './ExportButton';
+export { default as Pager } from './Pager';
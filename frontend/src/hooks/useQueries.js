@@ -76,12 +76,12 @@ export const useComplaints = (filters = {}) => {
   });
 };
 
-export const useUsers = (filters = {}) => {
+export const useUsers = (filters = {}, page = 1) => {
   const { user } = useAuth();
   return useQuery({
-    queryKey: ['users', user?.id, filters],
+    queryKey: ['users', user?.id, filters, page],
     queryFn: async () => {
-      const params = {};
+      const params = { page };
       if (filters.role) params.role = filters.role;
       if (filters.is_active !== '') params.is_active = filters.is_active === 'true';
       if (filters.search) params.search = filters.search;
@@ -117,12 +117,12 @@ export const useCategories = () => {
   });
 };
 
-export const usePayments = (statusFilter = 'all') => {
+export const usePayments = (statusFilter = 'all', page = 1) => {
   const { user } = useAuth();
   return useQuery({
-    queryKey: ['payments', user?.id, statusFilter],
+    queryKey: ['payments', user?.id, statusFilter, page],
     queryFn: async () => {
-      const params = statusFilter !== 'all' ? { status: statusFilter } : {};
+      const params = statusFilter !== 'all' ? { status: statusFilter, page } : { page };
       const response = await api.get('/payments', { params });
       return response.data;
     },
@@ -165,6 +165,19 @@ export const useAuditLogs = (filters = {}) => {
   });
 };
 
+export const useAuditLogActions = () => {
+  const { user } = useAuth();
+  return useQuery({
+    queryKey: ['auditLogActions', user?.id],
+    queryFn: async () => {
+      const response = await api.get('/admin/audit-logs/actions');
+      return response.data;
+    },
+    staleTime: 10 * 60 * 1000,
+    enabled: !!user,
+  });
+};
+
 export const useQuickReplies = () => {
   const { user } = useAuth();
   return useQuery({
@@ -93,12 +93,14 @@ const Analytics = React.memo(() => {
               <div className="flex flex-wrap gap-3">
                 <ExportButton
                   endpoint="/api/export/analytics/excel"
+                  jobType="analytics_excel"
                   filename="analytics_report"
                   label="تصدير Excel"
                   format="excel"
                 />
                 <ExportButton
                   endpoint="/api/export/analytics/csv"
+                  jobType="analytics_csv"
                   filename="analytics_report"
                   label="تصدير CSV"
                   format="csv"
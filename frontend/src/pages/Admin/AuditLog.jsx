@@ -2,7 +2,7 @@ import React, { useState, useMemo } from 'react';
 import { motion } from 'framer-motion';
 import { ResponsivePageShell, LoadingFallback, CTAButton, AdminNavMenu } from '../../components/ui';
 import { RefreshCcw, ChevronLeft, ChevronRight } from 'lucide-react';
-import { useAuditLogs } from '../../hooks/useQueries';
+import { useAuditLogs, useAuditLogActions } from '../../hooks/useQueries';
 import { useQueryClient } from '@tanstack/react-query';
 
 function AuditLog() {
@@ -17,6 +17,7 @@ function AuditLog() {
   const [currentPage, setCurrentPage] = useState(1);
 
   const { data: logs = [], isLoading: loading } = useAuditLogs(filters);
+  const { data: actions = [] } = useAuditLogActions();
   const totalPages = useMemo(() => Math.ceil(logs.length / filters.limit) || 1, [logs.length, filters.limit]);
 
   const loadLogs = () => {
@@ -91,13 +92,16 @@ function AuditLog() {
             </div>
             <div>
               <label className="block text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">الإجراء</label>
-              <input
-                type="text"
+              <select
                 value={filters.action}
                 onChange={(e) => setFilters({ ...filters, action: e.target.value, offset: 0 })}
-                placeholder="بحث في الإجراءات"
                 className="w-full px-4 py-2.5 border border-gray-300 dark:border-gray-600 rounded-xl bg-white dark:bg-gray-800 text-gray-900 dark:text-white focus:ring-2 focus:ring-primary-500 focus:border-transparent transition-all"
-              />
+              >
+                <option value="">الكل</option>
+                {actions.map((action) => (
+                  <option key={action} value={action}>{getActionText(action)}</option>
+                ))}
+              </select>
             </div>
             <div>
               <label className="block text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">نوع الهدف</label>
@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { toast } from 'react-toastify';
 import { motion, AnimatePresence } from 'framer-motion';
-import { ResponsivePageShell, LoadingFallback, CTAButton, AdminNavMenu } from '../../components/ui';
+import { ResponsivePageShell, LoadingFallback, CTAButton, AdminNavMenu, Pager } from '../../components/ui';
 import { Eye, CheckCircle, XCircle, X } from 'lucide-react';
 import { usePayments } from '../../hooks/useQueries';
 import { useQueryClient } from '@tanstack/react-query';
@@ -10,9 +10,29 @@ import api from '../../api/axios';
 function PaymentsReview() {
   const queryClient = useQueryClient();
   const [filter, setFilter] = useState('PENDING');
+  const [page, setPage] = useState(1);
   const [selectedPayment, setSelectedPayment] = useState(null);
 
-  const { data: payments = [], isLoading: loading } = usePayments(filter);
+  const { data, isLoading: loading } = usePayments(filter, page);
+  const payments = data?.items || [];
+
+  const changeFilter = (value) => {
+    setFilter(value);
+    setPage(1);
+  };
+
+  const handleViewProof = async (e, paymentId) => {
+    e.preventDefault();
+    // Opened before the request so the popup isn't blocked, then pointed at a signed link
+    const proofWindow = window.open('', '_blank');
+    try {
+      const { data } = await api.post(`/files/payment-proof/${paymentId}/url`);
+      proofWindow.location.href = `${data.url}&inline=1`;
+    } catch (error) {
+      proofWindow.close();
+      toast.error(error.response?.data?.detail || 'فشل في فتح المرفق');
+    }
+  };
 
   const handleApprove = async (paymentId) => {
     const notes = window.prompt('ملاحظات الموافقة (اختياري):');
@@ -107,17 +127,17 @@ function PaymentsReview() {
           </div>
           <div className="flex gap-2 flex-wrap">
             <button
-              onClick={() => setFilter('all')}
+              onClick={() => changeFilter('all')}
               className={`px-6 py-2.5 rounded-xl font-semibold transition-all ${
                 filter === 'all' 
                   ? 'bg-primary-600 dark:bg-primary-500 text-white shadow-md' 
                   : 'bg-white dark:bg-gray-800 text-gray-700 dark:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-700 border border-gray-200 dark:border-gray-700'
               }`}
             >
-              الكل ({payments.length})
+              الكل{filter === 'all' && data ? ` (${data.total})` : ''}
             </button>
             <button
-              onClick={() => setFilter('PENDING')}
+              onClick={() => changeFilter('PENDING')}
               className={`px-6 py-2.5 rounded-xl font-semibold transition-all ${
                 filter === 'PENDING' 
                   ? 'bg-yellow-600 dark:bg-yellow-500 text-white shadow-md' 
@@ -127,7 +147,7 @@ function PaymentsReview() {
               قيد المراجعة
             </button>
             <button
-              onClick={() => setFilter('APPROVED')}
+              onClick={() => changeFilter('APPROVED')}
               className={`px-6 py-2.5 rounded-xl font-semibold transition-all ${
                 filter === 'APPROVED' 
                   ? 'bg-green-600 dark:bg-green-500 text-white shadow-md' 
@@ -137,7 +157,7 @@ function PaymentsReview() {
               موافق عليها
             </button>
             <button
-              onClick={() => setFilter('REJECTED')}
+              onClick={() => changeFilter('REJECTED')}
               className={`px-6 py-2.5 rounded-xl font-semibold transition-all ${
                 filter === 'REJECTED' 
                   ? 'bg-red-600 dark:bg-red-500 text-white shadow-md' 
@@ -213,6 +233,8 @@ function PaymentsReview() {
           </motion.div>
         )}
 
+        {data && <Pager page={page} pageSize={data.page_size} total={data.total} onPageChange={setPage} />}
+
         {selectedPayment && (
           <AnimatePresence>
             <div className="fixed inset-0 bg-black/60 backdrop-blur-sm flex items-center justify-center z-50 p-4" onClick={() => setSelectedPayment(null)}>
@@ -316,9 +338,8 @@ function PaymentsReview() {
                     <div className="p-4 bg-gradient-to-br from-blue-50 to-indigo-50 dark:from-blue-900 dark:to-indigo-900 rounded-xl">
                       <p className="text-sm font-semibold text-blue-700 dark:text-blue-300 mb-2">إثبات الدفع</p>
                       <a
-                        href={`/api/${selectedPayment.proof_path}`}
-                        target="_blank"
-                        rel="noopener noreferrer"
+                        href="#"
+                        onClick={(e) => handleViewProof(e, selectedPayment.id)}
                         className="inline-block px-4 py-2 bg-gradient-to-r from-blue-600 to-indigo-600 text-white rounded-lg hover:from-blue-700 hover:to-indigo-700 transition-all transform hover:scale-105"
                       >
                         عرض المرفق
@@ -1,12 +1,14 @@
 import React, { useState, useEffect } from 'react';
 import { toast } from 'react-toastify';
 import { motion, AnimatePresence } from 'framer-motion';
-import { ResponsivePageShell, ConfirmDialog, CTAButton, LoadingFallback, AdminNavMenu } from '../../components/ui';
+import { ResponsivePageShell, ConfirmDialog, CTAButton, LoadingFallback, AdminNavMenu, Pager } from '../../components/ui';
 import { Plus, Edit2, Trash2, Key, X, Save, RefreshCcw } from 'lucide-react';
 import api from '../../api/axios';
 
 function UsersManagement() {
   const [users, setUsers] = useState([]);
+  const [page, setPage] = useState(1);
+  const [pageInfo, setPageInfo] = useState({ total: 0, page_size: 50 });
   const [loading, setLoading] = useState(true);
   const [showCreateModal, setShowCreateModal] = useState(false);
   const [editingUser, setEditingUser] = useState(null);
@@ -15,18 +17,24 @@ function UsersManagement() {
 
   useEffect(() => {
     loadUsers();
-  }, [filters]);
+  }, [filters, page]);
+
+  const updateFilters = (next) => {
+    setFilters(next);
+    setPage(1);
+  };
 
   const loadUsers = async () => {
     setLoading(true);
     try {
-      const params = {};
+      const params = { page };
       if (filters.role) params.role = filters.role;
       if (filters.is_active !== '') params.is_active = filters.is_active === 'true';
       if (filters.search) params.search = filters.search;
       
       const response = await api.get('/admin/users', { params });
-      setUsers(response.data);
+      setUsers(response.data.items);
+      setPageInfo({ total: response.data.total, page_size: response.data.page_size });
     } catch (error) {
       console.error('Error loading users:', error);
       toast.error('فشل في تحميل المستخدمين');
@@ -142,7 +150,7 @@ function UsersManagement() {
               <input
                 type="text"
                 value={filters.search}
-                onChange={(e) => setFilters({ ...filters, search: e.target.value })}
+                onChange={(e) => updateFilters({ ...filters, search: e.target.value })}
                 placeholder="الاسم أو البريد الإلكتروني"
                 className="w-full px-4 py-2.5 border border-gray-300 dark:border-gray-600 rounded-xl bg-white dark:bg-gray-800 text-gray-900 dark:text-white focus:ring-2 focus:ring-primary-500 focus:border-transparent transition-all"
               />
@@ -151,7 +159,7 @@ function UsersManagement() {
               <label className="block text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">الدور</label>
               <select
                 value={filters.role}
-                onChange={(e) => setFilters({ ...filters, role: e.target.value })}
+                onChange={(e) => updateFilters({ ...filters, role: e.target.value })}
                 className="w-full px-4 py-2.5 border border-gray-300 dark:border-gray-600 rounded-xl bg-white dark:bg-gray-800 text-gray-900 dark:text-white focus:ring-2 focus:ring-primary-500 focus:border-transparent transition-all"
               >
                 <option value="">الكل</option>
@@ -164,7 +172,7 @@ function UsersManagement() {
               <label className="block text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">الحالة</label>
               <select
                 value={filters.is_active}
-                onChange={(e) => setFilters({ ...filters, is_active: e.target.value })}
+                onChange={(e) => updateFilters({ ...filters, is_active: e.target.value })}
                 className="w-full px-4 py-2.5 border border-gray-300 dark:border-gray-600 rounded-xl bg-white dark:bg-gray-800 text-gray-900 dark:text-white focus:ring-2 focus:ring-primary-500 focus:border-transparent transition-all"
               >
                 <option value="">الكل</option>
@@ -269,6 +277,8 @@ function UsersManagement() {
           </table>
         </motion.div>
 
+        <Pager page={page} pageSize={pageInfo.page_size} total={pageInfo.total} onPageChange={setPage} />
+
           {/* Create User Modal */}
           {showCreateModal && (
             <UserFormModal
@@ -39,8 +39,9 @@ function ApprovalManagement() {
     try {
       setLoading(true);
       const endpoint = showAll ? '/approvals' : '/approvals/pending';
-      const response = await api.get(endpoint);
-      setApprovals(response.data || []);
+      const response = await api.get(endpoint, showAll ? {} : { params: { page_size: 100 } });
+      // /approvals/pending is paginated, /approvals is not
+      setApprovals((showAll ? response.data : response.data?.items) || []);
     } catch (error) {
       console.error('Error loading approvals:', error);
       showNotification('حدث خطأ أثناء تحميل طلبات الموافقة', 'error');
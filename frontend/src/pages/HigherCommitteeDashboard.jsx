@@ -510,7 +510,7 @@ function ComplaintsTab({ recentComplaints, navigate, getStatusColor, getStatusLa
                       </td>
                       <td className="px-4 py-4">
                         <p className="text-sm text-gray-900 dark:text-white line-clamp-2 max-w-md">
-                          {complaint.problem_description}
+                          {complaint.complaint_summary}
                         </p>
                       </td>
                       <td className="px-4 py-4 whitespace-nowrap">
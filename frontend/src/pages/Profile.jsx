@@ -8,6 +8,7 @@ import AccountInfo from '../components/ui/AccountInfo';
 import EmailUpdateModal from '../components/ui/EmailUpdateModal';
 import { toast } from 'react-toastify';
 import api from '../api/axios';
+import { avatarUrl } from '../utils/avatar';
 import {
   UserCircleIcon,
   CameraIcon,
@@ -84,7 +85,11 @@ function Profile() {
         },
       });
 
-      const updatedUser = { ...user, profile_picture: response.data.profile_picture };
+      const updatedUser = {
+        ...user,
+        profile_picture: response.data.profile_picture,
+        profile_picture_urls: response.data.profile_picture_urls,
+      };
       localStorage.setItem('user', JSON.stringify(updatedUser));
       setUser(updatedUser);
       toast.success('تم تحديث الصورة الشخصية بنجاح');
@@ -134,7 +139,7 @@ function Profile() {
             <div className="relative group">
               {user?.profile_picture ? (
                 <img
-                  src={user.profile_picture}
+                  src={avatarUrl(user, 128)}
                   alt="Profile"
                   className="w-32 h-32 rounded-full object-cover border-4 border-primary-500 shadow-lg"
                 />
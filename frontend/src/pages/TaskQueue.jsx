@@ -38,8 +38,8 @@ function TaskQueue() {
   const loadTasks = async () => {
     try {
       setLoading(true);
-      const response = await api.get('/task-queue/my-queue');
-      setTasks(response.data || []);
+      const response = await api.get('/task-queue/my-queue', { params: { page_size: 100 } });
+      setTasks(response.data?.items || []);
     } catch (error) {
       console.error('Error loading tasks:', error);
       showNotification('حدث خطأ أثناء تحميل قائمة المهام', 'error');
@@ -289,7 +289,7 @@ function TechnicalCommitteeDashboard() {
                         شكوى #{complaint.id}
                       </h4>
                       <p className="text-sm text-gray-600 dark:text-gray-400 line-clamp-2">
-                        {complaint.problem_description}
+                        {complaint.complaint_summary}
                       </p>
                     </div>
                     <div className="flex flex-col items-end gap-2">
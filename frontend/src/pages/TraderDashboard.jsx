@@ -414,7 +414,7 @@ function TraderDashboardContent() {
                         {complaint.title || `شكوى #${complaint.id}`}
                       </h4>
                       <p className="text-sm text-gray-600 dark:text-gray-400 line-clamp-2 mb-2">
-                        {complaint.problem_description}
+                        {complaint.complaint_summary}
                       </p>
                       <div className="flex items-center gap-2 text-xs text-gray-500 dark:text-gray-400">
                         <span>{format(new Date(complaint.created_at), 'd MMM yyyy', { locale: ar })}</span>
@@ -23,7 +23,7 @@ function TraderSubscription() {
         api.get('/payments')
       ]);
       setSubscription(subRes.data);
-      setPayments(payRes.data);
+      setPayments(payRes.data.items);
     } catch (error) {
       console.error('Error loading data:', error);
       toast.error('حدث خطأ أثناء تحميل بيانات الاشتراك. يرجى المحاولة مرة أخرى.');
@@ -5,6 +5,7 @@ import { useTheme } from '../context/ThemeContext';
 import ResponsivePageShell from '../components/ui/ResponsivePageShell';
 import { toast } from 'react-toastify';
 import api from '../api/axios';
+import { avatarUrl } from '../utils/avatar';
 import {
   BellIcon,
   MoonIcon,
@@ -123,7 +124,11 @@ function UserSettings() {
         }
       });
 
-      setUser({ ...user, profile_picture: response.data.profile_picture });
+      setUser({
+        ...user,
+        profile_picture: response.data.profile_picture,
+        profile_picture_urls: response.data.profile_picture_urls
+      });
       toast.success('تم تحديث صورة الملف الشخصي بنجاح');
     } catch (error) {
       console.error('Error uploading profile picture:', error);
@@ -213,7 +218,7 @@ function UserSettings() {
                   <div className="relative">
                     {user?.profile_picture ? (
                       <img
-                        src={user.profile_picture}
+                        src={avatarUrl(user, 80)}
                         alt="Profile"
                         className="w-20 h-20 rounded-full object-cover border-2 border-primary-600"
                       />
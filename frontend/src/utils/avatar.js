@@ -0,0 +1,10 @@
+// Smallest resized avatar that covers `size` CSS pixels on this screen;
+// the original picture for users without resized copies
+export function avatarUrl(user, size) {
+  const urls = user?.profile_picture_urls;
+  if (!urls) return user?.profile_picture;
+  const needed = size * (window.devicePixelRatio || 1);
+  const sizes = Object.keys(urls).map(Number).sort((a, b) => a - b);
+  const best = sizes.find((s) => s >= needed) ?? sizes[sizes.length - 1];
+  return urls[best];
+}
@@ -119,6 +119,7 @@ echo ""
 echo "Terminal 1 (Backend):"
 echo "  cd backend"
 echo "  source venv/bin/activate"
+echo "  python bootstrap.py"
 echo "  uvicorn main:app --host 0.0.0.0 --port 8000 --reload"
 echo ""
 echo "Terminal 2 (Frontend):"